@@ -0,0 +1,121 @@
+import time
+import sqlite3
+import threading
+
+# Resolution and retention in seconds of every tier, finest first; None keeps samples forever
+TIERS = [
+    (60, 86400),         # per minute for a day
+    (3600, 30 * 86400),  # hourly for a month
+    (86400, None),       # daily forever
+]
+
+# Series of the economy's total supply; user series are keyed by user id
+ECONOMY = 0
+
+PRUNE_INTERVAL = 3600
+
+
+class BalanceHistory:
+    """Balance time series of one economy, downsampled in tiers.
+
+    Balance changes only remember the newest balance of each series; sample()
+    turns those into one timestamped sample per changed series, so a user
+    costs nothing while their balance does not move. flush() writes every
+    sample into each tier as the closing balance of the tier's bucket and
+    drops buckets older than the tier's retention, so a series holds at most
+    a day of minutes and a month of hours plus one row per active day.
+    """
+
+    def __init__(self, db_file='balance_history.db', tiers=TIERS):
+        self.db_file = db_file
+        self.tiers = tiers
+        self._latest = {}  # series -> balance changed since the last sample
+        self._pending = []  # (timestamp, {series: balance}) not written yet
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pruned_at = 0
+        self.samples = 0
+
+        self._writer = sqlite3.connect(db_file, check_same_thread=False)
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        self._writer.execute('CREATE TABLE IF NOT EXISTS samples (series INTEGER NOT NULL, tier INTEGER NOT NULL, '
+                             'bucket INTEGER NOT NULL, balance INTEGER NOT NULL, PRIMARY KEY (series, tier, bucket)) WITHOUT ROWID')
+        # Pruning deletes by age across all series
+        self._writer.execute('CREATE INDEX IF NOT EXISTS samples_age ON samples (tier, bucket)')
+        self._writer.commit()
+        self._reader = sqlite3.connect(db_file, check_same_thread=False)
+
+    def changed(self, series, balance):
+        """Remember the newest balance of a series until the next sample"""
+        self._latest[series] = balance
+
+    @property
+    def changes(self):
+        """Series changed since the last sample"""
+        return len(self._latest)
+
+    def sample(self, now=None):
+        """Take one sample of every series that changed since the last one; returns how many"""
+        now = int(now if now is not None else time.time())
+        latest, self._latest = self._latest, {}
+        if latest:
+            with self._lock:
+                self._pending.append((now, latest))
+            self.samples += len(latest)
+        return len(latest)
+
+    def flush(self, now=None):
+        """Write the pending samples into every tier and prune expired buckets; returns the rows written"""
+        now = int(now if now is not None else time.time())
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            rows = {}
+            # Samples are in time order, so the last one of a bucket replaces the earlier ones
+            for timestamp, balances in pending:
+                for tier, (resolution, _) in enumerate(self.tiers):
+                    bucket = timestamp - timestamp % resolution
+                    for series, balance in balances.items():
+                        rows[(series, tier, bucket)] = balance
+            try:
+                if rows:
+                    self._writer.executemany('INSERT OR REPLACE INTO samples (series, tier, bucket, balance) VALUES (?, ?, ?, ?)',
+                                             [(*key, balance) for key, balance in rows.items()])
+                if now - self._pruned_at >= PRUNE_INTERVAL:
+                    for tier, (_, retention) in enumerate(self.tiers):
+                        if retention is not None:
+                            self._writer.execute('DELETE FROM samples WHERE tier = ? AND bucket < ?', (tier, now - retention))
+                    self._pruned_at = now
+                self._writer.commit()
+            except Exception:
+                # Put the samples back so the next flush retries them
+                with self._lock:
+                    self._pending[:0] = pending
+                self._writer.rollback()
+                raise
+            return len(rows)
+
+    def query(self, series, since, until=None, points=300, now=None):
+        """(timestamp, balance) pairs of a series between since and until, at most about ``points`` of them"""
+        now = int(now if now is not None else time.time())
+        until = int(until if until is not None else now)
+        since = int(since)
+        # The finest tier that still holds samples from since
+        for tier, (resolution, retention) in enumerate(self.tiers):
+            if retention is None or since >= now - retention:
+                break
+        start = since - since % resolution
+        buckets = -(-(until - start) // resolution)
+        step = resolution * max(1, -(-buckets // points))
+        rows = self._reader.execute('SELECT bucket, balance FROM samples WHERE series = ? AND tier = ? AND bucket >= ? AND bucket <= ? '
+                                    'ORDER BY bucket', (series, tier, start, until)).fetchall()
+        # With more buckets than points, only the last bucket of every step is kept
+        result = []
+        previous = None
+        for bucket, balance in rows:
+            if result and bucket // step == previous:
+                result[-1] = (bucket, balance)
+            else:
+                result.append((bucket, balance))
+            previous = bucket // step
+        return result
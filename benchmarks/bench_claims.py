@@ -0,0 +1,72 @@
+"""100k /daily claims arriving in the same minute after a reset.
+
+Measures the claim check on its own, then full claims through ChipManager
+(balance update, ledger record and claim time saved together) with
+JSON and tiered storage. Run with: python -m benchmarks.bench_claims
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import multiprocessing
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from claims import ClaimStore
+
+USERS = 100_000
+# Every JSON claim rewrites chips.json, so only a sample is timed
+JSON_SAMPLE = 200
+
+
+def bench_store(directory):
+    store = ClaimStore(os.path.join(directory, "claims.bin"))
+    now = int(time.time())
+    start = time.perf_counter()
+    for user_id in range(USERS):
+        store.claim(user_id, "daily", now)
+    checked = time.perf_counter() - start
+    start = time.perf_counter()
+    written = store.flush()
+    flushed = time.perf_counter() - start
+    # The same users again are all rejected by the cooldown
+    start = time.perf_counter()
+    for user_id in range(USERS):
+        store.claim(user_id, "daily", now + 30)
+    rejected = time.perf_counter() - start
+    print(f"{'claim check (new users)':<34} {checked / USERS * 1e9:8.0f} ns/claim")
+    print(f"{'claim check (on cooldown)':<34} {rejected / USERS * 1e9:8.0f} ns/claim")
+    print(f"{'flush of all slots':<34} {flushed * 1e3:8.1f} ms for {written} slots")
+
+
+def bench_manager(directory, storage, claims):
+    os.chdir(directory)
+    os.environ['CHIP_STORAGE'] = storage
+    os.environ['GLOBAL_ECONOMY'] = 'true'
+    with open('chips.json', 'w') as f:
+        json.dump({str(user_id): 1000 for user_id in range(USERS)}, f)
+    from chip_manager import ChipManager
+    ChipManager._instance = None
+    chip_manager = ChipManager()
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(chip_manager.claim_reward(user_id, "daily") for user_id in range(claims)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    print(f"{'ChipManager claims (' + storage + ')':<34} {elapsed / claims * 1e6:8.0f} us/claim  "
+          f"{claims / elapsed:10,.0f} claims/s  ({claims} claims, {USERS} users)")
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        bench_store(directory)
+    # ChipManager is a singleton, so every storage mode gets a fresh process
+    for storage, claims in (('tiered', USERS), ('json', JSON_SAMPLE)):
+        with tempfile.TemporaryDirectory() as directory:
+            process = multiprocessing.Process(target=bench_manager, args=(directory, storage, claims))
+            process.start()
+            process.join()
@@ -0,0 +1,75 @@
+"""Bulk export and import of a million balances.
+
+Measures rows per second of a gzipped CSV export, the validation pass and
+the import through ChipManager with the longest event loop stall it causes,
+and the peak memory the validation pass
+allocates while streaming the file. Run with: python -m benchmarks.bench_economy_io
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import tracemalloc
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import economy_io
+
+USERS = 1_000_000
+
+
+def report(label, rows, elapsed):
+    print(f"{label:<28} {elapsed:7.2f} s  {rows / elapsed:12,.0f} rows/s")
+
+
+def bench(directory):
+    os.chdir(directory)
+    os.environ['GLOBAL_ECONOMY'] = 'true'
+    with open('chips.json', 'w') as f:
+        json.dump({str(user_id): 1000 for user_id in range(1, USERS + 1)}, f)
+    from chip_manager import ChipManager
+    chip_manager = ChipManager()
+
+    async def run():
+        path = os.path.join(directory, "balances.csv.gz")
+        start = time.perf_counter()
+        rows = await chip_manager.export_data("balances", path, "csv")
+        report("export (csv.gz)", rows, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        rows, error = economy_io.validate_balances(path)
+        assert error is None, error
+        report("validate", rows, time.perf_counter() - start)
+        # Traced separately since tracing slows the pass down several times
+        tracemalloc.start()
+        economy_io.validate_balances(path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'validate peak allocation':<28} {peak / 1024:7.0f} KiB")
+
+        # The longest the event loop went without running a tick during the import
+        stall = 0.0
+
+        async def ticker():
+            nonlocal stall
+            while True:
+                before = time.perf_counter()
+                await asyncio.sleep(0.01)
+                stall = max(stall, time.perf_counter() - before - 0.01)
+
+        ticks = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        rows = await chip_manager.import_balances(path)
+        report("import (one batch)", rows, time.perf_counter() - start)
+        ticks.cancel()
+        print(f"{'import longest loop stall':<28} {stall * 1000:7.0f} ms")
+        chip_manager.persistence.close()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        bench(directory)
@@ -0,0 +1,136 @@
+"""Replay an hour of gateway traffic from a busy guild under the old and new intents.
+
+The old bot asked for the default intents plus message content and ran every
+message through the "!" prefix parser; the bot now only asks for the guilds
+intent, so Discord stops sending message, typing, reaction and voice events.
+Both runs decode the JSON of every event they would receive and feed it to
+discord.py's parsers, and the old one also processes commands for each
+message. Run with: python -m benchmarks.bench_gateway
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+
+import discord
+from discord.ext import commands
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GUILD_ID = 1
+CHANNEL_ID = 10
+MEMBERS = 5000
+
+# Events per hour of a busy guild and the intent Discord requires to send them; None is always sent
+TRAFFIC = {
+    "MESSAGE_CREATE": (30000, "guild_messages"),
+    "MESSAGE_DELETE": (1000, "guild_messages"),
+    "TYPING_START": (20000, "guild_typing"),
+    "MESSAGE_REACTION_ADD": (6000, "guild_reactions"),
+    "MESSAGE_REACTION_REMOVE": (2000, "guild_reactions"),
+    "VOICE_STATE_UPDATE": (1500, "voice_states"),
+    "CHANNEL_UPDATE": (20, "guilds"),
+    "INTERACTION_CREATE": (3000, None),
+}
+
+
+def user(user_id):
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None}
+
+
+def member(user_id):
+    return {"user": user(user_id), "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+
+
+def channel():
+    return {"id": str(CHANNEL_ID), "type": 0, "guild_id": str(GUILD_ID), "name": "general", "position": 0, "permission_overwrites": []}
+
+
+def payload(event, n):
+    """A gateway payload like Discord sends for the event"""
+    user_id = 1000 + random.randrange(MEMBERS)
+    if event == "MESSAGE_CREATE":
+        content = random.choice(["gg", "lol nice", "anyone up for roulette?", "!chips", "that slots run was insane"])
+        data = {"id": str(10**17 + n), "channel_id": str(CHANNEL_ID), "guild_id": str(GUILD_ID), "author": user(user_id),
+                "member": {k: v for k, v in member(user_id).items() if k != "user"}, "content": content,
+                "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None, "tts": False, "mention_everyone": False,
+                "mentions": [], "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0}
+    elif event == "MESSAGE_DELETE":
+        data = {"id": str(10**17 + n), "channel_id": str(CHANNEL_ID), "guild_id": str(GUILD_ID)}
+    elif event == "TYPING_START":
+        data = {"channel_id": str(CHANNEL_ID), "guild_id": str(GUILD_ID), "user_id": str(user_id), "timestamp": 1704067200, "member": member(user_id)}
+    elif event.startswith("MESSAGE_REACTION"):
+        data = {"user_id": str(user_id), "channel_id": str(CHANNEL_ID), "message_id": str(10**17 + n), "guild_id": str(GUILD_ID),
+                "emoji": {"id": None, "name": "🎰"}, "burst": False, "type": 0}
+        if event == "MESSAGE_REACTION_ADD":
+            data["member"] = member(user_id)
+    elif event == "VOICE_STATE_UPDATE":
+        data = {"guild_id": str(GUILD_ID), "channel_id": None, "user_id": str(user_id), "member": member(user_id),
+                "session_id": "s", "deaf": False, "mute": False, "self_deaf": False, "self_mute": False,
+                "self_video": False, "suppress": False, "request_to_speak_timestamp": None}
+    elif event == "CHANNEL_UPDATE":
+        data = channel()
+    else:
+        data = {"id": str(n), "application_id": "1", "type": 2, "token": "t", "version": 1}
+    return json.dumps({"op": 0, "t": event, "s": n, "d": data})
+
+
+def replay_hour():
+    events = [event for event, (count, _) in TRAFFIC.items() for _ in range(count)]
+    random.shuffle(events)
+    return [(event, payload(event, n)) for n, event in enumerate(events)]
+
+
+def guild_create():
+    return {"id": str(GUILD_ID), "name": "Busy guild", "owner_id": "1000", "member_count": MEMBERS, "channels": [channel()],
+            "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                       "hoist": False, "managed": False, "mentionable": False}],
+            "members": [], "emojis": [], "stickers": [], "threads": [], "presences": [], "voice_states": [],
+            "features": [], "unavailable": False, "large": True}
+
+
+async def bench(name, intents, events):
+    bot = commands.Bot(command_prefix="!" if intents.message_content else commands.when_mentioned, intents=intents)
+    await bot._async_setup_hook()  # Binds the bot to the running loop like login() does
+    state = bot._connection
+    state.user = discord.ClientUser(state=state, data=user(1))
+
+    async def on_command_error(ctx, error):
+        pass  # The old bot ignored unknown commands like the slash command names people type with "!"
+    bot.add_listener(on_command_error)
+    state.parse_guild_create(guild_create())
+    await asyncio.sleep(0)
+    received = [(event, raw) for event, raw in events if TRAFFIC[event][1] is None or getattr(intents, TRAFFIC[event][1])]
+
+    start = time.process_time()
+    for i, (event, raw) in enumerate(received):
+        message = json.loads(raw)
+        # Interactions go to the command tree under both intent sets, so only their decoding is counted
+        if event != "INTERACTION_CREATE":
+            state.parsers[event](message["d"])
+        if i % 100 == 0:
+            await asyncio.sleep(0)  # Let the on_message handlers run
+    await asyncio.sleep(0)
+    elapsed = time.process_time() - start
+    print(f"{name:<36} {len(received):8,} events/h  {elapsed:6.2f} s CPU/h")
+    await bot.close()
+    return len(received), elapsed
+
+
+async def main():
+    random.seed(0)
+    events = replay_hour()
+    old = discord.Intents.default()
+    old.message_content = True
+    new = discord.Intents.none()
+    new.guilds = True
+    old_events, old_cpu = await bench("default + message content, ! prefix", old, events)
+    new_events, new_cpu = await bench("guilds only, slash commands", new, events)
+    print(f"{'reduction':<36} {1 - new_events / old_events:14.1%}  {1 - new_cpu / old_cpu:13.1%}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""Storage and query cost of the balance history for users who play all day.
+
+Every user's balance changes every minute for 45 simulated days, sampled like
+the bot does and flushed once per simulated hour. Reports how many rows each
+tier keeps per user against the raw samples, and what a 30-day /graph query
+reads. Run with: python -m benchmarks.bench_history [users] [days]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from balance_history import BalanceHistory, TIERS
+
+DAY = 86400
+
+
+def main(users=20, days=45):
+    random.seed(0)
+    start = 1_700_438_400
+    with tempfile.TemporaryDirectory() as directory:
+        history = BalanceHistory(os.path.join(directory, 'balance_history.db'))
+        balances = [1000] * users
+        began = time.perf_counter()
+        for minute in range(days * 1440):
+            now = start + minute * 60
+            for user_id in range(users):
+                balances[user_id] = max(0, balances[user_id] + random.randint(-50, 50))
+                history.changed(user_id + 1, balances[user_id])
+            history.sample(now)
+            if minute % 60 == 59:
+                history.flush(now)
+        elapsed = time.perf_counter() - began
+        now = start + days * DAY
+
+        rows = dict(history._reader.execute('SELECT tier, COUNT(*) FROM samples GROUP BY tier').fetchall())
+        print(f"{history.samples:,} samples of {users} users over {days} days written in {elapsed:.1f} s")
+        for tier, (resolution, retention) in enumerate(TIERS):
+            kept = "forever" if retention is None else f"{retention // DAY} days"
+            print(f"  every {resolution:>5} s, kept {kept:<8} {rows.get(tier, 0) / users:8,.0f} rows per user")
+        print(f"  total {sum(rows.values()) / users:,.0f} rows per user instead of {history.samples / users:,.0f} samples")
+
+        began = time.perf_counter()
+        for user_id in range(users):
+            points = history.query(user_id + 1, now - 30 * DAY, now=now)
+        elapsed = (time.perf_counter() - began) / users
+        read = history._reader.execute('SELECT COUNT(*) FROM samples WHERE series = 1 AND tier = 1 AND bucket >= ?',
+                                       (now - 30 * DAY,)).fetchone()[0]
+        print(f"30-day query: {read} rows read, {len(points)} points returned, {elapsed * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,105 @@
+"""Interaction latency while a burst of DMs goes out, with and without the outbound scheduler.
+
+A local stand-in for Discord answers every request after a fixed latency and,
+like Discord, lets a bot token make 50 requests per second except for
+interaction responses; requests over the limit wait like discord.py does
+after a 429. While 200 DMs (opening the channel and sending the message) are
+sent at once, users run commands at a steady rate: half only send a followup,
+the other half look up a user first, like the leaderboard does. Run with:
+
+    python -m benchmarks.bench_outbound
+"""
+import os
+import sys
+import time
+import asyncio
+
+from discord.http import Route
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outbound import OutboundScheduler
+
+LATENCY = 0.03
+GLOBAL_LIMIT = 50
+DMS = 200
+COMMANDS_PER_SECOND = 10
+DURATION = 4
+
+
+class LocalDiscord:
+    """Stand-in for Discord's HTTP API with its per-token global rate limit"""
+
+    def __init__(self, limit=GLOBAL_LIMIT, latency=LATENCY):
+        self.limit = limit
+        self.latency = latency
+        self.next_slot = 0.0
+        self.requests = 0
+
+    async def request(self, route, **kwargs):
+        if not route.path.startswith("/interactions/") and route.webhook_token is None:
+            # Every request takes the next free slot of the global limit, like waiting out a 429
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + 1 / self.limit
+            await asyncio.sleep(slot - now)
+        await asyncio.sleep(self.latency)
+        self.requests += 1
+        if route.path == "/users/@me/channels":
+            return {"id": str(10**6 + kwargs["json"]["recipient_id"])}
+        return {"id": "1"}
+
+
+async def send_dm(http, user_id):
+    channel = await http.request(Route("POST", "/users/@me/channels"), json={"recipient_id": user_id})
+    await http.request(Route("POST", "/channels/{channel_id}/messages", channel_id=channel["id"]), json={"content": "You went broke!"})
+
+
+async def command(http, n, lookup):
+    start = time.perf_counter()
+    if lookup:
+        await http.request(Route("GET", "/users/{user_id}", user_id=n))
+    await http.request(Route("POST", "/webhooks/{webhook_id}/{webhook_token}", webhook_id=1, webhook_token=f"token{n}"), json={})
+    return time.perf_counter() - start
+
+
+def percentile(latencies, share):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * share))] * 1000
+
+
+async def bench(name, scheduled):
+    http = LocalDiscord()
+    scheduler = None
+    if scheduled:
+        scheduler = OutboundScheduler()
+        scheduler.install(http)
+    dms = [asyncio.create_task(send_dm(http, user_id)) for user_id in range(DMS)]
+    commands = []
+    for n in range(COMMANDS_PER_SECOND * DURATION):
+        commands.append((n % 2 == 1, asyncio.create_task(command(http, n, lookup=n % 2 == 1))))
+        await asyncio.sleep(1 / COMMANDS_PER_SECOND)
+    followup = [await task for lookup, task in commands if not lookup]
+    with_lookup = [await task for lookup, task in commands if lookup]
+    sent = sum(task.done() for task in dms)
+    for task in dms:
+        task.cancel()
+    await asyncio.gather(*dms, return_exceptions=True)
+    print(f"{name:<20} followup p50 {percentile(followup, 0.5):6.0f} ms  p99 {percentile(followup, 0.99):6.0f} ms  "
+          f"lookup + followup p50 {percentile(with_lookup, 0.5):6.0f} ms  p99 {percentile(with_lookup, 0.99):6.0f} ms  "
+          f"DMs sent {sent:3}/{DMS}")
+    if scheduler is not None:
+        stats = scheduler.stats()
+        print(f"{'':<20} DM queue peaked at {stats['dm']['max_queued']}, lookup queue at {stats['lookup']['max_queued']}")
+        scheduler._task.cancel()
+    return percentile(with_lookup, 0.99)
+
+
+async def main():
+    unscheduled = await bench("unscheduled", False)
+    scheduled = await bench("scheduled", True)
+    print(f"{'lookup + followup p99':<20} {unscheduled:.0f} ms -> {scheduled:.0f} ms")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,32 @@
+"""Measure the per-call overhead of the command rate limiter.
+
+Run with: python -m benchmarks.bench_rate_limiter
+"""
+import os
+import sys
+import time
+import random
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_limiter import TokenBucketLimiter
+
+CALLS = 1_000_000
+
+
+def bench(name, users):
+    limiter = TokenBucketLimiter()
+    commands = ["flip", "roll", "roulette", "slots"]
+    calls = [(random.choice(commands), random.randrange(users)) for _ in range(CALLS)]
+    start = time.perf_counter()
+    for command, user_id in calls:
+        limiter.hit(command, user_id)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed / CALLS * 1e9:8.0f} ns/call  "
+          f"allowed={limiter.allowed} limited={limiter.limited} buckets={len(limiter)}")
+
+
+if __name__ == '__main__':
+    bench("1 user flooding", 1)
+    bench("1k active users", 1_000)
+    bench("1M distinct users", 1_000_000)
@@ -0,0 +1,85 @@
+"""Render time and memory of the hot responses before and after the response templates.
+
+The old versions are the ones main.py and SlotsView used to build field by
+field for every call. Each response is rendered and converted to the payload
+discord.py sends, like a followup does. Run with: python -m benchmarks.bench_responses
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import discord
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import responses
+
+RUNS = 20000
+POLL = {"active": True, "closed": False, "question": "Who wins the final?", "closes_at": 1_700_000_000, "total_bets": 123_450,
+        "options": {"Red": {str(1000 + i): 500 + i for i in range(40)}, "Blue": {str(2000 + i): 900 + i for i in range(60)}}}
+
+
+def old_help():
+    embed = discord.Embed(title="Help", description="Here are the available commands:", color=0x00ff00)
+    for name, description in zip(responses.HELP_COMMANDS, responses.TEXTS["en"]["help"]):
+        embed.add_field(name=name, value=description, inline=False)
+    return embed
+
+
+def old_chips(chips):
+    if chips > 999:
+        chips_display = "{:,}".format(chips).replace(",", ".")
+    else:
+        chips_display = str(chips)
+    return discord.Embed(title="Chips", description=f"You have {chips_display} chips!", color=0x00ff00)
+
+
+def old_slots(result, bet, round, jackpot):
+    embed = discord.Embed(title="Slots", description=f"Result: {' '.join(result)}!\nYou won {bet * 2} chips!", color=0x00ff00)
+    embed.set_footer(text=f"Round {round} · Jackpot: {jackpot} chips")
+    return embed
+
+
+def old_poll(poll_data):
+    embed = discord.Embed(title="Prediction Poll", description=poll_data["question"], color=0x00ff00)
+    for option, bets in poll_data["options"].items():
+        embed.add_field(name=option, value=f"{len(bets)} bets ({sum(bets.values())} chips)", inline=True)
+    closes_at = poll_data.get("closes_at")
+    if closes_at and not poll_data.get("closed", True):
+        embed.add_field(name="Betting closes", value=f"<t:{closes_at}:R>", inline=False)
+    embed.set_footer(text=f"Total bets: {poll_data['total_bets']} chips")
+    return embed
+
+
+CASES = [
+    ("/help", old_help, lambda: responses.help_embed(discord.Locale.american_english)),
+    ("/chips", lambda: old_chips(1_234_567), lambda: responses.chips_embed(1_234_567, discord.Locale.german)),
+    ("slots result", lambda: old_slots(["🍒", "🍒", "🍋"], 100, "3-1042", 5000),
+     lambda: responses.slots_embed(["🍒", "🍒", "🍋"], True, 200, "3-1042", 5000, locale=discord.Locale.american_english)),
+    ("/poll", lambda: old_poll(POLL), lambda: responses.poll_embed(POLL, discord.Locale.american_english)),
+]
+
+
+def measure(render):
+    """Microseconds and bytes allocated for one response, including its payload"""
+    render().to_dict()  # Warm up caches
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        render().to_dict()
+    elapsed = (time.perf_counter() - start) / RUNS
+    tracemalloc.start()
+    payload = render().to_dict()
+    allocated = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del payload
+    return elapsed * 1e6, allocated
+
+
+if __name__ == '__main__':
+    print(f"{'response':<14} {'before':>22} {'after':>22}")
+    for name, old, new in CASES:
+        old_time, old_bytes = measure(old)
+        new_time, new_bytes = measure(new)
+        print(f"{name:<14} {old_time:7.2f} us {old_bytes:7,} B  {new_time:7.2f} us {new_bytes:7,} B  "
+              f"({1 - new_time / old_time:.0%} faster)")
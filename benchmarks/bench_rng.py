@@ -0,0 +1,40 @@
+"""Compare game outcome draws from the RNG service with the plain random module.
+
+Run with: python -m benchmarks.bench_rng
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rng import RNGService, SLOT_SYMBOLS
+
+ROUNDS = 200_000
+
+RANDOM_GAMES = {
+    "flip": lambda: random.randint(0, 999),
+    "roll": lambda: random.randint(1, 6),
+    "roulette": lambda: random.randint(0, 36),
+    "slots": lambda: [random.choice(SLOT_SYMBOLS) for _ in range(3)],
+}
+
+
+def bench(name, draw):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        draw()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {elapsed / ROUNDS * 1e9:8.0f} ns/round  {ROUNDS / elapsed:12,.0f} rounds/s")
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        for game, draw in RANDOM_GAMES.items():
+            bench(f"{game}: random", draw)
+            for batch_size in (1, 256, 4096):
+                rng = RNGService(os.path.join(directory, f"seeds_{game}_{batch_size}.json"), batch_size)
+                bench(f"{game}: rng batch={batch_size}", lambda: rng.play(game))
+                rng.persistence.close()
@@ -0,0 +1,89 @@
+"""Throughput of several shard processes sharing one state service.
+
+Each shard process simulates gateway work (decoding an interaction payload)
+and then calls the state service the way a command would: mostly balance
+reads, with a share of chip updates. Run with:
+
+    python -m benchmarks.bench_sharded [max_shards]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import tempfile
+import multiprocessing
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DURATION = 3.0
+CONCURRENCY = 64
+USERS = 10_000
+WRITE_SHARE = 0.1
+PAYLOAD = json.dumps({"type": 2, "data": {"name": "flip", "options": [{"name": "bet", "value": 10}] * 20},
+                      "member": {"user": {"id": "1", "username": "x" * 32}, "roles": ["1"] * 50}})
+
+
+def run_service(directory, socket_path):
+    os.chdir(directory)
+    from state_service import StateService
+    asyncio.run(StateService(socket_path).serve_forever())
+
+
+def run_shard(socket_path, results):
+    from state_service import StateClient, RemoteChipManager
+
+    async def worker(chips, deadline, counter):
+        while time.perf_counter() < deadline:
+            for _ in range(5):
+                json.loads(PAYLOAD)  # Gateway decoding done by every shard
+            user_id = random.randrange(USERS)
+            if random.random() < WRITE_SHARE:
+                await chips.add_chips(user_id, 1)
+            else:
+                await chips.get_chips(user_id)
+            counter[0] += 1
+
+    async def main():
+        client = StateClient(socket_path)
+        chips = RemoteChipManager(client)
+        await client.connect()
+        counter = [0]
+        deadline = time.perf_counter() + DURATION
+        await asyncio.gather(*(worker(chips, deadline, counter) for _ in range(CONCURRENCY)))
+        await client.close()
+        results.put(counter[0])
+
+    asyncio.run(main())
+
+
+def bench(shards):
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, 'state.sock')
+        service = multiprocessing.Process(target=run_service, args=(directory, socket_path), daemon=True)
+        service.start()
+        while not os.path.exists(socket_path):
+            time.sleep(0.05)
+
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=run_shard, args=(socket_path, results)) for _ in range(shards)]
+        for process in processes:
+            process.start()
+        total = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        service.terminate()
+        return total / DURATION
+
+
+if __name__ == '__main__':
+    max_shards = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    baseline = None
+    shards = 1
+    while shards <= max_shards:
+        throughput = bench(shards)
+        baseline = baseline or throughput
+        print(f"{shards} shard(s): {throughput:10.0f} commands/s  ({throughput / baseline:.2f}x)")
+        shards *= 2
@@ -0,0 +1,221 @@
+"""Concurrency stress test of the chip economy.
+
+Runs thousands of interleaved transfers, game rounds, table rounds, poll
+bets and poll settlements against one ChipManager and PollManager, then
+checks that no chips were created or lost (balances + open poll pot + house
+winnings = starting supply), that no balance went negative, that every
+balance is what the successful operations add up to and that every ledger
+entry continues from the balance of the one before it. With a disk delay
+every save first sleeps like a slow disk would, which shows how much of
+the work waits on I/O done while a lock is held. Run with:
+
+    python -m benchmarks.stress_economy [operations] [disk delay in seconds]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+from collections import defaultdict
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ledger
+import economy_io
+from chip_manager import ChipManager
+from poll_manager import PollManager, buy_bet
+
+USERS = 50
+WORKERS = 64
+OPTIONS = ["Red", "Blue"]
+
+
+async def legacy_bet(chip_manager, poll_manager, user_id, option, amount):
+    """The old /bet flow: check the balance, place the bet, then debit without checking the result"""
+    if await chip_manager.get_chips(user_id) < amount:
+        return False, "You don't have enough chips!"
+    success, error = await poll_manager.place_bet(user_id, option, amount)
+    if not success:
+        return False, error
+    # Saves no longer make callers wait, so stand in for the round trips the command makes in between
+    await asyncio.sleep(0)
+    await chip_manager.remove_chips(user_id, amount, reason=ledger.POLL_BET)
+    return True, None
+
+
+def slow_disk(save, delay):
+    """Wrap a synchronous save so it takes at least delay seconds"""
+    def slow_save(*args):
+        time.sleep(delay)
+        return save(*args)
+    return slow_save
+
+
+class Stress:
+    """Random operations against one economy and the chip movements they were seen to make"""
+
+    def __init__(self, chip_manager, poll_manager, seed=0, bet=buy_bet):
+        self.chip_manager = chip_manager
+        self.poll_manager = poll_manager
+        self.random = random.Random(seed)
+        self.bet = bet
+        self.users = [str(1000 + i) for i in range(USERS)]
+        self.expected = defaultdict(int)
+        self.house = 0
+        self.latencies = []
+        self.counts = defaultdict(int)
+
+    async def transfer(self):
+        sender, receiver = self.random.sample(self.users, 2)
+        amount = self.random.randint(1, 600)
+        if await self.chip_manager.transfer_chips(sender, receiver, amount):
+            self.expected[sender] -= amount
+            self.expected[receiver] += amount
+
+    async def game(self):
+        # Like /flip: take the stake, then settle the round with double or nothing
+        user_id = self.random.choice(self.users)
+        stake = self.random.randint(1, 600)
+        payout = 2 * stake if self.random.random() < 0.49 else 0
+        if not await self.chip_manager.remove_chips(user_id, stake):
+            return
+        await self.chip_manager.settle_round(user_id, payout, "flip", stake)
+        self.expected[user_id] += payout - stake
+        self.house += stake - payout
+
+    async def table(self):
+        # Like a roulette table: many stakes and payouts settled in one batch
+        results = {}
+        for user_id in self.random.sample(self.users, 5):
+            stake = self.random.randint(1, 600)
+            results[user_id] = (stake, 36 * stake if self.random.random() < 1 / 37 else 0)
+        voided = await self.chip_manager.settle_rounds(results, "roulette")
+        for user_id, (stake, payout) in results.items():
+            if user_id not in voided:
+                self.expected[user_id] += payout - stake
+                self.house += stake - payout
+
+    async def poll_bet(self):
+        user_id = self.random.choice(self.users)
+        amount = self.random.randint(1, 600)
+        option = OPTIONS[self.users.index(user_id) % len(OPTIONS)]
+        success, _ = await self.bet(self.chip_manager, self.poll_manager, user_id, option, amount)
+        if success:
+            self.expected[user_id] -= amount
+
+    async def settle_poll(self):
+        # Like /end_poll followed by /create_poll; whatever is not paid out stays with the house
+        success, _, payouts = await self.poll_manager.end_poll(self.random.choice(OPTIONS))
+        if success:
+            pot = (await self.poll_manager.get_poll_data())["total_bets"]
+            await self.chip_manager.pay_poll_winners(payouts)
+            for user_id, amount in payouts.items():
+                self.expected[user_id] += amount
+            self.house += pot - sum(payouts.values())
+        await self.poll_manager.create_poll("Who wins?", *OPTIONS)
+
+    async def worker(self, operations):
+        kinds = [(self.transfer, 3), (self.game, 4), (self.table, 1), (self.poll_bet, 3)]
+        for _ in range(operations):
+            operation = self.random.choices([kind for kind, _ in kinds], [weight for _, weight in kinds])[0]
+            start = time.perf_counter()
+            await operation()
+            self.latencies.append(time.perf_counter() - start)
+            self.counts[operation.__name__] += 1
+
+    async def settler(self, done):
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            await self.settle_poll()
+            self.counts["settle_poll"] += 1
+
+    async def run(self, operations, workers=WORKERS):
+        await self.poll_manager.create_poll("Who wins?", *OPTIONS)
+        done = asyncio.Event()
+        settler = asyncio.create_task(self.settler(done))
+        start = time.perf_counter()
+        await asyncio.gather(*(self.worker(operations // workers) for _ in range(workers)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await settler
+        return elapsed
+
+    def violations(self):
+        """Every broken invariant, described; empty when the economy stayed consistent"""
+        default = self.chip_manager.default_chips
+        balances = {user_id: self.chip_manager.users.get(user_id, default) for user_id in self.users}
+        pot = self.poll_manager.poll_data.get("total_bets", 0) if self.poll_manager.poll_data.get("active") else 0
+        problems = []
+
+        supply = default * len(self.users)
+        if sum(balances.values()) + pot + self.house != supply:
+            problems.append(f"{sum(balances.values()) + pot + self.house - supply:+} chips appeared from nowhere "
+                            f"(balances {sum(balances.values())}, poll pot {pot}, house {self.house}, supply {supply})")
+        bets = sum(sum(bets.values()) for bets in self.poll_manager.poll_data.get("options", {}).values())
+        if pot and bets != pot:
+            problems.append(f"The poll pot is {pot} chips but its bets add up to {bets}")
+        for user_id, balance in balances.items():
+            if balance < 0:
+                problems.append(f"User {user_id} has a negative balance of {balance}")
+            if balance != default + self.expected[user_id]:
+                problems.append(f"User {user_id} has {balance} chips but their operations add up to {default + self.expected[user_id]}")
+
+        # A lost update would show as an entry that does not start from the previous balance
+        self.chip_manager.ledger.flush()
+        last = {}
+        for _, user_id, delta, balance, _, reason in economy_io.ledger_rows(self.chip_manager.ledger.ledger_file):
+            previous = last.get(user_id, default)
+            if balance - delta != previous:
+                problems.append(f"Ledger entry '{reason}' of user {user_id} starts from {balance - delta}, not {previous}")
+            last[user_id] = balance
+        for user_id, balance in balances.items():
+            if last.get(int(user_id), default) != balance:
+                problems.append(f"User {user_id} has {balance} chips but the ledger ends at {last.get(int(user_id), default)}")
+        return problems
+
+
+def run_stress(directory, operations=5000, disk_delay=0.0, seed=0, bet=buy_bet, workers=WORKERS):
+    """Stress a fresh economy stored in directory; returns the stress run, its duration and the violations"""
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        # Built directly so the run does not replace the bot's own managers
+        chip_manager = object.__new__(ChipManager)
+        chip_manager._initialize(f"stress-{seed}")
+        chip_manager.users = {}
+        poll_manager = object.__new__(PollManager)
+        poll_manager._initialize(f"stress-{seed}")
+        if disk_delay:
+            chip_manager.persistence.write = slow_disk(chip_manager.persistence.write, disk_delay)
+            poll_manager.persistence.write = slow_disk(poll_manager.persistence.write, disk_delay)
+
+        stress = Stress(chip_manager, poll_manager, seed, bet)
+        try:
+            elapsed = asyncio.run(stress.run(operations, workers))
+        finally:
+            # The files are relative to the directory, so they are finished before leaving it
+            chip_manager.persistence.close()
+            poll_manager.persistence.close()
+        return stress, elapsed, stress.violations()
+    finally:
+        os.chdir(previous)
+
+
+def report(label, stress, elapsed, violations):
+    latencies = sorted(stress.latencies)
+    operations = sum(stress.counts.values())
+    print(f"{label:<28} {operations / elapsed:8,.0f} ops/s  "
+          f"p50 {latencies[len(latencies) // 2] * 1000:6.2f} ms  p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.2f} ms  "
+          f"{'OK' if not violations else f'{len(violations)} violations'}")
+    for violation in violations[:5]:
+        print(f"    {violation}")
+
+
+if __name__ == '__main__':
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    disk_delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.002
+    with tempfile.TemporaryDirectory() as directory:
+        report("fast disk", *run_stress(directory, operations, seed=1))
+        report(f"slow disk ({disk_delay * 1000:g} ms/save)", *run_stress(directory, operations // 10, disk_delay, seed=2))
+        report("old /bet flow", *run_stress(directory, operations, seed=3, bet=legacy_bet))
@@ -0,0 +1,105 @@
+import time
+
+RANKS = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
+SUITS = ["♠", "♥", "♦", "♣"]
+
+
+def card_name(card):
+    return f"{RANKS[card % 13]}{SUITS[card // 13]}"
+
+
+def hand_value(cards):
+    """Best total of a hand and whether an ace still counts as 11"""
+    total = sum(min(card % 13 + 1, 10) for card in cards)
+    if any(card % 13 == 0 for card in cards) and total + 10 <= 21:
+        return total + 10, True
+    return total, False
+
+
+def is_blackjack(cards):
+    return len(cards) == 2 and hand_value(cards)[0] == 21
+
+
+def _draw(session, hand):
+    session[hand].append(session["deck"][session["next"]])
+    session["next"] += 1
+
+
+def new_hand(user_id, guild_id, bet, deck, round_id):
+    """Deal a hand from a shuffled deck; the session is plain JSON data"""
+    session = {
+        "user_id": str(user_id),
+        "guild_id": guild_id,
+        "bet": bet,
+        "deck": deck,
+        "next": 0,
+        "player": [],
+        "dealer": [],
+        "doubled": False,
+        "finished": False,
+        "round": round_id,
+        "started": int(time.time()),
+    }
+    for hand in ("player", "dealer", "player", "dealer"):
+        _draw(session, hand)
+    if is_blackjack(session["player"]) or is_blackjack(session["dealer"]):
+        session["finished"] = True
+    return session
+
+
+def _dealer_play(session):
+    # The dealer stands on all 17s
+    while hand_value(session["dealer"])[0] < 17:
+        _draw(session, "dealer")
+    session["finished"] = True
+
+
+def hit(session):
+    _draw(session, "player")
+    total = hand_value(session["player"])[0]
+    if total > 21:
+        session["finished"] = True
+    elif total == 21:
+        _dealer_play(session)
+
+
+def stand(session):
+    _dealer_play(session)
+
+
+def can_double(session):
+    return len(session["player"]) == 2 and not session["doubled"] and not session["finished"]
+
+
+def double(session):
+    """Double the stake, take exactly one card and stand"""
+    session["doubled"] = True
+    _draw(session, "player")
+    if hand_value(session["player"])[0] > 21:
+        session["finished"] = True
+    else:
+        _dealer_play(session)
+
+
+def stake(session):
+    return session["bet"] * (2 if session["doubled"] else 1)
+
+
+def result(session):
+    """(outcome, chips paid back including the stake) of a finished hand"""
+    player = hand_value(session["player"])[0]
+    dealer = hand_value(session["dealer"])[0]
+    staked = stake(session)
+    if is_blackjack(session["player"]):
+        if is_blackjack(session["dealer"]):
+            return "push", staked
+        return "blackjack", staked + staked * 3 // 2
+    if player > 21:
+        return "bust", 0
+    if is_blackjack(session["dealer"]):
+        return "lose", 0
+    if dealer > 21 or player > dealer:
+        return "win", staked * 2
+    if player == dealer:
+        return "push", staked
+    return "lose", 0
@@ -1,29 +1,100 @@
 import json
 import os
+import time
 import asyncio
+import tempfile
 
 from dotenv import load_dotenv
 
+import balance_history
+import claims
+import economy_io
+import events
+import ledger
+from balance_history import BalanceHistory
+from claims import ClaimStore
+from economy_stats import EconomyStats
+from events import EventBus
+from game_stats import GameStats
+from jackpot import JackpotPool
+from leaderboard import LeaderboardCache
+from ledger import Ledger
+from partitions import partition_key, partition_path
+from persistence import PersistenceWorker
+from tiered_store import TieredStore
+
 load_dotenv()
 
+
+def _merge_balances(older, newer):
+    """Combine two queued saves of changed balances"""
+    older.update(newer)
+    return older
+
+
 class ChipManager:
     _instance = None
+    _partitions = {}
     _lock = asyncio.Lock()
+    _event_bus = EventBus()
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(ChipManager, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+    def __new__(cls, guild_id=None):
+        guild_id = partition_key(guild_id)
+        if guild_id is None:
+            if cls._instance is None:
+                cls._instance = super(ChipManager, cls).__new__(cls)
+                cls._instance._initialize()
+            return cls._instance
+        
+        # Every guild gets its own economy with its own lock and files
+        partition = cls._partitions.get(guild_id)
+        if partition is None:
+            partition = cls._partitions[guild_id] = super(ChipManager, cls).__new__(cls)
+            partition._initialize(guild_id)
+            try:
+                asyncio.get_running_loop()
+                partition.start_background_tasks()
+            except RuntimeError:
+                pass
+        return partition
     
-    def _initialize(self):
+    def _initialize(self, guild_id=None):
+        self.guild_id = guild_id
         self.users = {}
-        self.default_chips = os.getenv('DEFAULT_CHIPS', 1000)
-        self.chip_file = 'chips.json'
+        self.default_chips = int(os.getenv('DEFAULT_CHIPS', 1000))
+        self.chip_file = partition_path(guild_id, 'chips.json')
+        self.ledger = Ledger(partition_path(guild_id, os.getenv('LEDGER_FILE', 'ledger.bin')))
+        # All partitions publish to the same bus so one dispatcher serves them
+        self.events = self._event_bus
+        self.leaderboard = LeaderboardCache(int(os.getenv('LEADERBOARD_INTERVAL', 30)))
+        self.stats = EconomyStats(int(os.getenv('ECONOMY_STATS_INTERVAL', 60)))
+        self.claims = ClaimStore(partition_path(guild_id, 'claims.bin'))
+        self.game_stats = GameStats(partition_path(guild_id, 'game_stats.bin'))
+        self.jackpot = JackpotPool(partition_path(guild_id, 'jackpot.json'),
+                                   int(os.getenv('JACKPOT_SEED', 1000)),
+                                   float(os.getenv('JACKPOT_CUT', 0.01)),
+                                   fold_interval=int(os.getenv('JACKPOT_FOLD_INTERVAL', 5)))
+        self.history = BalanceHistory(partition_path(guild_id, os.getenv('HISTORY_FILE', 'balance_history.db')))
+        # One writer thread per economy, so its files are never written by two threads at once
+        self.persistence = PersistenceWorker(f"chips:{guild_id}" if guild_id is not None else "chips", self._save_chips_sync,
+                                             float(os.getenv('PERSISTENCE_MAX_LAG', 5)), merge=_merge_balances)
+        self._unsaved = {}  # balances changed since the last save
+        self._tasks = []
+        self._progress = {}  # file path -> economy_io.Progress of a running export or import
+        if guild_id is not None:
+            self._lock = asyncio.Lock()
+        if os.getenv('CHIP_STORAGE', 'json').lower() == 'tiered':
+            # Keep only active users in memory, the rest stay in SQLite
+            self.users = TieredStore(partition_path(guild_id, os.getenv('CHIP_DB_FILE', 'chips.db')),
+                                     int(os.getenv('CHIP_CACHE_SIZE', 100000)),
+                                     int(os.getenv('CHIP_CACHE_TTL', 3600)))
         self._load_chips()
         
     def _load_chips(self):
         """Load chips data from file"""
+        if isinstance(self.users, TieredStore):
+            self._migrate_chips()
+            return
         try:
             if os.path.exists(self.chip_file):
                 with open(self.chip_file, 'r') as f:
@@ -31,48 +102,102 @@ class ChipManager:
         except Exception as e:
             print(f"Error loading chips: {e}")
             self.users = {}
+        # The writer's copy of the file, which the saves bring up to date
+        self._saved = dict(self.users)
+    
+    def _migrate_chips(self):
+        """Copy chips.json into an empty tiered store on first start"""
+        try:
+            if os.path.exists(self.chip_file) and len(self.users) == 0:
+                with open(self.chip_file, 'r') as f:
+                    self.users.update_many(json.load(f).items())
+        except Exception as e:
+            print(f"Error migrating chips: {e}")
+    
+    def start_background_tasks(self):
+        """Start periodic maintenance; call once the event loop is running"""
+        if self._tasks:
+            return
+        if isinstance(self.users, TieredStore):
+            interval = int(os.getenv('CHIP_MAINTENANCE_INTERVAL', 60))
+            self._tasks.append(asyncio.create_task(self.users.run_maintenance(interval)))
+        self._tasks.append(asyncio.create_task(self.run_history_sampling(int(os.getenv('HISTORY_INTERVAL', 60)))))
+    
+    async def get_storage_stats(self):
+        """Cache metrics of the tiered store, or None when it is disabled"""
+        if isinstance(self.users, TieredStore):
+            return self.users.stats()
+        return None
+    
+    async def get_persistence_stats(self):
+        """Queue depth and write metrics of the chip writer"""
+        return self.persistence.stats()
     
     async def _save_chips(self):
-        """Save chips data to file without re-acquiring the lock"""
+        """Queue a save of the chips data without re-acquiring the lock"""
         try:
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self._save_chips_sync)
-            return True
+            # Only the changed balances are handed over, so a save costs the same however many users there are
+            changes, self._unsaved = self._unsaved, {}
+            return await self.persistence.save(changes)
         except Exception as e:
             print(f"Error saving chips: {e}")
             return False
     
-    def _save_chips_sync(self):
-        """Synchronous helper for _save_chips"""
-        with open(self.chip_file, 'w') as f:
-            json.dump(self.users, f)
+    def _save_chips_sync(self, changes):
+        """Write the changes queued by _save_chips; runs on the writer thread"""
+        if isinstance(self.users, TieredStore):
+            # The store tracks its own changed users
+            self.users.flush()
+        else:
+            self._saved.update(changes)
+            with open(self.chip_file, 'w') as f:
+                json.dump(self._saved, f)
+        self.claims.flush()
+        self.game_stats.flush()
+        self.jackpot.flush()
+        self.ledger.flush()
+    
+    def _record(self, user_id, delta, reason, counterparty=0):
+        """Log a balance change that was just applied to self.users"""
+        balance = self._unsaved[user_id] = self.users[user_id]
+        self.ledger.record(user_id, delta, balance, reason, counterparty)
+        self.leaderboard.changed(user_id, balance)
+        self.stats.update(user_id, balance, delta, reason)
+        self.history.changed(int(user_id), balance)
+    
+    def _note_many(self, changes, reason):
+        """Pass many (user id, delta, balance) changes that are already in the ledger on to the leaderboard, stats and history"""
+        for user_id, delta, balance in changes:
+            self._unsaved[user_id] = balance
+            self.leaderboard.changed(user_id, balance)
+            self.stats.update(user_id, balance, delta, reason)
+            self.history.changed(int(user_id), balance)
     
     async def get_chips(self, user_id):
-        """Get a user's chips, initializing if needed - with locking"""
-        async with self._lock:
-            user_id = str(user_id)
-            if user_id not in self.users:
-                self.users[user_id] = self.default_chips
-                await self._save_chips()
-            return self.users[user_id]
+        """Get a user's chips without locking; unseen users get the default
+        in memory only, it is stored by their first real mutation"""
+        return self.users.get(str(user_id), self.default_chips)
     
-    async def set_chips(self, user_id, amount):
+    async def set_chips(self, user_id, amount, reason=ledger.ADMIN_SET):
         """Set a user's chips to a specific amount"""
         async with self._lock:
             user_id = str(user_id)
+            previous = self.users.get(user_id, self.default_chips)
             self.users[user_id] = amount
+            self._record(user_id, amount - previous, reason)
             return await self._save_chips()
     
-    async def add_chips(self, user_id, amount):
+    async def add_chips(self, user_id, amount, reason=ledger.PAYOUT):
         """Add chips to a user's balance"""
         async with self._lock:
             user_id = str(user_id)
             if user_id not in self.users:
                 self.users[user_id] = self.default_chips
             self.users[user_id] += amount
+            self._record(user_id, amount, reason)
             return await self._save_chips()
     
-    async def remove_chips(self, user_id, amount):
+    async def remove_chips(self, user_id, amount, reason=ledger.STAKE):
         """Remove chips from a user's balance if they have enough"""
         async with self._lock:
             user_id = str(user_id)
@@ -82,6 +207,7 @@ class ChipManager:
             if current < amount:
                 return False
             self.users[user_id] -= amount
+            self._record(user_id, -amount, reason)
             await self._save_chips()
             return True
     
@@ -100,8 +226,95 @@ class ChipManager:
                 
             self.users[from_user] -= amount
             self.users[to_user] += amount
+            self._record(from_user, -amount, ledger.TRANSFER_OUT, to_user)
+            self._record(to_user, amount, ledger.TRANSFER_IN, from_user)
             await self._save_chips()
+            self.events.publish(events.PAYMENT_RECEIVED, to_user, amount, from_user)
+            return True
+    
+    async def settle_round(self, user_id, payout=0, game=None, stake=0, debit=0):
+        """Pay out a finished game round and announce it if the user went broke.
+        
+        debit is a part of the stake that was not reserved yet, like a blackjack
+        double; it is taken together with the payout, and the round is not
+        settled (False) if the user cannot cover it.
+        """
+        if debit:
+            async with self._lock:
+                user_id = str(user_id)
+                current = self.users.get(user_id, self.default_chips)
+                if current < debit:
+                    return False
+                self.users[user_id] = current - debit
+                self._record(user_id, -debit, ledger.STAKE)
+                if game is not None:
+                    self.game_stats.record(user_id, game, stake, payout)
+                if payout:
+                    self.users[user_id] += payout
+                    self._record(user_id, payout, ledger.PAYOUT)
+                broke = self.users[user_id] == 0
+                await self._save_chips()
+            if broke:
+                self.events.publish(events.WENT_BROKE, user_id)
             return True
+        if game is not None:
+            # Saved along with the payout, or with the next balance change after a loss
+            self.game_stats.record(user_id, game, stake, payout)
+        if payout > 0:
+            await self.add_chips(user_id, payout)
+        if self.users.get(str(user_id), self.default_chips) == 0:
+            self.events.publish(events.WENT_BROKE, user_id)
+        return True
+    
+    async def settle_rounds(self, results, game=None):
+        """Settle many finished rounds under one lock and a single save.
+        
+        results maps user ids to (stake, payout). A user who can no longer
+        cover their stake is skipped entirely; their ids are returned.
+        """
+        voided = []
+        broke = []
+        async with self._lock:
+            for user_id, (stake, payout) in results.items():
+                user_id = str(user_id)
+                current = self.users.get(user_id, self.default_chips)
+                if current < stake:
+                    voided.append(user_id)
+                    continue
+                self.users[user_id] = current - stake
+                self._record(user_id, -stake, ledger.STAKE)
+                if game is not None:
+                    self.game_stats.record(user_id, game, stake, payout)
+                if payout:
+                    self.users[user_id] += payout
+                    self._record(user_id, payout, ledger.PAYOUT)
+                elif self.users[user_id] == 0:
+                    broke.append(user_id)
+            await self._save_chips()
+        for user_id in broke:
+            self.events.publish(events.WENT_BROKE, user_id)
+        return voided
+    
+    async def pay_poll_winners(self, payouts):
+        """Credit all poll payouts under one lock and a single save"""
+        return await self._pay_winners(payouts, ledger.POLL_PAYOUT, events.POLL_PAYOUT)
+    
+    async def pay_raffle_winners(self, prizes):
+        """Credit all raffle prizes under one lock and a single save"""
+        return await self._pay_winners(prizes, ledger.RAFFLE_PRIZE, events.RAFFLE_PRIZE)
+    
+    async def _pay_winners(self, payouts, reason, kind):
+        async with self._lock:
+            for user_id, amount in payouts.items():
+                user_id = str(user_id)
+                if user_id not in self.users:
+                    self.users[user_id] = self.default_chips
+                self.users[user_id] += amount
+                self._record(user_id, amount, reason)
+            saved = await self._save_chips()
+        for user_id, amount in payouts.items():
+            self.events.publish(kind, user_id, amount)
+        return saved
     
     async def get_top_users(self, count=10, exclude_ids=None):
         """Get top users by chip count, optionally excluding certain users"""
@@ -121,6 +334,130 @@ class ChipManager:
                     return i + 1
             return None
     
+    async def get_leaderboard_page(self, page=0, per_page=10, exclude_ids=None):
+        """Get one page of the cached ranking as (version, total users, [(rank, user_id, chips)])"""
+        snapshot = self.leaderboard.get(self.users, exclude_ids)
+        start = page * per_page
+        entries = [(start + i + 1, uid, chips) for i, (uid, chips) in enumerate(snapshot.ranking[start:start + per_page])]
+        return snapshot.version, len(snapshot.ranking), entries
+    
+    async def get_leaderboard_rank(self, user_id, exclude_ids=None):
+        """Get a user's rank in the cached ranking"""
+        snapshot = self.leaderboard.get(self.users, exclude_ids)
+        position = snapshot.positions.get(str(user_id))
+        return None if position is None else position + 1
+    
+    async def _load_stats(self):
+        """Build the economy statistics on first use"""
+        if not self.stats.loaded:
+            async with self._lock:
+                # Flushed so the reset totals can be read from the ledger file
+                await asyncio.get_running_loop().run_in_executor(None, self.ledger.flush)
+                if not self.stats.loaded:
+                    self.stats.load(self.users, self.ledger.ledger_file)
+    
+    async def get_economy_report(self):
+        """Get supply, percentiles, Gini coefficient and histogram of all balances"""
+        loop = asyncio.get_running_loop()
+        await self._load_stats()
+        distribution = self.stats.cached_distribution()
+        if distribution is None:
+            balances, version = self.stats.snapshot()
+            distribution = await loop.run_in_executor(None, self.stats.distribution, balances, version)
+            self.stats.store_distribution(distribution)
+        return self.stats.report(distribution)
+    
+    async def get_progress(self, path):
+        """Rows processed so far by the running export or import of a file; None if there is none"""
+        progress = self._progress.get(path)
+        return progress.rows if progress is not None else None
+    
+    async def export_data(self, dataset, path, fmt):
+        """Stream balances, the ledger or game statistics to a CSV or JSON Lines file; returns the row count"""
+        # Progress stays here and is read with get_progress, so the call also works through the state service
+        self._progress[path] = economy_io.Progress()
+        try:
+            return await self._export_data(dataset, path, fmt, self._progress[path])
+        finally:
+            self._progress.pop(path, None)
+    
+    async def _export_data(self, dataset, path, fmt, progress):
+        loop = asyncio.get_running_loop()
+        fields = economy_io.EXPORTS[dataset]
+        if dataset == "balances":
+            # Balances only change under the lock, so holding it exports one consistent snapshot
+            async with self._lock:
+                return await loop.run_in_executor(None, economy_io.write_rows, path, fields, self.users.items(), fmt, progress)
+        if dataset == "ledger":
+            async with self._lock:
+                await loop.run_in_executor(None, self.ledger.flush)
+            # The ledger is append-only, so the entries written so far can be read without the lock
+            rows = economy_io.ledger_rows(self.ledger.ledger_file)
+        else:
+            rows = self.game_stats.rows()
+        return await loop.run_in_executor(None, economy_io.write_rows, path, fields, rows, fmt, progress)
+    
+    async def import_balances(self, path):
+        """Set every balance of an import file that passed economy_io.validate_balances as one batch.
+        
+        The file is parsed into a staging table on disk without holding the
+        lock. With the lock held, so nothing else changes in between, the new
+        balances and their ledger records are worked out and written on a
+        worker thread, and the new balances are then swapped in at once, so nobody
+        sees half an import and the event loop keeps running meanwhile. The
+        leaderboard, stats and history catch up chunk by chunk afterwards.
+        Returns the number of rows read.
+        """
+        loop = asyncio.get_running_loop()
+        progress = self._progress[path] = economy_io.Progress()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                staging_file = os.path.join(directory, 'import.db')
+                count = await loop.run_in_executor(None, economy_io.stage_balances, path, staging_file, progress)
+                staging = economy_io.open_staging(staging_file)
+                try:
+                    async with self._lock:
+                        users = await loop.run_in_executor(None, self._prepare_import, staging)
+                        if users is not None:
+                            self.users = users
+                        changes = economy_io.staged_changes(staging)
+                        while True:
+                            chunk = await loop.run_in_executor(None, changes.fetchmany, economy_io.CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            self._note_many(chunk, ledger.ADMIN_SET)
+                        await self._save_chips()
+                finally:
+                    staging.close()
+        finally:
+            self._progress.pop(path, None)
+        return count
+    
+    def _prepare_import(self, staging):
+        """Log the changes of a staged import; runs on a worker thread while the lock is held.
+        
+        Returns a copy of the balances with the import applied, or None when
+        the tiered store has already committed them.
+        """
+        def changed(chunk):
+            changes = [(user_id, chips - (self.default_chips if previous is None else previous), chips)
+                       for user_id, previous, chips in chunk]
+            self.ledger.record_many(changes, ledger.ADMIN_SET)
+            # Written out every chunk, so the ledger buffer never holds the whole import
+            self.ledger.flush()
+            economy_io.stage_changes(staging, changes)
+        
+        chunks = economy_io.staged_chunks(staging, economy_io.CHUNK_SIZE)
+        if isinstance(self.users, TieredStore):
+            self.users.replace_many(chunks, changed)
+            return None
+        # Filled chunk by chunk, so the worker never holds the GIL for long
+        users = dict(self.users)
+        for chunk in chunks:
+            changed([(user_id, users.get(user_id), chips) for user_id, chips in chunk])
+            users.update(chunk)
+        return users
+    
     async def get_broke_users(self):
         """Get all users with 0 chips"""
         async with self._lock:
@@ -132,5 +469,92 @@ class ChipManager:
             broke_users = [user for user, chips in self.users.items() if chips == 0]
             for user in broke_users:
                 self.users[user] = self.default_chips
+                self._record(user, self.default_chips, ledger.BROKE_RESET)
+            await self._save_chips()
+            return len(broke_users)
+    
+    async def claim_reward(self, user_id, kind, now=None):
+        """Claim the daily or hourly reward; returns (success, chips or seconds to wait, streak)"""
+        now = int(now if now is not None else time.time())
+        async with self._lock:
+            user_id = str(user_id)
+            wait, streak = self.claims.claim(user_id, kind, now)
+            if wait:
+                return False, wait, streak
+            amount = claims.reward(kind, streak)
+            self.users[user_id] = self.users.get(user_id, self.default_chips) + amount
+            self._record(user_id, amount, ledger.DAILY_REWARD if kind == "daily" else ledger.HOURLY_REWARD)
+            # Claim times are written by the same save as the balance
+            await self._save_chips()
+            return True, amount, streak
+    
+    async def get_claim_status(self, user_id, now=None):
+        """Seconds until each reward can be claimed again and the current streaks"""
+        now = int(now if now is not None else time.time())
+        return {kind: self.claims.status(user_id, kind, now) for kind in claims.KINDS}
+    
+    async def record_game(self, user_id, game, stake, payout):
+        """Count a game round that was paid out separately"""
+        self.game_stats.record(user_id, game, stake, payout)
+    
+    async def get_profile(self, user_id):
+        """A user's statistics of every game they have played"""
+        return self.game_stats.profile(user_id)
+    
+    async def get_game_leaderboard(self, game, stat, count=10):
+        """The best (user id, value) pairs of one game by one statistic"""
+        return self.game_stats.top(game, stat, count)
+    
+    async def spin_jackpot(self, user_id, bet, multiplier=0, hit=False):
+        """Feed a slots spin into the jackpot and pay the rest of the bet at ``multiplier``; returns (payout, jackpot won, jackpot)"""
+        # Contributions go to striped counters and never wait for the chip lock
+        payout = self.jackpot.contribute(user_id, bet, multiplier)
+        if payout:
+            await self.add_chips(user_id, payout)
+        if not hit:
+            return payout, 0, self.jackpot.value
+        amount = self.jackpot.win(user_id)
+        await self.add_chips(user_id, amount, ledger.JACKPOT)
+        return payout, amount, self.jackpot.value
+    
+    async def get_jackpot(self):
+        """Current jackpot, number of wins and the last winner"""
+        return self.jackpot.value, self.jackpot.wins, self.jackpot.last_win
+    
+    async def grant_all(self, amount, reason=ledger.DAILY_REWARD):
+        """Give every user with a balance the same amount of chips"""
+        async with self._lock:
+            recipients = [(user, chips) for user, chips in self.users.items()]
+            for user, chips in recipients:
+                self.users[user] = chips + amount
+                self._record(user, amount, reason)
             await self._save_chips()
-            return len(broke_users)
\ No newline at end of file
+            return len(recipients)
+    
+    async def get_history(self, user_id, page=0, per_page=10):
+        """Get one page of a user's ledger entries (newest first) and the total entry count"""
+        user_id = str(user_id)
+        return self.ledger.history(user_id, page, per_page), self.ledger.count(user_id)
+    
+    async def sample_history(self, now=None):
+        """Sample the balances changed since the last sample, and the supply, into the balance history"""
+        if self.history.changes:
+            await self._load_stats()
+            self.history.changed(balance_history.ECONOMY, self.stats.supply)
+        self.history.sample(now)
+        await asyncio.get_running_loop().run_in_executor(None, self.history.flush, now)
+    
+    async def run_history_sampling(self, interval=60):
+        """Sample the balance history every interval seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sample_history()
+            except Exception as e:
+                print(f"Error sampling balance history: {e}")
+    
+    async def get_balance_history(self, user_id=None, days=30, points=300, now=None):
+        """(timestamp, balance) samples of a user's balance, or of the supply without a user, over the last days"""
+        now = int(now if now is not None else time.time())
+        series = balance_history.ECONOMY if user_id is None else int(user_id)
+        return self.history.query(series, now - days * 86400, points=points, now=now)
@@ -0,0 +1,130 @@
+import os
+import struct
+import threading
+from array import array
+
+# kind -> (cooldown seconds, base reward, bonus per streak step, longest counted streak)
+CLAIMS = {
+    "daily": (86400, 200, 50, 7),
+    "hourly": (3600, 20, 5, 12),
+}
+KINDS = list(CLAIMS)
+
+
+def reward(kind, streak):
+    """Chips for a claim that continues a streak of the given length"""
+    _, base, bonus, longest = CLAIMS[kind]
+    return base + bonus * (min(streak, longest) - 1)
+
+
+class ClaimStore:
+    """Last claim time and streak of every user and claim kind.
+
+    Each user owns a fixed-size slot in parallel arrays and in claims.bin, so
+    a claim check is a dict lookup and a flush rewrites only the slots that
+    changed since the previous one, in place.
+    """
+
+    # user id, then (last claim, streak) for each kind
+    RECORD = struct.Struct('<Q' + 'IH' * len(KINDS))
+
+    def __init__(self, claim_file='claims.bin'):
+        self.claim_file = claim_file
+        self._slots = {}
+        self._user_ids = array('Q')
+        self._last = [array('I') for _ in KINDS]
+        self._streak = [array('H') for _ in KINDS]
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._load_claims()
+
+    def _load_claims(self):
+        """Load all slots from the claim file"""
+        try:
+            if not os.path.exists(self.claim_file):
+                return
+            with open(self.claim_file, 'rb') as f:
+                data = f.read()
+            for record in self.RECORD.iter_unpack(data[:len(data) - len(data) % self.RECORD.size]):
+                self._slots[record[0]] = len(self._user_ids)
+                self._user_ids.append(record[0])
+                for i in range(len(KINDS)):
+                    self._last[i].append(record[1 + 2 * i])
+                    self._streak[i].append(record[2 + 2 * i])
+        except Exception as e:
+            print(f"Error loading claims: {e}")
+
+    def _slot(self, user_id):
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._slots[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+            for i in range(len(KINDS)):
+                self._last[i].append(0)
+                self._streak[i].append(0)
+        return slot
+
+    def status(self, user_id, kind, now):
+        """(seconds until the next claim, current streak) without claiming"""
+        slot = self._slots.get(int(user_id))
+        if slot is None:
+            return 0, 0
+        i = KINDS.index(kind)
+        cooldown = CLAIMS[kind][0]
+        last = self._last[i][slot]
+        streak = self._streak[i][slot] if now - last < 2 * cooldown else 0
+        return max(0, last + cooldown - now), streak
+
+    def claim(self, user_id, kind, now):
+        """Claim if the cooldown has passed; returns (seconds to wait or 0, streak)"""
+        i = KINDS.index(kind)
+        cooldown = CLAIMS[kind][0]
+        with self._lock:
+            slot = self._slot(int(user_id))
+            last = self._last[i][slot]
+            if now < last + cooldown:
+                return last + cooldown - now, self._streak[i][slot]
+            # Claiming within two cooldowns of the previous claim keeps the streak going
+            streak = self._streak[i][slot] + 1 if now - last < 2 * cooldown else 1
+            self._last[i][slot] = now
+            self._streak[i][slot] = min(streak, 0xFFFF)
+            self._dirty.add(slot)
+            return 0, streak
+
+    def _pack(self, slot):
+        fields = [self._user_ids[slot]]
+        for i in range(len(KINDS)):
+            fields += (self._last[i][slot], self._streak[i][slot])
+        return self.RECORD.pack(*fields)
+
+    def flush(self):
+        """Write the changed slots in place; returns how many were written"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                records = sorted((slot, self._pack(slot)) for slot in self._dirty)
+                self._dirty = set()
+            # Neighbouring slots, like a burst of new users, go out in one write
+            runs = []
+            for slot, record in records:
+                if runs and runs[-1][0] + len(runs[-1][1]) // self.RECORD.size == slot:
+                    runs[-1][1].extend(record)
+                else:
+                    runs.append((slot, bytearray(record)))
+            try:
+                fd = os.open(self.claim_file, os.O_WRONLY | os.O_CREAT, 0o644)
+                try:
+                    for slot, data in runs:
+                        os.pwrite(fd, data, slot * self.RECORD.size)
+                finally:
+                    os.close(fd)
+            except OSError:
+                with self._lock:
+                    self._dirty.update(slot for slot, _ in records)
+                raise
+            return len(records)
+
+    def __len__(self):
+        return len(self._user_ids)
@@ -0,0 +1,182 @@
+import csv
+import gzip
+import json
+import mmap
+import os
+import sqlite3
+
+import ledger
+from game_stats import COLUMNS
+
+FORMATS = ["csv", "jsonl"]
+
+# Exportable datasets and their fields; only balances can be imported
+EXPORTS = {
+    "balances": ["user_id", "chips"],
+    "ledger": ["timestamp", "user_id", "delta", "balance", "counterparty", "reason"],
+    "stats": ["user_id", "game"] + list(COLUMNS),
+}
+
+CHUNK_SIZE = 10000
+
+
+class Progress:
+    """Rows processed so far by a running import or export, read by whoever reports it"""
+
+    def __init__(self, phase="Starting"):
+        self.phase = phase
+        self.rows = 0
+
+
+def open_text(path, mode):
+    """Open a text file, gzip-compressed if its name ends in .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def file_format(path):
+    """csv or jsonl from a file name like balances.jsonl.gz; None if unknown"""
+    name = path[:-3] if path.endswith('.gz') else path
+    extension = os.path.splitext(name)[1].lstrip('.').lower()
+    return extension if extension in FORMATS else None
+
+
+def write_rows(path, fields, rows, fmt, progress=None):
+    """Stream rows to a CSV or JSON Lines file; returns how many were written"""
+    count = 0
+    with open_text(path, 'w') as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            write = writer.writerow
+        else:
+            write = lambda row: f.write(json.dumps(dict(zip(fields, row))) + "\n")
+        for row in rows:
+            write(row)
+            count += 1
+            if progress is not None and count % CHUNK_SIZE == 0:
+                progress.rows = count
+    if progress is not None:
+        progress.rows = count
+    return count
+
+
+def read_balances(f, fmt):
+    """Yield (user id, chips) from an open CSV or JSON Lines file; raises ValueError naming the bad line"""
+    if fmt == "csv":
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None or [field.strip().lower() for field in header[:2]] != EXPORTS["balances"]:
+            raise ValueError("Line 1: expected a user_id,chips header")
+        records = ((reader.line_num, row) for row in reader)
+    else:
+        records = ((number, line) for number, line in enumerate(f, 1) if line.strip())
+    for number, record in records:
+        try:
+            if fmt == "csv":
+                user_id, chips = record[0], record[1]
+            else:
+                record = json.loads(record)
+                user_id, chips = record["user_id"], record["chips"]
+            user_id, chips = int(user_id), int(chips)
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise ValueError(f"Line {number}: expected a user id and a chip count")
+        if user_id <= 0 or chips < 0:
+            raise ValueError(f"Line {number}: user ids must be positive and chips cannot be negative")
+        yield str(user_id), chips
+
+
+def read_chunk(rows, size=CHUNK_SIZE):
+    """The next size rows of an iterator; empty once it is exhausted"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            break
+    return chunk
+
+
+def stage_balances(path, staging_file, progress=None):
+    """Copy the balances of an import file into an SQLite staging table chunk by chunk; returns the rows read.
+    
+    A user listed more than once keeps their last balance.
+    """
+    connection = sqlite3.connect(staging_file)
+    try:
+        connection.execute('CREATE TABLE balances (user_id TEXT PRIMARY KEY, chips INTEGER NOT NULL)')
+        count = 0
+        with open_text(path, 'r') as f:
+            rows = read_balances(f, file_format(path))
+            while True:
+                chunk = read_chunk(rows)
+                if not chunk:
+                    break
+                connection.executemany('INSERT OR REPLACE INTO balances (user_id, chips) VALUES (?, ?)', chunk)
+                count += len(chunk)
+                if progress is not None:
+                    progress.rows = count
+        connection.commit()
+        return count
+    finally:
+        connection.close()
+
+
+def open_staging(staging_file):
+    """Connection to a file made by stage_balances, with a table for the changes an import makes"""
+    connection = sqlite3.connect(staging_file, check_same_thread=False)
+    connection.execute('CREATE TABLE IF NOT EXISTS changes (user_id TEXT NOT NULL, delta INTEGER NOT NULL, chips INTEGER NOT NULL)')
+    return connection
+
+
+def staged_chunks(connection, size=CHUNK_SIZE):
+    """Yield the staged (user id, chips) rows in lists of size, in the order of their last line in the file"""
+    cursor = connection.execute('SELECT user_id, chips FROM balances ORDER BY rowid')
+    while True:
+        chunk = cursor.fetchmany(size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def stage_changes(connection, changes):
+    """Keep (user id, delta, chips) changes until the import has been applied"""
+    connection.executemany('INSERT INTO changes (user_id, delta, chips) VALUES (?, ?, ?)', changes)
+
+
+def staged_changes(connection):
+    """Cursor over the kept changes; read them with fetchmany"""
+    return connection.execute('SELECT user_id, delta, chips FROM changes ORDER BY rowid')
+
+
+def validate_balances(path, progress=None):
+    """Read a whole import file once without applying it; returns (rows, error)"""
+    fmt = file_format(path)
+    if fmt is None:
+        return 0, "Import files must be .csv or .jsonl, optionally gzipped"
+    count = 0
+    try:
+        with open_text(path, 'r') as f:
+            for _ in read_balances(f, fmt):
+                count += 1
+                if progress is not None and count % CHUNK_SIZE == 0:
+                    progress.rows = count
+    except (ValueError, UnicodeDecodeError, csv.Error, OSError, EOFError) as e:
+        return count, str(e)
+    if progress is not None:
+        progress.rows = count
+    return count, None
+
+
+def ledger_rows(ledger_file):
+    """Every entry written to a ledger file so far, read through mmap"""
+    size = ledger.Ledger.RECORD.size
+    records = os.path.getsize(ledger_file) // size if os.path.exists(ledger_file) else 0
+    if records == 0:
+        return
+    with open(ledger_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in range(0, records * size, size):
+                timestamp, user_id, delta, balance, counterparty, reason = ledger.Ledger.RECORD.unpack_from(mm, offset)
+                yield timestamp, user_id, delta, balance, counterparty, ledger.REASON_NAMES.get(reason, reason)
+
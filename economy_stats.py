@@ -0,0 +1,143 @@
+import os
+import time
+import bisect
+
+import numpy as np
+
+import ledger
+
+# Balance histogram bucket edges; the last bucket is open ended
+HISTOGRAM_EDGES = [0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+PERCENTILES = [10, 25, 50, 75, 90, 99]
+
+# Matches ledger.Ledger.RECORD ('<IQqqQB') so the ledger can be read as one array
+LEDGER_DTYPE = np.dtype([('timestamp', '<u4'), ('user_id', '<u8'), ('delta', '<i8'),
+                         ('balance', '<i8'), ('counterparty', '<u8'), ('reason', 'u1')])
+
+
+class EconomyStats:
+    """Distribution of all balances of one economy.
+
+    Balances live in a NumPy array indexed by user. Supply, user count,
+    broke users, histogram buckets and reset inflation are maintained from
+    every balance change in O(1); percentiles and the Gini coefficient need
+    a sort and are recomputed at most every ``interval`` seconds, and only
+    if something changed.
+    """
+
+    def __init__(self, interval=60):
+        self.interval = interval
+        self.loaded = False
+        self.version = 0
+        self._index = {}
+        self._balances = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self.supply = 0
+        self.broke = 0
+        self.reset_inflation = 0
+        self.admin_adjustments = 0
+        self._histogram = [0] * len(HISTOGRAM_EDGES)
+        self._distribution = None
+        self._distribution_time = 0
+
+    def load(self, users, ledger_file=None):
+        """Build the balance array from all users in vectorized passes"""
+        items = list(users.items())
+        self._index = {uid: i for i, (uid, _) in enumerate(items)}
+        self._size = len(items)
+        self._balances = np.fromiter((chips for _, chips in items), dtype=np.int64, count=self._size)
+        self._balances.resize(max(1024, self._size * 2), refcheck=False)
+        balances = self._balances[:self._size]
+        self.supply = int(balances.sum())
+        self.broke = int(np.count_nonzero(balances == 0))
+        buckets = np.searchsorted(HISTOGRAM_EDGES, balances, side='right') - 1
+        self._histogram = np.bincount(np.clip(buckets, 0, None), minlength=len(HISTOGRAM_EDGES)).tolist()
+        if ledger_file and os.path.exists(ledger_file) and os.path.getsize(ledger_file) >= LEDGER_DTYPE.itemsize:
+            records = np.memmap(ledger_file, dtype=LEDGER_DTYPE, mode='r',
+                                shape=(os.path.getsize(ledger_file) // LEDGER_DTYPE.itemsize,))
+            self.reset_inflation = int(records['delta'][records['reason'] == ledger.BROKE_RESET].sum())
+            self.admin_adjustments = int(records['delta'][records['reason'] == ledger.ADMIN_SET].sum())
+            del records
+        self.loaded = True
+        self.version += 1
+
+    def _bucket(self, chips):
+        return max(0, bisect.bisect_right(HISTOGRAM_EDGES, chips) - 1)
+
+    def update(self, user_id, chips, delta=0, reason=None):
+        """Apply one balance change; ignored until the stats are loaded"""
+        if not self.loaded:
+            return
+        slot = self._index.get(user_id)
+        if slot is None:
+            if self._size == len(self._balances):
+                self._balances.resize(max(1024, self._size * 2), refcheck=False)
+            slot = self._index[user_id] = self._size
+            self._size += 1
+            self._balances[slot] = chips
+            previous = None
+        else:
+            previous = int(self._balances[slot])
+            self._balances[slot] = chips
+            self.supply -= previous
+            self._histogram[self._bucket(previous)] -= 1
+            self.broke -= previous == 0
+        self.supply += chips
+        self._histogram[self._bucket(chips)] += 1
+        self.broke += chips == 0
+        if reason == ledger.BROKE_RESET:
+            self.reset_inflation += delta
+        elif reason == ledger.ADMIN_SET:
+            self.admin_adjustments += delta
+        self.version += 1
+
+    def snapshot(self):
+        """Copy of the balances for computing a report off the event loop"""
+        return self._balances[:self._size].copy(), self.version
+
+    def distribution(self, balances, version):
+        """Compute the sort-based figures from a snapshot"""
+        users = len(balances)
+        distribution = {
+            "version": version,
+            "mean": 0.0,
+            "percentiles": {f"p{p}": 0 for p in PERCENTILES},
+            "gini": 0.0,
+            "top1_share": 0.0,
+        }
+        if users == 0:
+            return distribution
+        ordered = np.sort(balances)
+        total = int(ordered.sum())
+        distribution["mean"] = total / users
+        # Keyed "p50" and so on, since reports reach shard processes as JSON
+        distribution["percentiles"] = {f"p{p}": value for p, value in
+                                       zip(PERCENTILES, np.percentile(ordered, PERCENTILES).round().astype(int).tolist())}
+        if total > 0:
+            ranks = np.arange(1, users + 1, dtype=np.float64)
+            distribution["gini"] = float((2 * np.dot(ranks, ordered) / (users * total)) - (users + 1) / users)
+            top = max(1, users // 100)
+            distribution["top1_share"] = float(ordered[-top:].sum() / total)
+        return distribution
+
+    def cached_distribution(self):
+        """The last distribution if it is current or younger than the interval"""
+        if self._distribution is None:
+            return None
+        if self._distribution["version"] == self.version or time.monotonic() - self._distribution_time < self.interval:
+            return self._distribution
+        return None
+
+    def store_distribution(self, distribution):
+        self._distribution = distribution
+        self._distribution_time = time.monotonic()
+
+    def report(self, distribution):
+        """Combine a distribution with the always current incremental figures"""
+        return dict(distribution,
+                    users=self._size,
+                    supply=self.supply,
+                    broke=self.broke,
+                    reset_inflation=self.reset_inflation,
+                    admin_adjustments=self.admin_adjustments,
+                    histogram=list(zip(HISTOGRAM_EDGES, self._histogram)))
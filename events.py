@@ -0,0 +1,144 @@
+import asyncio
+from collections import OrderedDict, namedtuple
+
+# Balance-change event kinds
+WENT_BROKE = "went_broke"
+PAYMENT_RECEIVED = "payment_received"
+POLL_PAYOUT = "poll_payout"
+RAFFLE_PRIZE = "raffle_prize"
+
+BalanceEvent = namedtuple("BalanceEvent", "kind user_id amount counterparty")
+
+BROKE_MESSAGE = ("You lost all your chips! Use `/chips` to check your chips.\r\n"
+                 "Ask an admin to get you more chips, or ask a friend to pay you some chips.")
+
+
+class EventBus:
+    """Publishes balance-change events to subscriber queues without blocking"""
+
+    def __init__(self):
+        self._queues = []
+        self.dropped = 0
+
+    def subscribe(self, maxsize=10000):
+        """Return a new queue that receives every published event"""
+        queue = asyncio.Queue(maxsize)
+        self._queues.append(queue)
+        return queue
+
+    def publish(self, kind, user_id, amount=0, counterparty=None):
+        """Queue an event for all subscribers, dropping it for full queues"""
+        event = BalanceEvent(kind, str(user_id), amount, counterparty)
+        for queue in self._queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+
+def format_notification(events):
+    """Merge all pending events of one user into a single DM"""
+    payments = {}
+    poll_winnings = 0
+    raffle_winnings = 0
+    broke = False
+    for event in events:
+        if event.kind == PAYMENT_RECEIVED:
+            payments[event.counterparty] = payments.get(event.counterparty, 0) + event.amount
+            broke = False
+        elif event.kind == POLL_PAYOUT:
+            poll_winnings += event.amount
+            broke = False
+        elif event.kind == RAFFLE_PRIZE:
+            raffle_winnings += event.amount
+            broke = False
+        elif event.kind == WENT_BROKE:
+            broke = True
+
+    lines = [f"<@{sender}> paid you {amount} chips!" for sender, amount in payments.items()]
+    if poll_winnings:
+        lines.append(f"You won {poll_winnings} chips from the prediction poll!")
+    if raffle_winnings:
+        lines.append(f"You won {raffle_winnings} chips in the raffle!")
+    if broke:
+        lines.append(BROKE_MESSAGE)
+    return "\n".join(lines)
+
+
+class NotificationDispatcher:
+    """Delivers balance-change events as DMs in the background.
+
+    Events for the same user that pile up while earlier DMs are being sent
+    are merged into one message. At most ``max_pending_users`` users wait for
+    a DM at once and sends are spaced out to stay under ``rate`` per second.
+    """
+
+    def __init__(self, bus, send, rate=5.0, max_pending_users=1000):
+        self.queue = bus.subscribe()
+        self.send = send
+        self.interval = 1 / rate
+        self.max_pending_users = max_pending_users
+        self._pending = OrderedDict()
+        self._task = None
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the consumer task; call once the event loop is running"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def _collect(self, event):
+        events = self._pending.get(event.user_id)
+        if events is not None:
+            events.append(event)
+            self.coalesced += 1
+        elif len(self._pending) < self.max_pending_users:
+            self._pending[event.user_id] = [event]
+        else:
+            self.dropped += 1
+
+    def _drain(self):
+        while not self.queue.empty():
+            self._collect(self.queue.get_nowait())
+
+    async def run(self):
+        while True:
+            if not self._pending:
+                self._collect(await self.queue.get())
+            self._drain()
+            user_id, events = self._pending.popitem(last=False)
+            await self._deliver(user_id, events)
+            await asyncio.sleep(self.interval)
+
+    async def _deliver(self, user_id, events):
+        message = format_notification(events)
+        if not message:
+            return
+        try:
+            await self.send(user_id, message)
+            self.sent += 1
+        except Exception as e:
+            retry_after = getattr(e, 'retry_after', None)
+            if retry_after:
+                # Rate limited: put the user back in front and wait it out
+                self._pending[user_id] = events + self._pending.pop(user_id, [])
+                self._pending.move_to_end(user_id, last=False)
+                await asyncio.sleep(retry_after)
+            else:
+                self.failed += 1
+                print(f"Error sending notification to {user_id}: {e}")
+
+    def stats(self):
+        """Queue metrics for monitoring"""
+        return {
+            "queued": self.queue.qsize(),
+            "pending_users": len(self._pending),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
@@ -0,0 +1,238 @@
+import os
+import sys
+import heapq
+import struct
+import threading
+from array import array
+
+GAMES = ["flip", "roll", "roulette", "slots", "blackjack"]
+
+# column -> array type code; streak is positive for wins in a row, negative for losses
+COLUMNS = {
+    "rounds": 'I',
+    "wins": 'I',
+    "wagered": 'Q',
+    "won": 'Q',
+    "biggest_win": 'Q',
+    "streak": 'i',
+    "best_streak": 'I',
+}
+
+# Leaderboard stats; net is won minus wagered and is computed from both columns
+LEADERBOARD_STATS = ["net", "won", "wagered", "rounds", "biggest_win", "best_streak"]
+
+
+class GameStats:
+    """Per-user, per-game counters kept column by column.
+
+    Every counter of a game is an array indexed by the user's slot, so
+    recording a round is a few O(1) array updates and a leaderboard only
+    scans the columns it ranks by. game_stats.bin stores the same columns,
+    each reserved for ``capacity`` slots; a flush rewrites only the changed
+    slots of the columns of the games that were played, in place, and the
+    whole file only when the capacity has to grow.
+    """
+
+    HEADER = struct.Struct('<4sII')  # magic, capacity, users
+    MAGIC = b'GST1'
+
+    def __init__(self, stats_file='game_stats.bin', capacity=1024):
+        self.stats_file = stats_file
+        self.capacity = capacity
+        self._slots = {}
+        self._user_ids = array('Q')
+        self._columns = [{name: array(code) for name, code in COLUMNS.items()} for _ in GAMES]
+        self._dirty = [set() for _ in GAMES]
+        self._new_slots = set()
+        self._written_capacity = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._load_stats()
+
+    def _layout(self, capacity):
+        """File offset of every column for a capacity; the user id column comes first"""
+        offset = self.HEADER.size + 8 * capacity
+        offsets = []
+        for _ in GAMES:
+            columns = {}
+            for name, code in COLUMNS.items():
+                columns[name] = offset
+                offset += array(code).itemsize * capacity
+            offsets.append(columns)
+        return offsets
+
+    def _load_stats(self):
+        """Load all columns from the stats file"""
+        try:
+            if not os.path.exists(self.stats_file):
+                return
+            with open(self.stats_file, 'rb') as f:
+                data = f.read()
+            magic, capacity, users = self.HEADER.unpack_from(data)
+            if magic != self.MAGIC:
+                raise ValueError("not a game stats file")
+            self._user_ids.frombytes(data[self.HEADER.size:self.HEADER.size + 8 * users])
+            for columns, offsets in zip(self._columns, self._layout(capacity)):
+                for name, column in columns.items():
+                    column.frombytes(data[offsets[name]:offsets[name] + column.itemsize * users])
+            if sys.byteorder != 'little':
+                for column in [self._user_ids] + [c for columns in self._columns for c in columns.values()]:
+                    column.byteswap()
+            self._slots = {user_id: slot for slot, user_id in enumerate(self._user_ids)}
+            self.capacity = self._written_capacity = capacity
+        except Exception as e:
+            print(f"Error loading game stats: {e}")
+
+    def _slot(self, user_id):
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._slots[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+            for columns in self._columns:
+                for column in columns.values():
+                    column.append(0)
+            self._new_slots.add(slot)
+        return slot
+
+    def record(self, user_id, game, stake, payout):
+        """Count one finished round"""
+        g = GAMES.index(game)
+        with self._lock:
+            slot = self._slot(int(user_id))
+            columns = self._columns[g]
+            columns["rounds"][slot] += 1
+            columns["wagered"][slot] += stake
+            columns["won"][slot] += payout
+            streak = columns["streak"][slot]
+            if payout > stake:
+                columns["wins"][slot] += 1
+                columns["biggest_win"][slot] = max(columns["biggest_win"][slot], payout - stake)
+                streak = streak + 1 if streak > 0 else 1
+                columns["best_streak"][slot] = max(columns["best_streak"][slot], streak)
+            elif payout < stake:
+                streak = streak - 1 if streak < 0 else -1
+            # A push leaves the streak as it was
+            columns["streak"][slot] = streak
+            self._dirty[g].add(slot)
+
+    def profile(self, user_id):
+        """Counters of every game the user has played, by game"""
+        slot = self._slots.get(int(user_id))
+        if slot is None:
+            return {}
+        profile = {}
+        for game, columns in zip(GAMES, self._columns):
+            if columns["rounds"][slot]:
+                profile[game] = {name: column[slot] for name, column in columns.items()}
+        return profile
+
+    def top(self, game, stat, count=10):
+        """The count best (user id, value) pairs of one game by one stat"""
+        columns = self._columns[GAMES.index(game)]
+        rounds = columns["rounds"]
+        if stat == "net":
+            won, wagered = columns["won"], columns["wagered"]
+            value = lambda slot: won[slot] - wagered[slot]
+        else:
+            value = columns[stat].__getitem__
+        played = (slot for slot in range(len(rounds)) if rounds[slot])
+        return [(str(self._user_ids[slot]), value(slot)) for slot in heapq.nlargest(count, played, key=value)]
+
+    def rows(self):
+        """(user id, game, counters...) for every game every user has played, for exports"""
+        for slot in range(len(self._user_ids)):
+            for game, columns in zip(GAMES, self._columns):
+                if columns["rounds"][slot]:
+                    yield [self._user_ids[slot], game] + [column[slot] for column in columns.values()]
+
+    def _column_bytes(self, column, start, stop):
+        data = column[start:stop]
+        if sys.byteorder != 'little':
+            data.byteswap()
+        return data.tobytes()
+
+    def _file_writes(self, capacity):
+        """(offset, bytes) of every column in a new file with room for ``capacity`` users"""
+        users = len(self._user_ids)
+        writes = [(0, self.HEADER.pack(self.MAGIC, capacity, users)),
+                  (self.HEADER.size, self._column_bytes(self._user_ids, 0, users))]
+        for columns, column_offsets in zip(self._columns, self._layout(capacity)):
+            for name, column in columns.items():
+                writes.append((column_offsets[name], self._column_bytes(column, 0, len(column))))
+        return writes
+
+    def _rewrite(self, capacity, writes):
+        """Write a new file from copied columns"""
+        temp_file = f"{self.stats_file}.tmp"
+        with open(temp_file, 'wb') as f:
+            for offset, data in writes:
+                f.seek(offset)
+                f.write(data)
+            # Reserve the unused slots of the last column too
+            f.truncate(self.HEADER.size + capacity * (8 + len(GAMES) * sum(array(code).itemsize for code in COLUMNS.values())))
+        os.replace(temp_file, self.stats_file)
+
+    def flush(self):
+        """Write the changed slots in place; returns how many column values were written"""
+        with self._write_lock:
+            with self._lock:
+                dirty = [sorted(slots) for slots in self._dirty]
+                if not any(dirty) and not self._new_slots:
+                    return 0
+                new_slots = sorted(self._new_slots)
+                users = len(self._user_ids)
+                # Copy the changed values so rounds keep being recorded during the write
+                rewrite = self._written_capacity is None or users > self.capacity
+                if rewrite:
+                    capacity = self.capacity
+                    while capacity < users:
+                        capacity *= 2
+                    writes = self._file_writes(capacity)
+                else:
+                    writes = []
+                    offsets = self._layout(self.capacity)
+                    for slot, run in _runs(new_slots):
+                        writes.append((self.HEADER.size + 8 * slot, self._column_bytes(self._user_ids, slot, slot + run)))
+                    for g, slots in enumerate(dirty):
+                        for slot, run in _runs(slots):
+                            for name, column in self._columns[g].items():
+                                writes.append((offsets[g][name] + column.itemsize * slot,
+                                               self._column_bytes(column, slot, slot + run)))
+                    writes.append((0, self.HEADER.pack(self.MAGIC, self.capacity, users)))
+                self._dirty = [set() for _ in GAMES]
+                self._new_slots = set()
+            try:
+                if rewrite:
+                    self._rewrite(capacity, writes)
+                else:
+                    fd = os.open(self.stats_file, os.O_WRONLY)
+                    try:
+                        for offset, data in writes:
+                            os.pwrite(fd, data, offset)
+                    finally:
+                        os.close(fd)
+            except OSError:
+                with self._lock:
+                    for g, slots in enumerate(dirty):
+                        self._dirty[g].update(slots)
+                    self._new_slots.update(new_slots)
+                raise
+            if rewrite:
+                # Later flushes write in place into the new file's layout
+                self.capacity = self._written_capacity = capacity
+                return users * len(GAMES) * len(COLUMNS)
+            return sum(len(slots) for slots in dirty) * len(COLUMNS)
+
+    def __len__(self):
+        return len(self._user_ids)
+
+
+def _runs(slots):
+    """Group sorted slots into (first slot, length) runs of neighbours"""
+    runs = []
+    for slot in slots:
+        if runs and runs[-1][0] + runs[-1][1] == slot:
+            runs[-1][1] += 1
+        else:
+            runs.append([slot, 1])
+    return runs
@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import threading
+
+# Contributions are counted in ten-thousandths of a chip so small bets still add up
+UNITS = 10000
+
+
+class JackpotPool:
+    """Progressive jackpot fed by a cut of every slots spin.
+
+    The cut is taken out of the bet before the reels pay, so the pool only
+    holds chips the players staked.
+
+    Each contribution lands in one of several striped counters, chosen by
+    user and guarded by its own lock, so spins never wait on each other or
+    on ChipManager's lock. The stripes are folded into the pool at most every
+    ``fold_interval`` seconds when the balances are saved, and always before
+    a payout, so the winner receives every contribution made up to that spin.
+    """
+
+    def __init__(self, pool_file='jackpot.json', seed=1000, cut=0.01, stripes=16, fold_interval=5):
+        self.pool_file = pool_file
+        self.seed = seed
+        self.cut = int(round(cut * UNITS))
+        self.fold_interval = fold_interval
+        self._stripes = [0] * stripes
+        self._stripe_locks = [threading.Lock() for _ in range(stripes)]
+        self._lock = threading.Lock()
+        self._units = seed * UNITS
+        self._last_fold = time.monotonic()
+        self._saved = None
+        self.wins = 0
+        self.last_win = None
+        self._load_pool()
+
+    def _load_pool(self):
+        """Load the pool from file"""
+        try:
+            if os.path.exists(self.pool_file):
+                with open(self.pool_file, 'r') as f:
+                    data = json.load(f)
+                self._units = data["units"]
+                self.wins = data["wins"]
+                self.last_win = data["last_win"]
+                self._saved = (self._units, self.wins)
+        except Exception as e:
+            print(f"Error loading jackpot: {e}")
+
+    def contribute(self, user_id, bet, multiplier=0):
+        """Take the cut of a spin into the user's stripe; returns the chips the rest of the bet pays at ``multiplier``"""
+        # The reels pay on the bet less the cut, and the fraction of a chip they leave goes to the pool too
+        payout, fraction = divmod((bet * UNITS - bet * self.cut) * multiplier, UNITS)
+        stripe = int(user_id) % len(self._stripes)
+        with self._stripe_locks[stripe]:
+            self._stripes[stripe] += bet * self.cut + fraction
+        return payout
+
+    def fold(self):
+        """Move the striped contributions into the pool"""
+        with self._lock:
+            for stripe, lock in enumerate(self._stripe_locks):
+                with lock:
+                    self._units += self._stripes[stripe]
+                    self._stripes[stripe] = 0
+            self._last_fold = time.monotonic()
+
+    @property
+    def value(self):
+        """Current jackpot in chips, including contributions not folded yet"""
+        return (self._units + sum(self._stripes)) // UNITS
+
+    def win(self, user_id, now=None):
+        """Pay out the whole pool and start over from the seed; returns the chips won"""
+        self.fold()
+        with self._lock:
+            amount = self._units // UNITS
+            # Fractions of a chip carry over into the next pool
+            self._units = self._units % UNITS + self.seed * UNITS
+            self.wins += 1
+            self.last_win = {"user_id": str(user_id), "amount": amount,
+                             "time": int(now if now is not None else time.time())}
+        return amount
+
+    def flush(self, force=False):
+        """Fold if the interval has passed and write the pool if it changed"""
+        if force or time.monotonic() - self._last_fold >= self.fold_interval:
+            self.fold()
+        with self._lock:
+            if (self._units, self.wins) == self._saved:
+                return False
+            data = {"units": self._units, "wins": self.wins, "last_win": self.last_win}
+            temp_file = f"{self.pool_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.pool_file)
+            self._saved = (self._units, self.wins)
+            return True
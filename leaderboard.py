@@ -0,0 +1,54 @@
+import time
+from collections import namedtuple
+
+Snapshot = namedtuple("Snapshot", "version ranking positions exclude top threshold")
+
+
+class LeaderboardCache:
+    """Ranking snapshot shared by every leaderboard view of one economy.
+
+    Every balance change bumps ``version``. The ranking is only re-sorted when
+    a change touches the top of the board, or at most once per ``interval``
+    seconds for changes further down, so many views cost one sort.
+    """
+
+    def __init__(self, interval=30, top_size=10):
+        self.interval = interval
+        self.top_size = top_size
+        self.version = 0
+        self.snapshot = None
+        self.rebuilds = 0
+        self._built_at = 0
+        self._top_changed = False
+
+    def changed(self, user_id, chips):
+        """Record a balance change"""
+        self.version += 1
+        snapshot = self.snapshot
+        if snapshot is not None and not self._top_changed:
+            if user_id in snapshot.top or chips >= snapshot.threshold:
+                self._top_changed = True
+
+    def get(self, users, exclude_ids=None):
+        """Return the current snapshot, rebuilding it if needed"""
+        exclude = frozenset(str(uid) for uid in exclude_ids or ())
+        snapshot = self.snapshot
+        now = time.monotonic()
+        if (snapshot is None or snapshot.exclude != exclude or self._top_changed
+                or (snapshot.version != self.version and now - self._built_at >= self.interval)):
+            snapshot = self._build(users, exclude, now)
+        return snapshot
+
+    def _build(self, users, exclude, now):
+        ranking = sorted(((uid, chips) for uid, chips in users.items() if uid not in exclude),
+                         key=lambda x: x[1], reverse=True)
+        positions = {uid: i for i, (uid, _) in enumerate(ranking)}
+        top = ranking[:self.top_size]
+        # Until the top is full any balance can enter it
+        threshold = top[-1][1] if len(top) == self.top_size else float('-inf')
+        self.snapshot = Snapshot(self.version, ranking, positions, exclude,
+                                 frozenset(uid for uid, _ in top), threshold)
+        self._built_at = now
+        self._top_changed = False
+        self.rebuilds += 1
+        return self.snapshot
@@ -0,0 +1,184 @@
+import os
+import mmap
+import time
+import struct
+import threading
+from array import array
+from collections import namedtuple
+
+# Reason codes stored with every ledger record
+ADJUST = 0
+STAKE = 1
+PAYOUT = 2
+TRANSFER_OUT = 3
+TRANSFER_IN = 4
+POLL_BET = 5
+POLL_PAYOUT = 6
+ADMIN_SET = 7
+BROKE_RESET = 8
+DAILY_REWARD = 9
+HOURLY_REWARD = 10
+JACKPOT = 11
+RAFFLE_TICKETS = 12
+RAFFLE_PRIZE = 13
+POLL_REFUND = 14
+RAFFLE_REFUND = 15
+
+REASON_NAMES = {
+    ADJUST: "Adjustment",
+    STAKE: "Game stake",
+    PAYOUT: "Game payout",
+    TRANSFER_OUT: "Sent payment",
+    TRANSFER_IN: "Received payment",
+    POLL_BET: "Poll bet",
+    POLL_PAYOUT: "Poll payout",
+    ADMIN_SET: "Admin set",
+    BROKE_RESET: "Broke reset",
+    DAILY_REWARD: "Daily reward",
+    HOURLY_REWARD: "Hourly reward",
+    JACKPOT: "Slots jackpot",
+    RAFFLE_TICKETS: "Raffle tickets",
+    RAFFLE_PRIZE: "Raffle prize",
+    POLL_REFUND: "Poll bet refund",
+    RAFFLE_REFUND: "Raffle ticket refund",
+}
+
+LedgerEntry = namedtuple("LedgerEntry", "timestamp user_id delta balance counterparty reason")
+
+
+class Ledger:
+    """Append-only binary log of every chip movement"""
+
+    # timestamp, user id, delta, balance after, counterparty, reason
+    RECORD = struct.Struct('<IQqqQB')
+
+    def __init__(self, ledger_file='ledger.bin'):
+        self.ledger_file = ledger_file
+        self._buffer = bytearray()
+        self._writing = b""
+        self._flushed = 0
+        self._index = {}
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the per-user record index from the ledger file"""
+        self._index = {}
+        self._flushed = 0
+        try:
+            if not os.path.exists(self.ledger_file):
+                return
+            size = os.path.getsize(self.ledger_file)
+            whole = size - size % self.RECORD.size
+            if whole != size:
+                # Drop a partially written trailing record
+                with open(self.ledger_file, 'r+b') as f:
+                    f.truncate(whole)
+            if whole == 0:
+                return
+            with open(self.ledger_file, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for n, record in enumerate(self.RECORD.iter_unpack(mm)):
+                        self._index_record(str(record[1]), n)
+            self._flushed = whole // self.RECORD.size
+        except Exception as e:
+            print(f"Error loading ledger: {e}")
+            self._index = {}
+            self._flushed = 0
+
+    def _index_record(self, user_id, number):
+        records = self._index.get(user_id)
+        if records is None:
+            records = self._index[user_id] = array('I')
+        records.append(number)
+
+    def record(self, user_id, delta, balance, reason=ADJUST, counterparty=0):
+        """Buffer a ledger record; it is written on the next flush"""
+        packed = self.RECORD.pack(int(time.time()), int(user_id), delta, balance,
+                                  int(counterparty), reason)
+        with self._buffer_lock:
+            number = self._flushed + (len(self._writing) + len(self._buffer)) // self.RECORD.size
+            self._buffer += packed
+            self._index_record(str(user_id), number)
+
+    def record_many(self, changes, reason=ADJUST):
+        """Buffer the records of many (user id, delta, balance) changes made at once"""
+        now = int(time.time())
+        pack = self.RECORD.pack
+        with self._buffer_lock:
+            number = self._flushed + (len(self._writing) + len(self._buffer)) // self.RECORD.size
+            for user_id, delta, balance in changes:
+                self._buffer += pack(now, int(user_id), delta, balance, 0, reason)
+                self._index_record(user_id, number)
+                number += 1
+
+    def flush(self):
+        """Append all buffered records to the ledger file in a single write"""
+        with self._write_lock:
+            with self._buffer_lock:
+                if not self._buffer:
+                    return 0
+                self._writing, self._buffer = bytes(self._buffer), bytearray()
+            try:
+                with open(self.ledger_file, 'ab') as f:
+                    f.write(self._writing)
+            except Exception:
+                # Drop whatever part of the batch made it to disk, then put the batch back in front of the
+                # records buffered since, so the next flush retries it
+                try:
+                    if os.path.exists(self.ledger_file):
+                        with open(self.ledger_file, 'r+b') as f:
+                            f.truncate(self._flushed * self.RECORD.size)
+                except OSError:
+                    pass
+                with self._buffer_lock:
+                    self._buffer[:0] = self._writing
+                    self._writing = b""
+                raise
+            written = len(self._writing) // self.RECORD.size
+            with self._buffer_lock:
+                self._flushed += written
+                self._writing = b""
+            return written
+
+    def count(self, user_id):
+        """Number of ledger records for a user"""
+        records = self._index.get(str(user_id))
+        return len(records) if records is not None else 0
+
+    def history(self, user_id, page=0, per_page=10):
+        """Return one page of a user's records, newest first"""
+        records = self._index.get(str(user_id))
+        if not records or page < 0:
+            return []
+        end = len(records) - page * per_page
+        if end <= 0:
+            return []
+        numbers = records[max(0, end - per_page):end][::-1]
+        return self._read(numbers)
+
+    def _read(self, numbers):
+        size = self.RECORD.size
+        with self._buffer_lock:
+            flushed = self._flushed
+            pending = self._writing + bytes(self._buffer)
+        entries = []
+        mm = None
+        f = None
+        try:
+            for n in numbers:
+                if n >= flushed:
+                    record = self.RECORD.unpack_from(pending, (n - flushed) * size)
+                else:
+                    if mm is None:
+                        f = open(self.ledger_file, 'rb')
+                        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    record = self.RECORD.unpack_from(mm, n * size)
+                entries.append(LedgerEntry(*record))
+        finally:
+            if mm is not None:
+                mm.close()
+            if f is not None:
+                f.close()
+        return entries
@@ -3,14 +3,30 @@ from discord import app_commands, Interaction
 from discord.ext import commands
 from discord.ui import Button, View
 import json
-import random
 import os
+import time
 import asyncio
+from collections import OrderedDict
 from dotenv import load_dotenv
 
+import ledger
+import economy_io
+import responses
 from chip_manager import ChipManager
-from views import SlotsView
-from poll_manager import PollManager
+from events import NotificationDispatcher
+from game_stats import GAMES, LEADERBOARD_STATS
+from rate_limiter import TokenBucketLimiter, cooldown_check, rates_from_env
+from outbound import OutboundScheduler, budgets_from_env
+import blackjack as blackjack_rules
+import roulette as roulette_rules
+from rng import RNGService, round_id, stream_file
+from scheduler import Scheduler
+from sessions import SessionStore
+from views import SlotsView, LeaderboardView, BlackjackView, blackjack_embed, history_embed
+from poll_manager import PollManager, buy_bet
+from raffle import RaffleManager, MAX_WINNERS
+from partitions import partition_key
+from state_service import StateClient
 
 # Load environment variables
 load_dotenv()
@@ -38,21 +54,82 @@ except FileNotFoundError:
 
 uptime = None
 
-intents = discord.Intents.default()
-intents.message_content = True
+# Every command is an application command, so only guild and channel events are needed
+intents = discord.Intents.none()
+intents.guilds = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Run several gateway shards in separate processes with SHARD_COUNT and SHARD_IDS
+shard_count = os.getenv('SHARD_COUNT')
+if shard_count:
+    shard_ids = os.getenv('SHARD_IDS')
+    shard_ids = [int(shard_id) for shard_id in shard_ids.split(',')] if shard_ids else None
+    bot = commands.AutoShardedBot(command_prefix=commands.when_mentioned, intents=intents, shard_count=int(shard_count), shard_ids=shard_ids)
+else:
+    bot = commands.Bot(command_prefix=commands.when_mentioned, intents=intents)
 
-# Initialize the chip manager
-chip_manager = ChipManager()
+# When the bot runs in several processes, each one is named after its first shard and keeps its own RNG seed and jobs
+process_shard = min(bot.shard_ids) if getattr(bot, 'shard_ids', None) else None
 
-# Initialize the PollManager
-poll_manager = PollManager()
+# Outbound requests are sent by priority: interaction responses first, channel messages, user lookups and DMs after
+outbound = OutboundScheduler(budgets_from_env())
+outbound.install(bot.http)
+outbound.install(discord.webhook.async_.async_context.get())  # Interaction followups, only measured
+
+# With STATE_SOCKET set, chips, polls and raffles are owned by a shared state service process
+state_socket = os.getenv('STATE_SOCKET')
+if state_socket:
+    state_client = StateClient(state_socket)
+    get_chip_manager = state_client.chip_manager
+    get_poll_manager = state_client.poll_manager
+    get_raffle_manager = state_client.raffle_manager
+else:
+    state_client = None
+    get_chip_manager = ChipManager
+    get_poll_manager = PollManager
+    get_raffle_manager = RaffleManager
+
+# Each guild has its own economy unless GLOBAL_ECONOMY is set; DMs use the global one
+chip_manager = get_chip_manager()
+
+async def send_notification(user_id, message):
+    user = bot.get_user(int(user_id)) or await bot.fetch_user(int(user_id))
+    await user.send(message)
+
+# Deliver balance notifications (broke, payments, poll winnings) outside of commands
+notifier = NotificationDispatcher(chip_manager.events, send_notification, float(os.getenv('DM_RATE', 5)))
+
+# Provably fair game outcomes; seeds are committed before use and revealed with /rotateseed
+rng = RNGService(os.getenv('RNG_SEED_FILE', 'rng_seeds.json'), stream=process_shard)
+
+# Poll deadlines and recurring economy jobs, persisted across restarts
+scheduler = Scheduler(stream_file(os.getenv('SCHEDULER_FILE', 'jobs.json'), process_shard))
+
+async def settle_abandoned_hand(key, session):
+    """Stand on a blackjack hand that expired or was evicted and pay it out"""
+    try:
+        if not session["finished"]:
+            blackjack_rules.stand(session)
+        outcome, payout = blackjack_rules.result(session)
+        await get_chip_manager(session["guild_id"]).settle_round(session["user_id"], payout, "blackjack",
+                                                                 blackjack_rules.stake(session))
+    except Exception as e:
+        print(f"Error settling abandoned blackjack hand of {key}: {e}")
+
+# Blackjack hands in progress, persisted so they can be resumed after a restart
+blackjack_sessions = SessionStore(stream_file(os.getenv('BLACKJACK_SESSION_FILE', 'blackjack_sessions.json'), process_shard),
+                                  ttl=int(os.getenv('BLACKJACK_TTL', 600)),
+                                  max_sessions=int(os.getenv('BLACKJACK_MAX_SESSIONS', 10000)),
+                                  on_evict=settle_abandoned_hand)
+
+# Shared per-user token buckets for the game and payment commands
+command_limiter = TokenBucketLimiter(rates_from_env())
+rate_limited = cooldown_check(command_limiter)
 
 # Modified to use proper async operations
 async def play_slots(interaction: Interaction, bet: int):
     # Always defer immediately
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
     
     try:
         if bet < 1:
@@ -67,20 +144,107 @@ async def play_slots(interaction: Interaction, bet: int):
             return
         
         # Create and use the SlotsView
-        view = SlotsView(interaction.user.id, bet, chip_manager, superuser, superuser_always_win)
+        view = SlotsView(interaction.user.id, bet, chip_manager, superuser, superuser_always_win, rng)
         
         # Process first spin
         if not await chip_manager.remove_chips(interaction.user.id, bet):
             await interaction.followup.send("You don't have enough chips!")
             return
             
-        result, is_win, winnings, embed = await view._process_spin(interaction.user.id)
+        result, is_win, winnings, embed = await view._process_spin(interaction.user.id, interaction.locale)
         await interaction.followup.send(embed=embed, view=view)
         
     except Exception as e:
         print(f"Error in play_slots: {e}")
         await interaction.followup.send("An error occurred while processing your request.")
 
+def guild_chip_managers():
+    """The economies of all guilds this process serves, each once"""
+    partitions = {partition_key(guild.id) for guild in bot.guilds}
+    # Every process serves guilds of the global economy; only the one running shard 0 handles it
+    if process_shard not in (None, 0):
+        partitions.discard(None)
+    return [get_chip_manager(partition) for partition in partitions]
+
+# Scheduled job: close a poll for bets once its deadline has passed
+async def close_poll_job(guild_id=None, channel_id=None):
+    poll_manager = get_poll_manager(guild_id)
+    success, _ = await poll_manager.close_expired_poll()
+    if success and channel_id:
+        await bot.wait_until_ready()
+        channel = bot.get_channel(channel_id)
+        if channel is not None:
+            await channel.send("Betting on the poll is now closed!")
+
+# Scheduled job: reset broke users in every guild
+async def reset_broke_job():
+    await bot.wait_until_ready()
+    count = 0
+    for manager in guild_chip_managers():
+        count += await manager.reset_broke_users()
+    print(f"Scheduled broke reset: reset {count} users")
+
+# Scheduled job: give every user a daily reward
+async def daily_reward_job(amount):
+    await bot.wait_until_ready()
+    count = 0
+    for manager in guild_chip_managers():
+        count += await manager.grant_all(amount)
+    print(f"Scheduled daily reward: {amount} chips to {count} users")
+
+# Draw the raffle of a guild, pay its winners and describe the result
+async def run_raffle_draw(guild_id, now=None):
+    game_round = rng.play("raffle")
+    success, pot, prizes = await get_raffle_manager(guild_id).draw_raffle(game_round.outcome, now)
+    if not success:
+        return None
+    if not prizes:
+        return "The raffle has ended without any tickets sold."
+    await get_chip_manager(guild_id).pay_raffle_winners(prizes)
+    winners = "\n".join(f"<@{user_id}> wins {prize} chips!" for user_id, prize in prizes.items())
+    return f"🎟️ The raffle has ended! The pot was {pot} chips.\n{winners}\nRound {round_id(game_round)}"
+
+# Scheduled job: draw a raffle once its deadline has passed
+async def draw_raffle_job(guild_id=None, channel_id=None):
+    message = await run_raffle_draw(guild_id, time.time())
+    if message and channel_id:
+        await bot.wait_until_ready()
+        channel = bot.get_channel(channel_id)
+        if channel is not None:
+            await channel.send(message)
+
+scheduler.register("close_poll", close_poll_job)
+scheduler.register("draw_raffle", draw_raffle_job)
+scheduler.register("reset_broke", reset_broke_job)
+scheduler.register("daily_reward", daily_reward_job)
+
+def schedule_recurring_jobs():
+    """(Re)configure the cron jobs from BROKE_RESET_SCHEDULE and DAILY_REWARD_SCHEDULE"""
+    broke_schedule = os.getenv('BROKE_RESET_SCHEDULE')
+    if broke_schedule:
+        scheduler.schedule("reset_broke", "reset_broke", cron=broke_schedule)
+    else:
+        scheduler.cancel("reset_broke")
+    
+    reward_schedule = os.getenv('DAILY_REWARD_SCHEDULE')
+    if reward_schedule:
+        scheduler.schedule("daily_reward", "daily_reward", cron=reward_schedule,
+                           amount=int(os.getenv('DAILY_REWARD_AMOUNT', 100)))
+    else:
+        scheduler.cancel("daily_reward")
+
+# Event: Start background tasks once before connecting
+@bot.event
+async def setup_hook():
+    if state_client is not None:
+        await state_client.subscribe_events()
+    chip_manager.start_background_tasks()
+    notifier.start()
+    schedule_recurring_jobs()
+    scheduler.start()
+    blackjack_sessions.start()
+    outbound.start()
+
 # Event: When the bot is ready and logged in
 @bot.event
 async def on_ready():
@@ -88,6 +252,8 @@ async def on_ready():
     global uptime
     uptime = discord.utils.utcnow()
     print(f"Logged in as {bot.user}")
+    if getattr(bot, 'shard_ids', None) and 0 not in bot.shard_ids:
+        return  # Only the process running shard 0 syncs commands
     try:
         synced = await bot.tree.sync()  # Sync the slash commands with Discord
         print(f"Synced {len(synced)} commands.")
@@ -100,20 +266,8 @@ async def help(interaction: discord.Interaction):
     # Defer immediately to prevent timeouts
     await interaction.response.defer(ephemeral=True)
     
-    embed = discord.Embed(title="Help", description="Here are the available commands:", color=0x00ff00)
-    embed.add_field(name="/ping", value="Replies with 'Pong!' and the latency of the bot", inline=False)
-    embed.add_field(name="/uptime", value="Shows the uptime of the bot", inline=False)
-    embed.add_field(name="/leaderboard", value="Shows the leaderboard of the top 10 users with the most chips", inline=False)
-    embed.add_field(name="/chips", value="Check your chips", inline=False)
-    embed.add_field(name="/pay", value="Pay chips to another user", inline=False)
-    embed.add_field(name="/broke", value="Show all users with 0 chips", inline=False)
-    embed.add_field(name="/flip", value="Flip a coin with a bet", inline=False)
-    embed.add_field(name="/roll", value="Roll a dice with a bet", inline=False)
-    embed.add_field(name="/roulette", value="Play a game of roulette", inline=False)
-    embed.add_field(name="/slots", value="Play a game of slots", inline=False)
-    embed.add_field(name="/poll", value="Show the current prediction poll", inline=False)
-    embed.add_field(name="/bet", value="Place a bet on a poll option", inline=False)
-    await interaction.followup.send(embed=embed)
+    # Built once per language when the bot starts
+    await interaction.followup.send(embed=responses.help_embed(interaction.locale))
 
 # Slash Command: Ping command with latency
 @bot.tree.command(name="ping", description="Replies with 'Pong!' and the latency of the bot")
@@ -133,27 +287,61 @@ async def uptime(interaction: discord.Interaction):
     uptime_duration = discord.utils.utcnow() - uptime
     await interaction.followup.send(f"Uptime: {uptime_duration}")
 
-@bot.tree.command(name="leaderboard", description="Shows the leaderboard of the top 10 users with the most chips")
+# Slash Command: Show the seed commitment that game outcomes can be checked against
+@bot.tree.command(name="fairness", description="Show how to verify game results")
+async def fairness(interaction: discord.Interaction):
+    await interaction.response.defer(ephemeral=True)
+    
+    embed = discord.Embed(title="Provably Fair", 
+                          description="Round `<epoch>-<n>` (`s<shard>-<epoch>-<n>` on sharded bots) draws from HMAC-SHA256(seed, \"<n>:0\"). "
+                                      "The seed is committed to before any round is played and revealed when the epoch ends.", 
+                          color=0x00ff00)
+    embed.add_field(name=f"Epoch {rng.epoch} commitment", value=f"`{rng.commitment}`", inline=False)
+    if rng.revealed:
+        last = rng.revealed[-1]
+        embed.add_field(name=f"Epoch {last['epoch']} seed (revealed)", value=f"`{last['seed']}`", inline=False)
+    await interaction.followup.send(embed=embed)
+
+# Rendered leaderboard pages by (guild, ranking version, page); a new ranking version makes old entries unused
+leaderboard_pages = OrderedDict()
+
+async def render_leaderboard_page(chip_manager, guild_id, page, per_page=10):
+    version, total, entries = await chip_manager.get_leaderboard_page(page, per_page, [superuser])
+    pages = max(1, (total + per_page - 1) // per_page)
+    key = (guild_id, version, page)
+    if key in leaderboard_pages:
+        leaderboard_pages.move_to_end(key)
+        return leaderboard_pages[key], pages
+    
+    embed = discord.Embed(title="Leaderboard", description="Users with the most chips", color=0x00ff00)
+    for rank, user_id, chips in entries:
+        member = bot.get_user(int(user_id)) or await bot.fetch_user(int(user_id))
+        embed.add_field(name=f"{rank}. {member.name}", value=f"{chips} chips", inline=False)
+    embed.set_footer(text=f"Page {page + 1}/{pages}")
+    
+    leaderboard_pages[key] = embed
+    if len(leaderboard_pages) > 512:
+        leaderboard_pages.popitem(last=False)
+    return embed, pages
+
+@bot.tree.command(name="leaderboard", description="Shows the leaderboard of the users with the most chips")
 async def leaderboard(interaction: discord.Interaction):
     # Defer the response immediately
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
     
     try:
-        # Get top users, excluding superuser
-        top_users = await chip_manager.get_top_users(10, [superuser])
-    
-        embed = discord.Embed(title="Leaderboard", description="Top 10 users with the most chips", color=0x00ff00)
-        for i, (user_id, chips) in enumerate(top_users):
-            member = await bot.fetch_user(int(user_id))
-            embed.add_field(name=f"{i + 1}. {member.name}", value=f"{chips} chips", inline=False)
-    
-        user_rank = await chip_manager.get_user_rank(interaction.user.id)
+        async def render_page(page):
+            return await render_leaderboard_page(chip_manager, interaction.guild_id, page)
+        
+        # Pages are shared between users; rank and chips are per user
+        embed, pages = await render_page(0)
+        user_rank = await chip_manager.get_leaderboard_rank(interaction.user.id, [superuser])
         user_chips = await chip_manager.get_chips(interaction.user.id)
-        embed.add_field(name="Your Rank", value=f"{user_rank or 'Not ranked'}", inline=True)
-        embed.add_field(name="Your Chips", value=f"{user_chips} chips", inline=True)
+        view = LeaderboardView(interaction.user.id, render_page, 0, pages, user_rank)
     
         # Send the deferred response
-        await interaction.followup.send(embed=embed)
+        await interaction.followup.send(f"Your rank: {user_rank or 'Not ranked'} | Your chips: {user_chips} chips", embed=embed, view=view)
     except Exception as e:
         print(f"Error in leaderboard command: {e}")
         await interaction.followup.send("An error occurred while retrieving the leaderboard.")
@@ -163,24 +351,167 @@ async def leaderboard(interaction: discord.Interaction):
 async def chips(interaction: discord.Interaction):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
     
     try:
         chips = await chip_manager.get_chips(interaction.user.id)
-        if chips > 999:
-            chips_display = "{:,}".format(chips).replace(",", ".")
+        await interaction.followup.send(embed=responses.chips_embed(chips, interaction.locale))
+    except Exception as e:
+        print(f"Error in chips command: {e}")
+        await interaction.followup.send("An error occurred while checking your chips.")
+
+async def claim_reward(interaction: Interaction, kind: str):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    
+    try:
+        success, value, streak = await chip_manager.claim_reward(interaction.user.id, kind)
+        if not success:
+            ready_at = int(time.time() + value)
+            await interaction.followup.send(f"You already claimed your {kind} reward! Come back <t:{ready_at}:R>.")
+            return
+        
+        chips = await chip_manager.get_chips(interaction.user.id)
+        embed = discord.Embed(title=f"{kind.capitalize()} Reward", description=f"You claimed {value} chips!", color=0x00ff00)
+        embed.add_field(name="Streak", value=f"{streak}", inline=True)
+        embed.add_field(name="Chips", value=f"{chips}", inline=True)
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        print(f"Error in {kind} command: {e}")
+        await interaction.followup.send("An error occurred while claiming your reward.")
+
+# Slash Command: Claim the daily reward
+@bot.tree.command(name="daily", description="Claim your daily chips")
+async def daily(interaction: Interaction):
+    await claim_reward(interaction, "daily")
+
+# Slash Command: Claim the hourly reward
+@bot.tree.command(name="hourly", description="Claim your hourly chips")
+async def hourly(interaction: Interaction):
+    await claim_reward(interaction, "hourly")
+
+# Slash Command: Show the chip transaction history
+@bot.tree.command(name="history", description="Show your chip transaction history")
+@app_commands.describe(page="Page of the history to show, newest first")
+async def history(interaction: discord.Interaction, page: int = 1):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    
+    try:
+        per_page = 10
+        entries, total = await chip_manager.get_history(interaction.user.id, page - 1, per_page)
+        if not entries:
+            await interaction.followup.send("No transactions on this page!" if total else "You have no transactions yet!")
+            return
+        
+        pages = (total + per_page - 1) // per_page
+        embed = discord.Embed(title="History", description=f"Page {page}/{pages}", color=0x00ff00)
+        for entry in entries:
+            reason = ledger.REASON_NAMES.get(entry.reason, "Unknown")
+            if entry.counterparty:
+                reason = f"{reason} (<@{entry.counterparty}>)"
+            embed.add_field(name=f"{entry.delta:+} chips", 
+                            value=f"{reason} - <t:{entry.timestamp}:R>\nBalance: {entry.balance} chips", 
+                            inline=False)
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        print(f"Error in history command: {e}")
+        await interaction.followup.send("An error occurred while retrieving your history.")
+
+# Slash Command: Show how a balance or the economy's supply changed over time
+@bot.tree.command(name="graph", description="Show how your balance changed over time")
+@app_commands.describe(user="Whose balance to show, yours by default", days="How many days to show",
+                       economy="Show the total supply of the economy instead")
+async def graph(interaction: discord.Interaction, user: discord.User = None, days: app_commands.Range[int, 1, 365] = 30, economy: bool = False):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    
+    try:
+        now = int(time.time())
+        if economy:
+            points = await chip_manager.get_balance_history(None, days, now=now)
+            current = None
+            title = "Chip supply"
         else:
-            chips_display = str(chips)
+            user = user or interaction.user
+            points = await chip_manager.get_balance_history(user.id, days, now=now)
+            current = await chip_manager.get_chips(user.id)
+            title = f"Balance of {user.display_name}"
+        if not points and current is None:
+            await interaction.followup.send("No supply samples yet!")
+            return
+        
+        await interaction.followup.send(embed=history_embed(title, points, now - days * 86400, now, current))
+    except Exception as e:
+        print(f"Error in graph command: {e}")
+        await interaction.followup.send("An error occurred while retrieving the balance history.")
+
+# Slash Command: Show the game statistics of a user
+@bot.tree.command(name="profile", description="Show your game statistics")
+@app_commands.describe(user="Whose statistics to show, yours by default")
+async def profile(interaction: discord.Interaction, user: discord.User = None):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    user = user or interaction.user
+    
+    try:
+        stats = await chip_manager.get_profile(user.id)
+        if not stats:
+            await interaction.followup.send(f"{user.mention} has not played any games yet!")
+            return
         
-        embed = discord.Embed(title="Chips", description=f"You have {chips_display} chips!", color=0x00ff00)
+        embed = discord.Embed(title=f"Profile of {user.display_name}", color=0x00ff00)
+        for game, counters in stats.items():
+            streak = counters["streak"]
+            streak_text = f"{streak} wins" if streak > 0 else f"{-streak} losses" if streak < 0 else "none"
+            embed.add_field(name=game.capitalize(), 
+                            value=(f"Rounds: {counters['rounds']} ({counters['wins']} won)\n"
+                                   f"Wagered: {counters['wagered']} chips\n"
+                                   f"Net: {counters['won'] - counters['wagered']:+} chips\n"
+                                   f"Biggest win: {counters['biggest_win']} chips\n"
+                                   f"Streak: {streak_text} (best {counters['best_streak']})"), 
+                            inline=True)
         await interaction.followup.send(embed=embed)
     except Exception as e:
-        print(f"Error in chips command: {e}")
-        await interaction.followup.send("An error occurred while checking your chips.")
+        print(f"Error in profile command: {e}")
+        await interaction.followup.send("An error occurred while retrieving the profile.")
+
+# Slash Command: Show the best players of one game
+@bot.tree.command(name="game_leaderboard", description="Show the best players of a game")
+@app_commands.describe(game="The game to rank", stat="What to rank the players by")
+@app_commands.choices(game=[app_commands.Choice(name=game.capitalize(), value=game) for game in GAMES],
+                      stat=[app_commands.Choice(name=stat.replace("_", " ").capitalize(), value=stat) for stat in LEADERBOARD_STATS])
+async def game_leaderboard(interaction: discord.Interaction, game: str, stat: str = "net"):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    
+    try:
+        top_users = await chip_manager.get_game_leaderboard(game, stat)
+        if not top_users:
+            await interaction.followup.send(f"Nobody has played {game} yet!")
+            return
+        
+        lines = [f"{i}. <@{user_id}>: {value:+}" if stat == "net" else f"{i}. <@{user_id}>: {value}"
+                 for i, (user_id, value) in enumerate(top_users, 1)]
+        embed = discord.Embed(title=f"{game.capitalize()} Leaderboard", 
+                              description="\n".join(lines), 
+                              color=0x00ff00)
+        embed.set_footer(text=f"Ranked by {stat.replace('_', ' ')}")
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        print(f"Error in game_leaderboard command: {e}")
+        await interaction.followup.send("An error occurred while retrieving the leaderboard.")
 
 @bot.tree.command(name="broke", description="Show all users with 0 chips")
 async def broke(interaction: discord.Interaction):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
     
     try:
         # Find all users with 0 chips
@@ -203,11 +534,67 @@ async def broke(interaction: discord.Interaction):
         print(f"Error in broke command: {e}")
         await interaction.followup.send("An error occurred while checking broke users.")
 
+# Slash Command: Show the health of the economy
+@bot.tree.command(name="economy", description="Show the chip supply and how it is distributed")
+async def economy(interaction: discord.Interaction):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    
+    try:
+        report = await chip_manager.get_economy_report()
+        if not report["users"]:
+            await interaction.followup.send("Nobody has any chips yet!")
+            return
+        
+        embed = discord.Embed(title="Economy", color=0x00ff00)
+        embed.add_field(name="Supply", value=f"{report['supply']} chips", inline=True)
+        embed.add_field(name="Users", value=f"{report['users']}", inline=True)
+        embed.add_field(name="Broke", value=f"{report['broke']}", inline=True)
+        embed.add_field(name="Median", value=f"{report['percentiles']['p50']} chips", inline=True)
+        embed.add_field(name="Gini", value=f"{report['gini']:.2f}", inline=True)
+        embed.add_field(name="Top 1% share", value=f"{report['top1_share']:.1%}", inline=True)
+        
+        # Histogram as text bars scaled to the largest bucket
+        largest = max(count for _, count in report["histogram"]) or 1
+        edges = [edge for edge, _ in report["histogram"]]
+        lines = []
+        for i, (edge, count) in enumerate(report["histogram"]):
+            label = f"{edge}+" if i == len(edges) - 1 else (f"{edge}" if edges[i + 1] - edge == 1 else f"{edge}-{edges[i + 1] - 1}")
+            lines.append(f"`{label:>13}` {'█' * round(count / largest * 15)} {count}")
+        embed.add_field(name="Balances", value="\n".join(lines), inline=False)
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        print(f"Error in economy command: {e}")
+        await interaction.followup.send("An error occurred while retrieving the economy stats.")
+
+# Slash Command: Show the progressive slots jackpot
+@bot.tree.command(name="jackpot", description="Show the progressive slots jackpot")
+async def jackpot(interaction: discord.Interaction):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    
+    try:
+        value, wins, last_win = await chip_manager.get_jackpot()
+        embed = discord.Embed(title="💎 Slots Jackpot", 
+                              description=f"The jackpot is at **{value}** chips!\nSpin three 💎 in `/slots` to win it all.", 
+                              color=0x00ff00)
+        embed.add_field(name="Times won", value=f"{wins}", inline=True)
+        if last_win:
+            embed.add_field(name="Last winner", value=f"<@{last_win['user_id']}> won {last_win['amount']} chips <t:{last_win['time']}:R>", inline=True)
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        print(f"Error in jackpot command: {e}")
+        await interaction.followup.send("An error occurred while retrieving the jackpot.")
+
 # Slash Command: Pay chips to another user
 @bot.tree.command(name="pay", description="Pay chips to another user")
+@rate_limited
 async def pay(interaction: discord.Interaction, user: discord.User, chips: int):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
     
     try:
         if chips < 1:
@@ -220,12 +607,8 @@ async def pay(interaction: discord.Interaction, user: discord.User, chips: int):
         
         # Transfer chips between users
         if await chip_manager.transfer_chips(from_user_id, to_user_id, chips):
+            # The recipient is notified in the background
             await interaction.followup.send(f"Successfully paid {chips} chips to {user.mention}!")
-            try:
-                await user.send(f"{interaction.user.mention} paid you {chips} chips!")
-            except:
-                # In case DM fails, we still completed the transaction
-                pass
         else:
             await interaction.followup.send("You don't have enough chips! Use `/chips` to check your chips.")
     except Exception as e:
@@ -239,10 +622,11 @@ async def pay(interaction: discord.Interaction, user: discord.User, chips: int):
     app_commands.Choice(name="Heads", value="heads"),
     app_commands.Choice(name="Tails", value="tails")
 ])
-@commands.cooldown(1, 1, commands.BucketType.user)
+@rate_limited
 async def flip(interaction: Interaction, bet: int, side: str):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
     
     try:
         if bet < 1:
@@ -254,7 +638,8 @@ async def flip(interaction: Interaction, bet: int, side: str):
             await interaction.followup.send("You don't have enough chips! Use `/chips` to check your chips.")
             return
         
-        number = random.randint(0, 999)
+        game_round = rng.play("flip")
+        number = game_round.outcome
         result = "heads" if number % 2 == 0 else "tails"
         
         # Superuser always win logic
@@ -262,16 +647,12 @@ async def flip(interaction: Interaction, bet: int, side: str):
         if user == superuser and superuser_always_win:
             result = side
         
-        if result == side:
-            await chip_manager.add_chips(interaction.user.id, bet * 2)
-            await interaction.followup.send(f"Result: {result}! You won {bet} chips!")
-        else:
-            await interaction.followup.send(f"Result: {result}! You lost {bet} chips!")
+        payout = bet * 2 if result == side else 0
+        
+        # Pay out and notify the user in the background if they're broke
+        await chip_manager.settle_round(interaction.user.id, payout, "flip", bet)
         
-        # Notify user if they're broke
-        current_chips = await chip_manager.get_chips(interaction.user.id)
-        if current_chips == 0:
-            await interaction.user.send("You lost all your chips! Use `/chips` to check your chips.\r\nAsk an admin to get you more chips, or ask a friend to pay you some chips.")
+        await interaction.followup.send(responses.game_result(result, payout > 0, bet, round_id(game_round), interaction.locale))
     except Exception as e:
         print(f"Error in flip command: {e}")
         await interaction.followup.send("An error occurred while processing your bet.")
@@ -286,10 +667,11 @@ async def flip(interaction: Interaction, bet: int, side: str):
     app_commands.Choice(name="5", value=5),
     app_commands.Choice(name="6", value=6)
 ])
-@commands.cooldown(1, 1, commands.BucketType.user)
+@rate_limited
 async def roll(interaction: discord.Interaction, bet: int, number: int):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
     
     try:
         if bet < 1:
@@ -301,23 +683,20 @@ async def roll(interaction: discord.Interaction, bet: int, number: int):
             await interaction.followup.send("You don't have enough chips! Use `/chips` to check your chips.")
             return
         
-        result = random.randint(1, 6)
+        game_round = rng.play("roll")
+        result = game_round.outcome
         
         # Superuser always win logic
         user = str(interaction.user.id)
         if user == superuser and superuser_always_win:
             result = number
         
-        if result == number:
-            await chip_manager.add_chips(interaction.user.id, bet * 6)
-            await interaction.followup.send(f"Result: {result}! You won {bet * 5} chips!")
-        else:
-            await interaction.followup.send(f"Result: {result}! You lost {bet} chips!")
-            
-        # Notify user if they're broke
-        current_chips = await chip_manager.get_chips(interaction.user.id)
-        if current_chips == 0:
-            await interaction.user.send("You lost all your chips! Use `/chips` to check your chips.\r\nAsk an admin to get you more chips, or ask a friend to pay you some chips.")
+        payout = bet * 6 if result == number else 0
+        
+        # Pay out and notify the user in the background if they're broke
+        await chip_manager.settle_round(interaction.user.id, payout, "roll", bet)
+        
+        await interaction.followup.send(responses.game_result(result, payout > 0, bet * 5 if payout else bet, round_id(game_round), interaction.locale))
     except Exception as e:
         print(f"Error in roll command: {e}")
         await interaction.followup.send("An error occurred while processing your bet.")
@@ -325,10 +704,11 @@ async def roll(interaction: discord.Interaction, bet: int, number: int):
 # Slash Command: Roulette game
 @bot.tree.command(name="roulette", description="Play a game of roulette")
 @app_commands.describe(bet="Amount of chips to bet", number="Choose a number from 0 to 36")
-@commands.cooldown(1, 1, commands.BucketType.user)
+@rate_limited
 async def roulette(interaction: Interaction, bet: int, number: int):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
     
     try:
         if bet < 1:
@@ -343,53 +723,225 @@ async def roulette(interaction: Interaction, bet: int, number: int):
             await interaction.followup.send("You don't have enough chips! Use `/chips` to check your chips.")
             return
         
-        result = random.randint(0, 36)
+        game_round = rng.play("roulette")
+        result = game_round.outcome
         
         # Superuser always win logic
         user = str(interaction.user.id)
         if user == superuser and superuser_always_win:
             result = number
         
-        if result == number:
-            await chip_manager.add_chips(interaction.user.id, bet * 36)
-            await interaction.followup.send(f"Result: {result}! You won {bet * 35} chips!")
-        else:
-            await interaction.followup.send(f"Result: {result}! You lost {bet} chips!")
-            
-        # Notify user if they're broke
-        current_chips = await chip_manager.get_chips(interaction.user.id)
-        if current_chips == 0:
-            await interaction.user.send("You lost all your chips! Use `/chips` to check your chips.\r\nAsk an admin to get you more chips, or ask a friend to pay you some chips.")
+        payout = bet * 36 if result == number else 0
+        
+        # Pay out and notify the user in the background if they're broke
+        await chip_manager.settle_round(interaction.user.id, payout, "roulette", bet)
+        
+        await interaction.followup.send(responses.game_result(result, payout > 0, bet * 35 if payout else bet, round_id(game_round), interaction.locale))
     except Exception as e:
         print(f"Error in roulette command: {e}")
         await interaction.followup.send("An error occurred while processing your bet.")
 
+# Open roulette tables by channel; bets are only stored when the round settles
+roulette_tables = {}
+
+async def run_roulette_table(table, channel, chip_manager):
+    """Close the round when its time is up, spin once and settle every bet together"""
+    await asyncio.sleep(table.seconds_left())
+    table.close()
+    roulette_tables.pop(table.channel_id, None)
+    try:
+        if not table.bets:
+            await channel.send("The roulette round closed without any bets.")
+            return
+        
+        game_round = rng.play("roulette")
+        number = game_round.outcome
+        results = table.settle(number)
+        voided = await chip_manager.settle_rounds(results, "roulette")
+        
+        winners = sorted(((payout - stake, user_id) for user_id, (stake, payout) in results.items()
+                          if payout > stake and user_id not in voided), reverse=True)
+        color = roulette_rules.color(number)
+        embed = discord.Embed(title="Roulette Table", 
+                              description=f"The ball landed on **{number} {color}**!", 
+                              color={"red": 0xff0000, "black": 0x000000}.get(color, 0x00ff00))
+        if winners:
+            lines = [f"<@{user_id}> won {profit} chips" for profit, user_id in winners[:10]]
+            if len(winners) > 10:
+                lines.append(f"...and {len(winners) - 10} more")
+            embed.add_field(name="Winners", value="\n".join(lines), inline=False)
+        else:
+            embed.add_field(name="Winners", value="Nobody won this round.", inline=False)
+        if voided:
+            embed.add_field(name="Voided", value=f"{len(voided)} players could not cover their bets", inline=False)
+        embed.set_footer(text=f"{len(table)} bets from {len(results)} players | Round {round_id(game_round)}")
+        await channel.send(embed=embed)
+    except Exception as e:
+        print(f"Error in roulette table: {e}")
+
+# Slash Command: Open a multiplayer roulette round in this channel
+@bot.tree.command(name="roulette_table", description="Open a roulette round that everyone in the channel can bet on")
+@app_commands.describe(seconds="How long bets are accepted (10-300 seconds)")
+async def roulette_table(interaction: Interaction, seconds: int = 30):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=False)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    
+    try:
+        if interaction.channel_id in roulette_tables:
+            await interaction.followup.send("A roulette round is already open in this channel!", ephemeral=True)
+            return
+        if seconds < 10 or seconds > 300:
+            await interaction.followup.send("A round must be open for 10 to 300 seconds!", ephemeral=True)
+            return
+        
+        table = roulette_rules.RouletteTable(interaction.channel_id, time.time() + seconds)
+        roulette_tables[interaction.channel_id] = table
+        table.task = asyncio.create_task(run_roulette_table(table, interaction.channel, chip_manager))
+        
+        embed = discord.Embed(title="Roulette Table", 
+                              description=f"Place your bets with `/table_bet`! The ball drops <t:{int(table.closes_at)}:R>.", 
+                              color=0x00ff00)
+        embed.add_field(name="Numbers (0-36)", value="Pays 35 to 1", inline=True)
+        embed.add_field(name="1-12, 13-24, 25-36", value="Pays 2 to 1", inline=True)
+        embed.add_field(name="Red, black, odd, even", value="Pays 1 to 1", inline=True)
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        print(f"Error in roulette_table command: {e}")
+        await interaction.followup.send("An error occurred while opening the table.")
+
+# Slash Command: Bet on the open roulette round in this channel
+@bot.tree.command(name="table_bet", description="Bet on the open roulette round in this channel")
+@app_commands.describe(bet="A number (0-36), red, black, odd, even, 1-12, 13-24 or 25-36", amount="Amount of chips to bet")
+@rate_limited
+async def table_bet(interaction: Interaction, bet: str, amount: int):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    
+    try:
+        table = roulette_tables.get(interaction.channel_id)
+        if table is None or not table.open:
+            await interaction.followup.send("There is no open roulette round in this channel! Start one with `/roulette_table`.")
+            return
+        if amount < 1:
+            await interaction.followup.send("You must bet at least 1 chip!")
+            return
+        target = roulette_rules.parse_bet(bet)
+        if target is None:
+            await interaction.followup.send("Bet on a number from 0 to 36, red, black, odd, even, 1-12, 13-24 or 25-36!")
+            return
+        
+        # Chips are taken when the round settles; all bets of the round must be covered then
+        chips = await chip_manager.get_chips(interaction.user.id)
+        if table.stakes.get(str(interaction.user.id), 0) + amount > chips:
+            await interaction.followup.send("You don't have enough chips! Use `/chips` to check your chips.")
+            return
+        
+        success, error = table.place(interaction.user.id, target, amount)
+        if not success:
+            await interaction.followup.send(error)
+            return
+        await interaction.followup.send(f"You bet {amount} chips on {target}! The ball drops <t:{int(table.closes_at)}:R>.")
+    except Exception as e:
+        print(f"Error in table_bet command: {e}")
+        await interaction.followup.send("An error occurred while placing your bet.")
+
+# Slash Command: Blackjack game
+@bot.tree.command(name="blackjack", description="Play a hand of blackjack")
+@app_commands.describe(bet="Amount of chips to bet")
+@rate_limited
+async def blackjack(interaction: Interaction, bet: int):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    
+    try:
+        key = str(interaction.user.id)
+        session = blackjack_sessions.get(key)
+        if session is not None:
+            # Resume the hand in progress, e.g. after a restart removed its buttons
+            chip_manager = get_chip_manager(session["guild_id"])
+            view = BlackjackView(interaction.user.id, chip_manager, blackjack_sessions)
+            await interaction.followup.send("You still have a hand in progress!", embed=blackjack_embed(session), view=view)
+            return
+        
+        chip_manager = get_chip_manager(interaction.guild_id)
+        if bet < 1:
+            await interaction.followup.send("You must bet at least 1 chip!")
+            return
+        
+        # The stake is reserved once here and the hand is settled once when it ends
+        if not await chip_manager.remove_chips(interaction.user.id, bet):
+            await interaction.followup.send("You don't have enough chips! Use `/chips` to check your chips.")
+            return
+        
+        game_round = rng.play("blackjack")
+        session = blackjack_rules.new_hand(interaction.user.id, interaction.guild_id, bet, 
+                                           game_round.outcome, round_id(game_round))
+        if session["finished"]:
+            outcome, payout = blackjack_rules.result(session)
+            await chip_manager.settle_round(interaction.user.id, payout, "blackjack", bet)
+            await interaction.followup.send(embed=blackjack_embed(session, outcome, payout))
+            return
+        
+        blackjack_sessions.put(key, session)
+        view = BlackjackView(interaction.user.id, chip_manager, blackjack_sessions)
+        await interaction.followup.send(embed=blackjack_embed(session), view=view)
+    except Exception as e:
+        print(f"Error in blackjack command: {e}")
+        await interaction.followup.send("An error occurred while dealing your hand.")
+
 # Slash Command: Slots game
 @bot.tree.command(name="slots", description="Play a game of slots")
 @app_commands.describe(bet="Amount of chips to bet")
+@rate_limited
 async def slots(interaction: Interaction, bet: int):
     await play_slots(interaction, bet)
 
+async def poll_option_autocomplete(interaction: Interaction, current: str):
+    """Suggest the active poll's options from its in-memory index; /bet only while betting is open"""
+    try:
+        options = await get_poll_manager(interaction.guild_id).complete_options(current, betting=interaction.command.name == "bet")
+        return [app_commands.Choice(name=option, value=option) for option in options]
+    except Exception as e:
+        print(f"Error in poll option autocomplete: {e}")
+        return []
+
 # Slash command: add a Prediction poll
 @bot.tree.command(name="create_poll", description="Create a prediction poll")
-@app_commands.describe(question="The question to bet on", option1="First option", option2="Second option")
-async def create_poll(interaction: Interaction, question: str, option1: str, option2: str):
+@app_commands.describe(question="The question to bet on", option1="First option", option2="Second option",
+                       close_in="Minutes until betting closes automatically")
+@app_commands.default_permissions(administrator=True)
+async def create_poll(interaction: Interaction, question: str, 
+                      option1: app_commands.Range[str, 1, 100], option2: app_commands.Range[str, 1, 100], close_in: int = None):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=False)
+    poll_manager = get_poll_manager(interaction.guild_id)
     
     try:
         if str(interaction.user.id) != superuser:
             await interaction.followup.send("You are not authorized to create a poll!", ephemeral=True)
             return
         
-        success, error = await poll_manager.create_poll(question, option1, option2)
+        if close_in is not None and close_in < 1:
+            await interaction.followup.send("The poll must stay open for at least 1 minute!", ephemeral=True)
+            return
+        
+        closes_at = int(time.time()) + close_in * 60 if close_in else None
+        success, error = await poll_manager.create_poll(question, option1, option2, closes_at)
         if not success:
             await interaction.followup.send(error, ephemeral=True)
             return
         
+        if closes_at:
+            scheduler.schedule(f"close_poll:{interaction.guild_id}", "close_poll", run_at=closes_at,
+                               guild_id=interaction.guild_id, channel_id=interaction.channel_id)
+        
         embed = discord.Embed(title="Prediction Poll", description=question, color=0x00ff00)
         embed.add_field(name="Option 1", value=option1, inline=True)
         embed.add_field(name="Option 2", value=option2, inline=True)
+        if closes_at:
+            embed.add_field(name="Betting closes", value=f"<t:{closes_at}:R>", inline=False)
         await interaction.followup.send(embed=embed)
     except Exception as e:
         print(f"Error in create_poll command: {e}")
@@ -397,37 +949,36 @@ async def create_poll(interaction: Interaction, question: str, option1: str, opt
 
 @bot.tree.command(name="bet", description="Place a bet on a poll option")
 @app_commands.describe(option="The option to bet on", amount="Amount of chips to bet")
+@app_commands.autocomplete(option=poll_option_autocomplete)
+@rate_limited
 async def bet(interaction: Interaction, option: str, amount: int):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    poll_manager = get_poll_manager(interaction.guild_id)
     
     try:
-        # Check if user has enough chips
-        user_id = str(interaction.user.id)
-        user_chips = await chip_manager.get_chips(user_id)
-        
-        if user_chips < amount:
-            await interaction.followup.send("You don't have enough chips!")
+        if amount < 1:
+            await interaction.followup.send("You must bet at least 1 chip!")
             return
         
-        # Place bet using poll manager
-        success, error = await poll_manager.place_bet(user_id, option, amount)
+        # The chips are taken before the bet is placed and refunded if the poll refuses it
+        success, error = await buy_bet(chip_manager, poll_manager, interaction.user.id, option, amount)
         if not success:
             await interaction.followup.send(error)
             return
         
-        # Remove chips from user
-        await chip_manager.remove_chips(user_id, amount)
-        
         await interaction.followup.send(f"You bet {amount} chips on {option}!")
     except Exception as e:
         print(f"Error in bet command: {e}")
         await interaction.followup.send("An error occurred while processing your bet.")
 
 @bot.tree.command(name="close_poll", description="Close the prediction poll")
+@app_commands.default_permissions(administrator=True)
 async def close_poll(interaction: Interaction):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    poll_manager = get_poll_manager(interaction.guild_id)
     
     try:
         if str(interaction.user.id) != superuser:
@@ -438,6 +989,7 @@ async def close_poll(interaction: Interaction):
         if not success:
             await interaction.followup.send(error)
             return
+        scheduler.cancel(f"close_poll:{interaction.guild_id}")
         
         await interaction.followup.send("The poll has been closed!")
     except Exception as e:
@@ -446,9 +998,13 @@ async def close_poll(interaction: Interaction):
 
 @bot.tree.command(name="end_poll", description="End the prediction poll and distribute winnings")
 @app_commands.describe(winning_option="The correct option")
+@app_commands.autocomplete(winning_option=poll_option_autocomplete)
+@app_commands.default_permissions(administrator=True)
 async def end_poll(interaction: Interaction, winning_option: str):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=False)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    poll_manager = get_poll_manager(interaction.guild_id)
     
     try:
         if str(interaction.user.id) != superuser:
@@ -459,12 +1015,12 @@ async def end_poll(interaction: Interaction, winning_option: str):
         if not success:
             await interaction.followup.send(result)
             return
+        scheduler.cancel(f"close_poll:{interaction.guild_id}")
     
         if not payouts:
             message = "No one bet on the winning option!"
         else:
-            for user_id, amount in payouts.items():
-                await chip_manager.add_chips(user_id, amount)
+            await chip_manager.pay_poll_winners(payouts)
             message = f"The poll has ended! Winning option: {winning_option}"
     
         await interaction.followup.send(message)
@@ -477,6 +1033,7 @@ async def end_poll(interaction: Interaction, winning_option: str):
 async def poll(interaction: Interaction):
     # Defer immediately to prevent timeout
     await interaction.response.defer(ephemeral=True)
+    poll_manager = get_poll_manager(interaction.guild_id)
     
     try:
         poll_data = await poll_manager.get_poll_data()
@@ -485,84 +1042,413 @@ async def poll(interaction: Interaction):
             await interaction.followup.send("There is no active poll!")
             return
         
-        question = poll_data["question"]
-        options = poll_data["options"]
-        total_bets = poll_data["total_bets"]
+        await interaction.followup.send(embed=responses.poll_embed(poll_data, interaction.locale))
+    except Exception as e:
+        print(f"Error in poll command: {e}")
+        await interaction.followup.send("An error occurred while retrieving the poll.")
+
+# Slash Command: Start a raffle (Admin only)
+@bot.tree.command(name="start_raffle", description="Start a raffle")
+@app_commands.describe(price="Chips per ticket", winners="Number of winners sharing the pot",
+                       close_in="Minutes until the raffle is drawn automatically")
+@app_commands.default_permissions(administrator=True)
+async def start_raffle(interaction: Interaction, price: int, winners: int = 1, close_in: int = None):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=False)
+    raffle_manager = get_raffle_manager(interaction.guild_id)
+    
+    try:
+        if str(interaction.user.id) != superuser:
+            await interaction.followup.send("You are not authorized to start a raffle!", ephemeral=True)
+            return
+        
+        if price < 1 or not 1 <= winners <= MAX_WINNERS:
+            await interaction.followup.send(f"Tickets must cost at least 1 chip and there can be 1 to {MAX_WINNERS} winners!", ephemeral=True)
+            return
         
-        embed = discord.Embed(title="Prediction Poll", description=question, color=0x00ff00)
-        for option, bets in options.items():
-            bet_count = len(bets)
-            bet_amount = sum(bets.values())
-            embed.add_field(name=option, value=f"{bet_count} bets ({bet_amount} chips)", inline=True)
+        if close_in is not None and close_in < 1:
+            await interaction.followup.send("The raffle must stay open for at least 1 minute!", ephemeral=True)
+            return
         
-        embed.set_footer(text=f"Total bets: {total_bets} chips")
+        closes_at = int(time.time()) + close_in * 60 if close_in else None
+        success, error = await raffle_manager.start_raffle(price, winners, closes_at)
+        if not success:
+            await interaction.followup.send(error, ephemeral=True)
+            return
+        
+        if closes_at:
+            scheduler.schedule(f"draw_raffle:{interaction.guild_id}", "draw_raffle", run_at=closes_at,
+                               guild_id=interaction.guild_id, channel_id=interaction.channel_id)
+        
+        embed = discord.Embed(title="🎟️ Raffle", description=f"Buy tickets with `/raffle_buy` for {price} chips each!", color=0x00ff00)
+        embed.add_field(name="Winners", value=f"{winners}", inline=True)
+        if closes_at:
+            embed.add_field(name="Drawn", value=f"<t:{closes_at}:R>", inline=True)
         await interaction.followup.send(embed=embed)
     except Exception as e:
-        print(f"Error in poll command: {e}")
-        await interaction.followup.send("An error occurred while retrieving the poll.")
+        print(f"Error in start_raffle command: {e}")
+        await interaction.followup.send("An error occurred while starting the raffle.")
+
+# Slash Command: Buy raffle tickets
+@bot.tree.command(name="raffle_buy", description="Buy tickets for the current raffle")
+@app_commands.describe(tickets="Number of tickets to buy")
+@rate_limited
+async def raffle_buy(interaction: Interaction, tickets: int):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    raffle_manager = get_raffle_manager(interaction.guild_id)
+    
+    try:
+        if tickets < 1:
+            await interaction.followup.send("You must buy at least 1 ticket!")
+            return
+        
+        cost, error = await raffle_manager.check_purchase(tickets)
+        if error:
+            await interaction.followup.send(error)
+            return
+        
+        # One debit for the whole purchase, however many tickets it buys
+        if not await chip_manager.remove_chips(interaction.user.id, cost, reason=ledger.RAFFLE_TICKETS):
+            await interaction.followup.send("You don't have enough chips! Use `/chips` to check your chips.")
+            return
+        
+        success, error = await raffle_manager.add_tickets(interaction.user.id, tickets, cost)
+        if not success:
+            await chip_manager.add_chips(interaction.user.id, cost, reason=ledger.RAFFLE_REFUND)
+            await interaction.followup.send(error)
+            return
+        
+        await interaction.followup.send(f"You bought {tickets} tickets for {cost} chips!")
+    except Exception as e:
+        print(f"Error in raffle_buy command: {e}")
+        await interaction.followup.send("An error occurred while buying your tickets.")
 
-@bot.command()
-async def togglesuwin(ctx):
-    await ctx.message.delete()
+# Slash Command: Show the current raffle
+@bot.tree.command(name="raffle", description="Show the current raffle")
+async def raffle(interaction: Interaction):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=True)
+    raffle_manager = get_raffle_manager(interaction.guild_id)
+    
+    try:
+        raffle_data = await raffle_manager.get_raffle(interaction.user.id)
+        if raffle_data is None:
+            await interaction.followup.send("There is no active raffle!")
+            return
+        
+        embed = discord.Embed(title="🎟️ Raffle", description=f"Tickets cost {raffle_data['price']} chips each", color=0x00ff00)
+        embed.add_field(name="Pot", value=f"{raffle_data['tickets'] * raffle_data['price']} chips", inline=True)
+        embed.add_field(name="Tickets sold", value=f"{raffle_data['tickets']}", inline=True)
+        embed.add_field(name="Players", value=f"{raffle_data['participants']}", inline=True)
+        embed.add_field(name="Winners", value=f"{raffle_data['winners']}", inline=True)
+        if raffle_data["tickets"]:
+            embed.add_field(name="Your chance", value=f"{raffle_data['own']} tickets ({raffle_data['own'] / raffle_data['tickets']:.2%})", inline=True)
+        if raffle_data["closes_at"]:
+            embed.add_field(name="Drawn", value=f"<t:{raffle_data['closes_at']}:R>", inline=True)
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        print(f"Error in raffle command: {e}")
+        await interaction.followup.send("An error occurred while retrieving the raffle.")
+
+# Slash Command: Draw the raffle now (Admin only)
+@bot.tree.command(name="draw_raffle", description="Draw the winners of the current raffle")
+@app_commands.default_permissions(administrator=True)
+async def draw_raffle(interaction: Interaction):
+    # Defer immediately to prevent timeout
+    await interaction.response.defer(ephemeral=False)
+    
+    try:
+        if str(interaction.user.id) != superuser:
+            await interaction.followup.send("You are not authorized to draw the raffle!", ephemeral=True)
+            return
+        
+        message = await run_raffle_draw(interaction.guild_id)
+        if message is None:
+            await interaction.followup.send("There is no active raffle!", ephemeral=True)
+            return
+        scheduler.cancel(f"draw_raffle:{interaction.guild_id}")
+        await interaction.followup.send(message)
+    except Exception as e:
+        print(f"Error in draw_raffle command: {e}")
+        await interaction.followup.send("An error occurred while drawing the raffle.")
+
+# Admin commands are hidden from members without the Administrator permission and only run for the superuser
+# Slash Command: Toggle superuser always win mode (Admin only)
+@bot.tree.command(name="togglesuwin", description="Toggle superuser always win mode")
+@app_commands.default_permissions(administrator=True)
+async def togglesuwin(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
+        return
+    
     global superuser_always_win
     superuser_always_win = not superuser_always_win
-    await ctx.author.send(f"Superuser always win is now {'enabled' if superuser_always_win else 'disabled'}")
-
-# ! Command: Set chips for a user (Admin only)
-@bot.command()
-async def setchips(ctx, user: discord.User, chips: int):
-    await ctx.message.delete()
-    if ctx.author.id != int(superuser):
-        await ctx.author.send("You are not allowed to use this command.")
+    await interaction.followup.send(f"Superuser always win is now {'enabled' if superuser_always_win else 'disabled'}")
+
+# Slash Command: Set chips for a user (Admin only)
+@bot.tree.command(name="setchips", description="Set chips for a user")
+@app_commands.describe(user="The user whose chips to set", chips="The new chip balance")
+@app_commands.default_permissions(administrator=True)
+async def setchips(interaction: Interaction, user: discord.User, chips: app_commands.Range[int, 0]):
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
         return
     
     await chip_manager.set_chips(user.id, chips)
-    await ctx.author.send(f"Successfully set {user.name}'s chips to {chips}")
+    await interaction.followup.send(f"Successfully set {user.name}'s chips to {chips}")
 
-@bot.command()
-async def resetbroke(ctx):
-    if ctx.author.id != int(superuser):
-        await ctx.author.send("You are not allowed to use this command.")
+# Slash Command: Reset all users with 0 chips (Admin only)
+@bot.tree.command(name="resetbroke", description="Reset all users with 0 chips")
+@app_commands.default_permissions(administrator=True)
+async def resetbroke(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
         return
     
-    try:
-        await ctx.message.delete()
-    except (discord.Forbidden, AttributeError):
-        pass
-
     count = await chip_manager.reset_broke_users()
-    await ctx.author.send(f"Successfully reset {count} broke users.")
-
-# ! Command: See all admin commands
-@bot.command()
-async def adminhelp(ctx):
-    await ctx.message.delete()
-    if ctx.author.id != int(superuser):
-        await ctx.author.send("You are not allowed to use this command.")
+    await interaction.followup.send(f"Successfully reset {count} broke users.")
+
+# Slash Command: Show scheduled jobs (Admin only)
+@bot.tree.command(name="jobs", description="Show scheduled jobs")
+@app_commands.default_permissions(administrator=True)
+async def jobs(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
         return
+    
+    stats = scheduler.stats()
+    embed = discord.Embed(title="Scheduled Jobs", description=f"{stats['pending']} pending, {stats['runs']} run, {stats['failures']} failed", color=0x00ff00)
+    for job in sorted(scheduler.jobs.values(), key=lambda job: job["run_at"])[:10]:
+        repeat = f" ({job['cron']})" if job["cron"] else ""
+        embed.add_field(name=job["id"], value=f"<t:{int(job['run_at'])}:R>{repeat}", inline=False)
+    await interaction.followup.send(embed=embed)
 
-    embed = discord.Embed(title="Admin Commands", description="Here are the available admin commands:", color=0x00ff00)
-    embed.add_field(name="!togglesuwin", value="Toggle superuser always win mode", inline=False)
-    embed.add_field(name="!setchips", value="Set chips for a user", inline=False)
-    embed.add_field(name="!resetbroke", value="Reset all users with 0 chips", inline=False)
-    await ctx.author.send(embed=embed)
+# Slash Command: Reveal the current RNG seed and commit to a new one (Admin only)
+@bot.tree.command(name="rotateseed", description="Reveal the current RNG seed and start a new epoch")
+@app_commands.default_permissions(administrator=True)
+async def rotateseed(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
+        return
+    
+    revealed = rng.rotate()
+    await interaction.followup.send(f"Revealed the seed of epoch {revealed['epoch']} after {revealed['rounds']} rounds. Epoch {rng.epoch} has started.")
 
-# Command error handler
-@bot.event
-async def on_command_error(ctx, error):
-    print(f"Command error: {error}")
-    if isinstance(error, commands.CommandOnCooldown):
-        await ctx.send(f"This command is on cooldown. Please wait {error.retry_after:.2f} seconds.")
-    elif isinstance(error, commands.CommandNotFound):
-        pass  # Ignore command not found errors
+# Slash Command: Show chip storage cache and write queue metrics (Admin only)
+@bot.tree.command(name="storagestats", description="Show chip storage cache and write queue metrics")
+@app_commands.default_permissions(administrator=True)
+async def storagestats(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
+        return
+    
+    stats = await chip_manager.get_storage_stats()
+    writes = await chip_manager.get_persistence_stats()
+    embed = discord.Embed(title="Storage Stats", color=0x00ff00)
+    if stats is None:
+        embed.description = "Tiered storage is disabled, all users are kept in memory."
     else:
-        await ctx.send(f"An error occurred: {error}")
+        embed.add_field(name="Hit rate", value=f"{stats['hit_rate']:.1%}", inline=True)
+        embed.add_field(name="Hits / Misses", value=f"{stats['hits']} / {stats['misses']}", inline=True)
+        embed.add_field(name="Users in memory", value=f"{stats['hot_users']}", inline=True)
+        embed.add_field(name="Dirty users", value=f"{stats['dirty_users']}", inline=True)
+        embed.add_field(name="Evictions", value=f"{stats['evictions']}", inline=True)
+        embed.add_field(name="Write-backs", value=f"{stats['writebacks']}", inline=True)
+    embed.add_field(name="Write queue", value=f"{writes['depth']} saves (max {writes['max_depth']}), {writes['lag_ms']:.0f} ms behind", inline=True)
+    embed.add_field(name="Writes", value=f"{writes['writes']} ({writes['coalesced']} coalesced)", inline=True)
+    embed.add_field(name="Last write", value=f"{writes['last_write_ms']:.1f} ms", inline=True)
+    embed.add_field(name="Backpressure waits", value=f"{writes['backpressure_waits']}", inline=True)
+    if writes['failures']:
+        embed.add_field(name="Failed writes", value=f"{writes['failures']} (last: {writes['last_error']})", inline=False)
+    await interaction.followup.send(embed=embed)
+
+# Slash Command: Show outbound request queues and latencies (Admin only)
+@bot.tree.command(name="outboundstats", description="Show outbound request queues and latencies")
+@app_commands.default_permissions(administrator=True)
+async def outboundstats(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
+        return
+
+    embed = discord.Embed(title="Outbound Requests", color=0x00ff00)
+    for name, stats in outbound.stats().items():
+        value = (f"Queued: {stats['queued']} (max {stats['max_queued']})\n"
+                 f"Sent: {stats['sent']}, failed: {stats['failed']}, rejected: {stats['rejected']}\n"
+                 f"p50 {stats['p50_ms']:.0f} ms, p99 {stats['p99_ms']:.0f} ms")
+        embed.add_field(name=name.capitalize(), value=value, inline=True)
+    await interaction.followup.send(embed=embed)
+
+# Slash Command: Show the full economy report (Admin only)
+@bot.tree.command(name="economyreport", description="Show supply, percentiles, inequality and inflation")
+@app_commands.default_permissions(administrator=True)
+async def economyreport(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
+        return
+    
+    report = await chip_manager.get_economy_report()
+    embed = discord.Embed(title="Economy Report", color=0x00ff00)
+    embed.add_field(name="Supply", value=f"{report['supply']} chips", inline=True)
+    embed.add_field(name="Users", value=f"{report['users']}", inline=True)
+    embed.add_field(name="Mean", value=f"{report['mean']:.0f} chips", inline=True)
+    embed.add_field(name="Percentiles", 
+                    value="\n".join(f"{p}: {value} chips" for p, value in report["percentiles"].items()), 
+                    inline=True)
+    embed.add_field(name="Inequality", 
+                    value=f"Gini: {report['gini']:.3f}\nTop 1% share: {report['top1_share']:.1%}", 
+                    inline=True)
+    embed.add_field(name="Inflation", 
+                    value=f"Broke resets: {report['reset_inflation']:+} chips\nAdmin adjustments: {report['admin_adjustments']:+} chips", 
+                    inline=False)
+    embed.add_field(name="Broke users", value=f"{report['broke']}", inline=True)
+    await interaction.followup.send(embed=embed)
+
+async def run_with_progress(interaction, progress, job, poll=None):
+    """Run a bulk job and keep an ephemeral reply up to date with how many rows it has processed.
+    
+    Jobs running here update progress themselves; jobs of a chip manager,
+    which may live in the state service, are asked for their rows with poll.
+    """
+    message = await interaction.followup.send(f"{progress.phase}...", wait=True)
+    task = asyncio.ensure_future(job)
+    while not task.done():
+        await asyncio.wait([task], timeout=float(os.getenv('BULK_PROGRESS_INTERVAL', 5)))
+        try:
+            if poll is not None:
+                # A finished job returns its row count
+                rows = task.result() if task.done() else await poll()
+                if rows is not None:
+                    progress.rows = rows
+            await message.edit(content=f"{progress.phase}: {progress.rows:,} rows{'' if task.done() else '...'}")
+        except discord.HTTPException:
+            pass  # The interaction token expires after 15 minutes; the job keeps running
+    return task.result()
+
+async def send_result(interaction, content, **kwargs):
+    """Reply to an admin command, by DM if its interaction token expired during a long job"""
+    try:
+        await interaction.followup.send(content, **kwargs)
+    except discord.HTTPException:
+        await interaction.user.send(content, **kwargs)
+
+# Slash Command: Export balances, the ledger or game statistics as a file (Admin only)
+@bot.tree.command(name="export", description="Export balances, the ledger or game statistics as a file")
+@app_commands.describe(dataset="What to export", fmt="The file format")
+@app_commands.choices(dataset=[app_commands.Choice(name=dataset.capitalize(), value=dataset) for dataset in economy_io.EXPORTS],
+                      fmt=[app_commands.Choice(name=fmt.upper(), value=fmt) for fmt in economy_io.FORMATS])
+@app_commands.default_permissions(administrator=True)
+async def export(interaction: Interaction, dataset: str = "balances", fmt: str = "csv"):
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
+        return
+    
+    try:
+        export_dir = os.getenv('EXPORT_DIR', 'exports')
+        os.makedirs(export_dir, exist_ok=True)
+        path = os.path.join(export_dir, f"{dataset}-{interaction.guild_id or 'global'}-{int(time.time())}.{fmt}.gz")
+        progress = economy_io.Progress(f"Exporting {dataset}")
+        count = await run_with_progress(interaction, progress, chip_manager.export_data(dataset, path, fmt),
+                                        lambda: chip_manager.get_progress(path))
+        
+        # Files too large for Discord stay on the bot host
+        limit = interaction.guild.filesize_limit if interaction.guild else 25 * 1024 * 1024
+        if os.path.getsize(path) > limit:
+            await send_result(interaction, f"Exported {count:,} rows to `{path}` on the bot host; the file is too large to upload.")
+            return
+        await send_result(interaction, f"Exported {count:,} rows.", file=discord.File(path))
+        os.remove(path)
+    except Exception as e:
+        print(f"Error in export command: {e}")
+        await send_result(interaction, "An error occurred while exporting.")
+
+# Slash Command: Set many balances at once from an attached CSV or JSON Lines file (Admin only)
+@bot.tree.command(name="import", description="Set balances from an attached CSV or JSON Lines file")
+@app_commands.describe(file="A .csv or .jsonl file (optionally .gz) with user_id and chips")
+@app_commands.default_permissions(administrator=True)
+async def import_balances(interaction: Interaction, file: discord.Attachment):
+    await interaction.response.defer(ephemeral=True)
+    chip_manager = get_chip_manager(interaction.guild_id)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
+        return
+    
+    if economy_io.file_format(file.filename) is None:
+        await interaction.followup.send("Import files must be .csv or .jsonl, optionally gzipped.")
+        return
+    
+    export_dir = os.getenv('EXPORT_DIR', 'exports')
+    path = os.path.join(export_dir, f"import-{interaction.id}-{os.path.basename(file.filename)}")
+    try:
+        os.makedirs(export_dir, exist_ok=True)
+        await file.save(path)
+        
+        # Every row is checked before anything is changed, so a bad file changes nothing
+        progress = economy_io.Progress("Validating")
+        loop = asyncio.get_running_loop()
+        count, error = await run_with_progress(interaction, progress, 
+                                               loop.run_in_executor(None, economy_io.validate_balances, path, progress))
+        if error:
+            await send_result(interaction, f"Nothing was imported: {error}")
+            return
+        
+        progress = economy_io.Progress("Importing")
+        count = await run_with_progress(interaction, progress, chip_manager.import_balances(path),
+                                        lambda: chip_manager.get_progress(path))
+        await send_result(interaction, f"Successfully imported {count:,} balances.")
+    except Exception as e:
+        print(f"Error in import command: {e}")
+        await send_result(interaction, "An error occurred while importing.")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+# Slash Command: See all admin commands (Admin only)
+@bot.tree.command(name="adminhelp", description="Shows all admin commands")
+@app_commands.default_permissions(administrator=True)
+async def adminhelp(interaction: Interaction):
+    await interaction.response.defer(ephemeral=True)
+    if str(interaction.user.id) != superuser:
+        await interaction.followup.send("You are not allowed to use this command.")
+        return
+
+    embed = discord.Embed(title="Admin Commands", description="Here are the available admin commands:", color=0x00ff00)
+    embed.add_field(name="/togglesuwin", value="Toggle superuser always win mode", inline=False)
+    embed.add_field(name="/setchips", value="Set chips for a user", inline=False)
+    embed.add_field(name="/resetbroke", value="Reset all users with 0 chips", inline=False)
+    embed.add_field(name="/jobs", value="Show scheduled jobs", inline=False)
+    embed.add_field(name="/rotateseed", value="Reveal the current RNG seed and start a new epoch", inline=False)
+    embed.add_field(name="/storagestats", value="Show chip storage cache and write queue metrics", inline=False)
+    embed.add_field(name="/outboundstats", value="Show outbound request queues and latencies", inline=False)
+    embed.add_field(name="/economyreport", value="Show supply, percentiles, inequality and inflation", inline=False)
+    embed.add_field(name="/export", value="Export balances, the ledger or game statistics as CSV or JSON Lines", inline=False)
+    embed.add_field(name="/import", value="Set balances from an attached CSV or JSON Lines file", inline=False)
+    embed.add_field(name="/create_poll, /close_poll, /end_poll", value="Run prediction polls", inline=False)
+    embed.add_field(name="/start_raffle, /draw_raffle", value="Run raffles", inline=False)
+    await interaction.followup.send(embed=embed)
 
 # Application command error handler
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error):
     print(f"App command error: {error}")
-    if not interaction.response.is_done():
+    if isinstance(error, app_commands.CommandOnCooldown):
+        await interaction.response.send_message(f"This command is on cooldown. Please wait {error.retry_after:.2f} seconds.", ephemeral=True)
+    elif not interaction.response.is_done():
         await interaction.response.send_message(f"An error occurred: {str(error)}", ephemeral=True)
     else:
         await interaction.followup.send(f"An error occurred: {str(error)}")
@@ -0,0 +1,211 @@
+import os
+import time
+import asyncio
+from collections import deque
+
+# Priority classes of outbound Discord requests, most urgent first
+INTERACTION = 0
+MESSAGE = 1
+LOOKUP = 2
+DM = 3
+CLASS_NAMES = ["interaction", "message", "lookup", "dm"]
+
+# Default (burst, requests per second) of every route of a class; interactions are never held back
+DEFAULT_BUDGETS = {
+    MESSAGE: (5, 5.0),
+    LOOKUP: (10, 10.0),
+    DM: (5, 5.0),
+}
+
+# Discord allows 50 requests per second per bot token across all routes except interactions
+GLOBAL_BUDGET = (45, 45.0)
+
+
+def budgets_from_env(defaults=DEFAULT_BUDGETS):
+    """Read overrides like OUTBOUND_RATE_DM=10,2 (burst, requests per second)"""
+    budgets = dict(defaults)
+    for request_class in defaults:
+        value = os.getenv(f"OUTBOUND_RATE_{CLASS_NAMES[request_class].upper()}")
+        if value:
+            burst, rate = value.split(",")
+            budgets[request_class] = (int(burst), float(rate))
+    return budgets
+
+
+def route_key(route):
+    """Rate limit key of a discord.py Route: its method and path template plus the channel, guild or webhook it targets"""
+    return f"{route.key}:{route.major_parameters}"
+
+
+class Budget:
+    """Token bucket that can be checked without taking a token"""
+
+    def __init__(self, burst, rate):
+        self.burst = burst
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait(self, now):
+        """Seconds until a token is available; 0 if one is available now"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class OutboundScheduler:
+    """Orders the bot's outbound Discord requests by priority class.
+
+    Interaction responses and followups are sent at once. Channel messages,
+    user lookups and DMs wait in one queue per class. The most urgent class
+    gets the global budget, kept below Discord's per-token limit, first, and
+    every route also has a budget of its own. Routes are told apart the way
+    Discord buckets them, by method, path template and the channel, guild or
+    webhook they target, so a burst of DMs queues here instead of using up
+    the rate limits the rest of the bot needs, while one busy channel does
+    not hold up messages to the others.
+    """
+
+    def __init__(self, budgets=None, global_budget=GLOBAL_BUDGET, max_queued=10000, samples=1000):
+        self.budgets = dict(budgets if budgets is not None else DEFAULT_BUDGETS)
+        self.global_budget = Budget(*global_budget)
+        self.max_queued = max_queued
+        self._routes = {}
+        self._queues = [deque() for _ in CLASS_NAMES]
+        self._wakeup = None
+        self._task = None
+        self.dm_channels = set()
+        self.sent = [0] * len(CLASS_NAMES)
+        self.failed = [0] * len(CLASS_NAMES)
+        self.rejected = [0] * len(CLASS_NAMES)
+        self.max_depth = [0] * len(CLASS_NAMES)
+        self._latencies = [deque(maxlen=samples) for _ in CLASS_NAMES]
+
+    def classify(self, route):
+        """Priority class of a discord.py Route"""
+        path = route.path
+        if path.startswith("/interactions/") or route.webhook_token is not None:
+            return INTERACTION
+        if path == "/users/@me/channels":
+            return DM
+        if route.method == "GET" and path.startswith("/users/"):
+            return LOOKUP
+        if route.channel_id is not None and int(route.channel_id) in self.dm_channels:
+            return DM
+        return MESSAGE
+
+    async def submit(self, request_class, route_key, send):
+        """Run send() once its class and route may go; returns its result"""
+        start = time.perf_counter()
+        if request_class == INTERACTION:
+            return await self._send(request_class, send, start)
+        queue = self._queues[request_class]
+        if len(queue) >= self.max_queued:
+            self.rejected[request_class] += 1
+            raise RuntimeError(f"Too many queued {CLASS_NAMES[request_class]} requests")
+        future = asyncio.get_running_loop().create_future()
+        queue.append((route_key, future))
+        self.max_depth[request_class] = max(self.max_depth[request_class], len(queue))
+        self.start()
+        self._wakeup.set()
+        await future
+        return await self._send(request_class, send, start)
+
+    async def _send(self, request_class, send, start):
+        try:
+            result = await send()
+        except Exception:
+            self.failed[request_class] += 1
+            raise
+        finally:
+            self._latencies[request_class].append(time.perf_counter() - start)
+        self.sent[request_class] += 1
+        return result
+
+    def _route_budget(self, request_class, route_key):
+        budget = self._routes.get((request_class, route_key))
+        if budget is None:
+            budget = self._routes[(request_class, route_key)] = Budget(*self.budgets[request_class])
+        return budget
+
+    def _release(self, now):
+        """Let every request through that the budgets allow now; returns seconds until the next one could go"""
+        next_wait = None
+        # Higher classes take the global budget first; a route out of budget does not hold up the others
+        for request_class, queue in enumerate(self._queues):
+            held = deque()
+            limited = set()
+            while queue:
+                global_wait = self.global_budget.wait(now)
+                if global_wait:
+                    queue.extendleft(reversed(held))
+                    return global_wait if next_wait is None else min(next_wait, global_wait)
+                route_key, future = queue.popleft()
+                if future.done():
+                    continue  # The caller was cancelled
+                budget = self._route_budget(request_class, route_key)
+                wait = 0 if route_key in limited else budget.wait(now)
+                if route_key in limited or wait:
+                    limited.add(route_key)
+                    held.append((route_key, future))
+                    if wait:
+                        next_wait = wait if next_wait is None else min(next_wait, wait)
+                    continue
+                budget.take()
+                self.global_budget.take()
+                future.set_result(None)
+            queue.extend(held)
+        return next_wait
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            wait = self._release(time.monotonic())
+            self._wakeup.clear()
+            # A timer instead of wait_for, which can swallow a cancel that arrives as the event is set
+            timer = loop.call_later(wait, self._wakeup.set) if wait is not None else None
+            try:
+                await self._wakeup.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+    def start(self):
+        """Start the release task; call once the event loop is running"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    def install(self, http):
+        """Route every request of a discord.py HTTPClient (or webhook adapter) through the scheduler"""
+        request = http.request
+
+        async def scheduled_request(route, *args, **kwargs):
+            request_class = self.classify(route)
+            result = await self.submit(request_class, route_key(route), lambda: request(route, *args, **kwargs))
+            # Messages to a DM channel opened here are DMs too
+            if route.path == "/users/@me/channels" and isinstance(result, dict) and "id" in result:
+                self.dm_channels.add(int(result["id"]))
+            return result
+
+        http.request = scheduled_request
+
+    def stats(self):
+        """Queue depth, sends and latency percentiles of every class"""
+        stats = {}
+        for request_class, name in enumerate(CLASS_NAMES):
+            latencies = sorted(self._latencies[request_class])
+            stats[name] = {
+                "queued": len(self._queues[request_class]),
+                "max_queued": self.max_depth[request_class],
+                "sent": self.sent[request_class],
+                "failed": self.failed[request_class],
+                "rejected": self.rejected[request_class],
+                "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+                "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+            }
+        return stats
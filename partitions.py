@@ -0,0 +1,21 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def partition_key(guild_id):
+    """Economy partition of a guild; None is the global economy"""
+    if guild_id is None or os.getenv('GLOBAL_ECONOMY', 'False').lower() == 'true':
+        return None
+    return str(guild_id)
+
+
+def partition_path(guild_id, filename):
+    """Storage path of a file in a guild's partition, created on first use"""
+    if guild_id is None:
+        return filename
+    directory = os.path.join(os.getenv('GUILD_DATA_DIR', 'guilds'), str(guild_id))
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, os.path.basename(filename))
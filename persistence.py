@@ -0,0 +1,187 @@
+import time
+import atexit
+import asyncio
+import weakref
+import threading
+
+_workers = weakref.WeakSet()
+
+
+class PersistenceWorker:
+    """Single writer thread of one store.
+
+    save() hands over a snapshot and returns once it is queued, so a
+    command does not wait for the disk while it holds its manager's lock.
+    A snapshot still waiting when the next arrives is combined with it
+    (coalesced): by default the newer one replaces it, or ``merge(older,
+    newer)`` folds them together for snapshots that only hold changes. A
+    slow disk therefore means fewer, larger writes instead of a longer
+    queue, and the file is only ever written by this thread. Once the
+    oldest save not on disk is ``max_lag`` seconds old, save() waits for
+    the write in progress first (backpressure).
+    """
+
+    def __init__(self, name, write, max_lag=5.0, retry_delay=1.0, merge=None):
+        self.name = name
+        self.write = write
+        self.max_lag = max_lag
+        self.retry_delay = retry_delay
+        self.merge = merge or (lambda older, newer: newer)
+        self._condition = threading.Condition()
+        self._snapshot = None
+        self._queued = False
+        self._pending = 0  # saves not on disk yet
+        self._queued_since = None  # when the oldest save of the queued snapshot was made
+        self._writing_since = None  # the same for the snapshot being written
+        self._waiters = []
+        self._thread = None
+        self._closed = False
+        self._behind = False
+        self.writes = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.backpressure_waits = 0
+        self.max_depth = 0
+        self.last_write = 0.0
+        self.last_error = None
+        _workers.add(self)
+
+    def lag(self):
+        """Seconds since the oldest save that is not on disk yet was made"""
+        with self._condition:
+            since = [t for t in (self._queued_since, self._writing_since) if t is not None]
+            return time.monotonic() - min(since) if since else 0.0
+
+    async def save(self, snapshot):
+        """Queue a snapshot to be written; waits only while the disk is more than max_lag seconds behind"""
+        lag = self.lag()
+        while lag >= self.max_lag:
+            if not self._behind:
+                self._behind = True
+                print(f"Warning: {self.name} writes are {lag:.1f} s behind, slowing down saves")
+            self.backpressure_waits += 1
+            await self._next_write()
+            lag = self.lag()
+        if self._behind and lag < self.max_lag / 2:
+            self._behind = False
+        self.submit(snapshot)
+        return True
+
+    def submit(self, snapshot):
+        """Queue a snapshot without waiting, replacing one that has not been written yet"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"The {self.name} writer is closed")
+            if self._queued:
+                self.coalesced += 1
+                self._snapshot = self.merge(self._snapshot, snapshot)
+            else:
+                self._snapshot = snapshot
+                self._queued = True
+                self._queued_since = time.monotonic()
+            self._pending += 1
+            self.max_depth = max(self.max_depth, self._pending)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    async def _next_write(self):
+        """Wait until the writer finishes its current attempt"""
+        future = asyncio.get_running_loop().create_future()
+        with self._condition:
+            if self._writing_since is None and self._queued_since is None:
+                return
+            self._waiters.append(future)
+        await future
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queued and not self._closed:
+                    self._condition.wait()
+                if not self._queued:
+                    return
+                snapshot, covered = self._snapshot, self._pending
+                self._snapshot = None
+                self._queued = False
+                self._writing_since, self._queued_since = self._queued_since, None
+
+            start = time.perf_counter()
+            try:
+                self.write(snapshot)
+                error = None
+            except Exception as e:
+                print(f"Error saving {self.name}: {e}")
+                error = e
+
+            with self._condition:
+                self.last_write = time.perf_counter() - start
+                if error is None:
+                    self.writes += 1
+                    self._pending -= covered
+                else:
+                    self.failures += 1
+                    self.last_error = str(error)
+                    # Retried, together with a newer snapshot if one is waiting already
+                    if self._queued:
+                        self._snapshot = self.merge(snapshot, self._snapshot)
+                    else:
+                        self._snapshot = snapshot
+                        self._queued = True
+                    self._queued_since = self._writing_since
+                self._writing_since = None
+                waiters, self._waiters = self._waiters, []
+                self._condition.notify_all()
+            for future in waiters:
+                try:
+                    future.get_loop().call_soon_threadsafe(_wake, future)
+                except RuntimeError:
+                    pass  # The loop that waited has closed
+            if error is not None:
+                time.sleep(self.retry_delay)
+
+    def drain(self, timeout=None):
+        """Block until every queued save is on disk; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending and self._thread is not None and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return self._pending == 0
+
+    def close(self, timeout=None):
+        """Write what is queued and stop the writer thread"""
+        drained = self.drain(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        return drained
+
+    def stats(self):
+        """Queue depth and write metrics"""
+        return {
+            "depth": self._pending,
+            "lag_ms": self.lag() * 1000,
+            "max_depth": self.max_depth,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "backpressure_waits": self.backpressure_waits,
+            "last_write_ms": self.last_write * 1000,
+            "last_error": self.last_error,
+        }
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+@atexit.register
+def drain_all():
+    """Write every store's queued snapshot before the process exits"""
+    for worker in list(_workers):
+        worker.close(timeout=30)
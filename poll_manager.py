@@ -1,20 +1,41 @@
 import json
 import os
+import time
+import bisect
 import asyncio
 
+import ledger
+from partitions import partition_key, partition_path
+from persistence import PersistenceWorker
+
 class PollManager:
     _instance = None
+    _partitions = {}
     _lock = asyncio.Lock()
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(PollManager, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+    def __new__(cls, guild_id=None):
+        guild_id = partition_key(guild_id)
+        if guild_id is None:
+            if cls._instance is None:
+                cls._instance = super(PollManager, cls).__new__(cls)
+                cls._instance._initialize()
+            return cls._instance
+        
+        # Every guild runs its own polls with its own lock and file
+        partition = cls._partitions.get(guild_id)
+        if partition is None:
+            partition = cls._partitions[guild_id] = super(PollManager, cls).__new__(cls)
+            partition._initialize(guild_id)
+        return partition
     
-    def _initialize(self):
-        self.poll_file = 'poll.json'
+    def _initialize(self, guild_id=None):
+        self.guild_id = guild_id
+        if guild_id is not None:
+            self._lock = asyncio.Lock()
+        self.poll_file = partition_path(guild_id, 'poll.json')
         self.poll_data = {}
+        self._option_index = []
+        self.persistence = PersistenceWorker(f"polls:{guild_id}" if guild_id is not None else "polls", self._save_poll_sync)
         self._load_poll()
         
     def _load_poll(self):
@@ -26,21 +47,33 @@ class PollManager:
         except Exception as e:
             print(f"Error loading poll: {e}")
             self.poll_data = {}
+        self._index_options()
+    
+    def _index_options(self):
+        """Rebuild the sorted (word suffix, option) index that autocomplete searches by prefix"""
+        index = []
+        if self.poll_data.get("active", False):
+            for option in self.poll_data["options"]:
+                words = option.casefold().split()
+                # Typing any word of an option finds it, not only its first word
+                for i in range(len(words)):
+                    index.append((" ".join(words[i:]), option))
+        index.sort()
+        # Replaced in one assignment so autocomplete never sees a half-built index
+        self._option_index = index
     
     async def _save_poll(self):
-        """Save poll data to file"""
+        """Queue a save of the poll data"""
         try:
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self._save_poll_sync)
-            return True
+            return await self.persistence.save(json.dumps(self.poll_data))
         except Exception as e:
             print(f"Error saving poll: {e}")
             return False
     
-    def _save_poll_sync(self):
-        """Synchronous helper for _save_poll"""
+    def _save_poll_sync(self, data):
+        """Write poll data queued by _save_poll; runs on the writer thread"""
         with open(self.poll_file, 'w') as f:
-            json.dump(self.poll_data, f)
+            f.write(data)
     
     async def has_active_poll(self):
         """Check if there is an active poll"""
@@ -52,8 +85,8 @@ class PollManager:
         async with self._lock:
             return self.poll_data.get("closed", True)
     
-    async def create_poll(self, question, option1, option2):
-        """Create a new poll"""
+    async def create_poll(self, question, option1, option2, closes_at=None):
+        """Create a new poll, optionally closing for bets at a unix timestamp"""
         async with self._lock:
             if self.poll_data.get("active", False):
                 return False, "There is already an active poll!"
@@ -63,8 +96,10 @@ class PollManager:
                 "closed": False,
                 "question": question,
                 "options": {option1: {}, option2: {}},
-                "total_bets": 0
+                "total_bets": 0,
+                "closes_at": closes_at
             }
+            self._index_options()
             
             await self._save_poll()
             return True, None
@@ -82,6 +117,21 @@ class PollManager:
             await self._save_poll()
             return True, None
     
+    async def close_expired_poll(self, now=None):
+        """Close the active poll if its deadline has passed"""
+        async with self._lock:
+            closes_at = self.poll_data.get("closes_at")
+            if not self.poll_data.get("active", False) or self.poll_data.get("closed", True):
+                return False, "There is no open poll to close!"
+            
+            # A poll created after the deadline was scheduled has its own deadline
+            if closes_at is None or closes_at > (now if now is not None else time.time()):
+                return False, "The poll is not due to close yet!"
+            
+            self.poll_data["closed"] = True
+            await self._save_poll()
+            return True, None
+    
     async def end_poll(self, winning_option):
         """End a poll and return user payouts"""
         async with self._lock:
@@ -102,6 +152,7 @@ class PollManager:
                     payouts[user_id] = int(win_share)
             
             self.poll_data["active"] = False
+            self._index_options()
             await self._save_poll()
             
             return True, winning_option, payouts
@@ -114,7 +165,8 @@ class PollManager:
             if not self.poll_data.get("active", False):
                 return False, "There is no active poll!"
             
-            if self.poll_data.get("closed", True):
+            closes_at = self.poll_data.get("closes_at")
+            if self.poll_data.get("closed", True) or (closes_at is not None and closes_at <= time.time()):
                 return False, "The poll is closed!"
             
             if option not in self.poll_data["options"]:
@@ -140,4 +192,33 @@ class PollManager:
     async def get_poll_data(self):
         """Get current poll data"""
         async with self._lock:
-            return self.poll_data.copy()
\ No newline at end of file
+            return self.poll_data.copy()
+    
+    async def complete_options(self, current, betting=False, limit=25):
+        """Options of the active poll matching what the user typed so far, without taking the lock"""
+        if betting:
+            closes_at = self.poll_data.get("closes_at")
+            if self.poll_data.get("closed", True) or (closes_at is not None and closes_at <= time.time()):
+                return []
+        index = self._option_index
+        prefix = " ".join(current.casefold().split())
+        matches = []
+        for i in range(bisect.bisect_left(index, (prefix,)), len(index)):
+            key, option = index[i]
+            if not key.startswith(prefix) or len(matches) == limit:
+                break
+            if option not in matches:
+                matches.append(option)
+        return matches
+
+
+async def buy_bet(chip_manager, poll_manager, user_id, option, amount):
+    """Pay for a poll bet and place it, refunding the chips if the poll refuses it; returns (success, error)"""
+    # Checking and debiting in one call means concurrent bets cannot spend the same chips twice
+    if not await chip_manager.remove_chips(user_id, amount, reason=ledger.POLL_BET):
+        return False, "You don't have enough chips!"
+    
+    success, error = await poll_manager.place_bet(user_id, option, amount)
+    if not success:
+        await chip_manager.add_chips(user_id, amount, reason=ledger.POLL_REFUND)
+    return success, error
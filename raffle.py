@@ -0,0 +1,218 @@
+import json
+import os
+import time
+import asyncio
+
+from partitions import partition_key, partition_path
+
+# Each draw of the "raffle" game in rng.py supplies one winner
+MAX_WINNERS = 10
+
+
+class TicketTree:
+    """Fenwick tree over the ticket counts of all participants.
+
+    Buying tickets and drawing a ticket both take O(log n) for n
+    participants, however many tickets were sold.
+    """
+
+    def __init__(self, counts=()):
+        self.counts = []
+        self._tree = [0]
+        for count in counts:
+            self.append(count)
+
+    def append(self, count=0):
+        """Add a participant; returns their slot"""
+        slot = len(self.counts)
+        self.counts.append(count)
+        # Node i covers the slots (i - lowbit(i), i]; sum the children it absorbs
+        i = slot + 1
+        total = count
+        child = 1
+        while child < i & -i:
+            total += self._tree[i - child]
+            child <<= 1
+        self._tree.append(total)
+        return slot
+
+    def add(self, slot, count):
+        self.counts[slot] += count
+        i = slot + 1
+        while i < len(self._tree):
+            self._tree[i] += count
+            i += i & -i
+
+    @property
+    def total(self):
+        total = 0
+        i = len(self.counts)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, ticket):
+        """Slot of the participant holding the ticket with this index (0 <= ticket < total)"""
+        slot = 0
+        step = 1 << (len(self.counts).bit_length())
+        while step:
+            if slot + step < len(self._tree) and self._tree[slot + step] <= ticket:
+                slot += step
+                ticket -= self._tree[slot]
+            step >>= 1
+        return slot
+
+    def draw(self, draws):
+        """Draw distinct slots, each weighted by its tickets, using one random integer per winner"""
+        winners = []
+        for draw in draws:
+            total = self.total
+            if total == 0:
+                break
+            slot = self.find(draw % total)
+            winners.append(slot)
+            # A winner's tickets leave the drum so nobody wins twice
+            self.add(slot, -self.counts[slot])
+        return winners
+
+
+class RaffleManager:
+    _instance = None
+    _partitions = {}
+    _lock = asyncio.Lock()
+
+    def __new__(cls, guild_id=None):
+        guild_id = partition_key(guild_id)
+        if guild_id is None:
+            if cls._instance is None:
+                cls._instance = super(RaffleManager, cls).__new__(cls)
+                cls._instance._initialize()
+            return cls._instance
+
+        # Every guild runs its own raffle with its own lock and file
+        partition = cls._partitions.get(guild_id)
+        if partition is None:
+            partition = cls._partitions[guild_id] = super(RaffleManager, cls).__new__(cls)
+            partition._initialize(guild_id)
+        return partition
+
+    def _initialize(self, guild_id=None):
+        self.guild_id = guild_id
+        if guild_id is not None:
+            self._lock = asyncio.Lock()
+        self.raffle_file = partition_path(guild_id, 'raffle.json')
+        self.raffle_data = {}
+        self._load_raffle()
+
+    def _load_raffle(self):
+        """Load the raffle from file and rebuild the ticket tree"""
+        try:
+            if os.path.exists(self.raffle_file):
+                with open(self.raffle_file, 'r') as f:
+                    self.raffle_data = json.load(f)
+        except Exception as e:
+            print(f"Error loading raffle: {e}")
+            self.raffle_data = {}
+        tickets = self.raffle_data.get("tickets", {})
+        self._slots = {user_id: slot for slot, user_id in enumerate(tickets)}
+        self._tree = TicketTree(tickets.values())
+
+    async def _save_raffle(self):
+        """Save the raffle to file"""
+        try:
+            data = json.dumps(self.raffle_data)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._save_raffle_sync, data)
+            return True
+        except Exception as e:
+            print(f"Error saving raffle: {e}")
+            return False
+
+    def _save_raffle_sync(self, data):
+        """Synchronous helper for _save_raffle"""
+        with open(self.raffle_file, 'w') as f:
+            f.write(data)
+
+    async def start_raffle(self, price, winners, closes_at=None):
+        """Open a new raffle with a ticket price and number of winners"""
+        async with self._lock:
+            if self.raffle_data.get("active", False):
+                return False, "There is already an active raffle!"
+
+            self.raffle_data = {
+                "active": True,
+                "price": price,
+                "winners": winners,
+                "closes_at": closes_at,
+                "tickets": {},
+            }
+            self._slots = {}
+            self._tree = TicketTree()
+            await self._save_raffle()
+            return True, None
+
+    async def check_purchase(self, count):
+        """Cost of buying tickets in the open raffle; returns (cost, error)"""
+        async with self._lock:
+            if not self.raffle_data.get("active", False):
+                return None, "There is no active raffle!"
+            closes_at = self.raffle_data.get("closes_at")
+            if closes_at is not None and closes_at <= time.time():
+                return None, "The raffle is closed!"
+            return count * self.raffle_data["price"], None
+
+    async def add_tickets(self, user_id, count, cost):
+        """Record tickets that were already paid for; fails if the raffle changed meanwhile"""
+        async with self._lock:
+            user_id = str(user_id)
+            closes_at = self.raffle_data.get("closes_at")
+            if (not self.raffle_data.get("active", False) or count * self.raffle_data["price"] != cost
+                    or (closes_at is not None and closes_at <= time.time())):
+                return False, "The raffle closed before your tickets were added!"
+
+            slot = self._slots.get(user_id)
+            if slot is None:
+                slot = self._slots[user_id] = self._tree.append()
+            self._tree.add(slot, count)
+            self.raffle_data["tickets"][user_id] = self._tree.counts[slot]
+            await self._save_raffle()
+            return True, None
+
+    async def draw_raffle(self, draws, now=None):
+        """End the raffle and draw its winners; returns (success, error or pot, prizes)"""
+        async with self._lock:
+            if not self.raffle_data.get("active", False):
+                return False, "There is no active raffle!", {}
+            
+            # Scheduled draws pass now; a raffle started after the draw was scheduled has its own deadline
+            closes_at = self.raffle_data.get("closes_at")
+            if now is not None and (closes_at is None or closes_at > now):
+                return False, "The raffle is not due to be drawn yet!", {}
+
+            pot = self._tree.total * self.raffle_data["price"]
+            user_ids = list(self.raffle_data["tickets"])
+            winners = [user_ids[slot] for slot in self._tree.draw(draws[:self.raffle_data["winners"]])]
+            prizes = {}
+            for place, user_id in enumerate(winners):
+                # The first winner also gets what does not split evenly
+                prizes[user_id] = pot // len(winners) + (pot % len(winners) if place == 0 else 0)
+
+            self.raffle_data["active"] = False
+            self.raffle_data["prizes"] = prizes
+            await self._save_raffle()
+            return True, pot, prizes
+
+    async def get_raffle(self, user_id=None):
+        """Price, deadline, tickets sold, participants and the user's own tickets"""
+        async with self._lock:
+            if not self.raffle_data.get("active", False):
+                return None
+            return {
+                "price": self.raffle_data["price"],
+                "winners": self.raffle_data["winners"],
+                "closes_at": self.raffle_data.get("closes_at"),
+                "tickets": self._tree.total,
+                "participants": sum(1 for count in self._tree.counts if count),
+                "own": self.raffle_data["tickets"].get(str(user_id), 0),
+            }
@@ -0,0 +1,94 @@
+import os
+import time
+from collections import OrderedDict
+
+from discord import app_commands
+
+# Default (burst, tokens refilled per second) for each rate limited command
+DEFAULT_RATES = {
+    "flip": (3, 1.0),
+    "roll": (3, 1.0),
+    "roulette": (3, 1.0),
+    "table_bet": (3, 1.0),
+    "slots": (3, 1.0),
+    "blackjack": (3, 1.0),
+    "pay": (5, 0.5),
+    "bet": (5, 0.5),
+    "raffle_buy": (5, 0.5),
+}
+
+
+def rates_from_env(defaults=DEFAULT_RATES):
+    """Read overrides like RATE_LIMIT_FLIP=5,2 (burst, refill per second)"""
+    rates = dict(defaults)
+    for command in defaults:
+        value = os.getenv(f"RATE_LIMIT_{command.upper()}")
+        if value:
+            burst, refill = value.split(",")
+            rates[command] = (int(burst), float(refill))
+    return rates
+
+
+class TokenBucketLimiter:
+    """Per-user, per-command token buckets.
+
+    Buckets are kept in least-recently-used order. A bucket that has been idle
+    long enough to refill completely behaves exactly like a missing one, so it
+    is dropped; this keeps memory proportional to recently active users.
+    """
+
+    def __init__(self, rates=None, max_buckets=100000):
+        self.rates = dict(rates if rates is not None else DEFAULT_RATES)
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # (command, user_id) -> [tokens, last refill]
+        self._idle_after = max((burst / refill for burst, refill in self.rates.values()), default=0)
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, command, user_id, now=None):
+        """Take a token; return 0 if allowed, else seconds until the next token"""
+        rate = self.rates.get(command)
+        if rate is None:
+            return 0
+        burst, refill = rate
+        if now is None:
+            now = time.monotonic()
+        key = (command, user_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            self._evict(now)
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * refill)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.allowed += 1
+            return 0
+        self.limited += 1
+        return (1 - bucket[0]) / refill
+
+    def _evict(self, now):
+        buckets = self._buckets
+        # The oldest buckets are at the front; stop at the first one still refilling
+        while buckets:
+            key, (_, last) = next(iter(buckets.items()))
+            if now - last < self._idle_after and len(buckets) <= self.max_buckets:
+                break
+            del buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def cooldown_check(limiter):
+    """App command check that raises CommandOnCooldown when the bucket is empty"""
+    def predicate(interaction):
+        command = interaction.command.name
+        retry_after = limiter.hit(command, interaction.user.id)
+        if retry_after:
+            burst, refill = limiter.rates[command]
+            raise app_commands.CommandOnCooldown(app_commands.Cooldown(burst, burst / refill), retry_after)
+        return True
+    return app_commands.check(predicate)
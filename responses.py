@@ -0,0 +1,185 @@
+import discord
+
+DEFAULT_LANGUAGE = "en"
+
+GREEN = discord.Colour(0x00ff00)
+RED = discord.Colour(0xff0000)
+
+HELP_COMMANDS = [
+    "/ping", "/uptime", "/leaderboard", "/chips", "/daily", "/hourly", "/pay", "/history", "/graph", "/profile",
+    "/game_leaderboard", "/broke", "/economy", "/fairness", "/flip", "/roll", "/roulette", "/roulette_table",
+    "/table_bet", "/slots", "/jackpot", "/blackjack", "/poll", "/bet", "/raffle", "/raffle_buy",
+]
+
+# Texts of every language, picked by the user's Discord locale; other locales get English
+TEXTS = {
+    "en": {
+        "separator": ",",
+        "help_title": "Help",
+        "help_description": "Here are the available commands:",
+        "help": [
+            "Replies with 'Pong!' and the latency of the bot",
+            "Shows the uptime of the bot",
+            "Shows the leaderboard of the users with the most chips",
+            "Check your chips",
+            "Claim your daily chips",
+            "Claim your hourly chips",
+            "Pay chips to another user",
+            "Show your chip transaction history",
+            "Show how your balance or the economy changed over time",
+            "Show your game statistics",
+            "Show the best players of a game",
+            "Show all users with 0 chips",
+            "Show the chip supply and how it is distributed",
+            "Show how to verify game results",
+            "Flip a coin with a bet",
+            "Roll a dice with a bet",
+            "Play a game of roulette",
+            "Open a roulette round that everyone in the channel can bet on",
+            "Bet on the open roulette round in this channel",
+            "Play a game of slots",
+            "Show the progressive slots jackpot",
+            "Play a hand of blackjack",
+            "Show the current prediction poll",
+            "Place a bet on a poll option",
+            "Show the current raffle",
+            "Buy tickets for the current raffle",
+        ],
+        "chips_title": "Chips",
+        "chips": "You have {chips} chips!",
+        "won": "Result: {result}! You won {chips} chips! (round {round})",
+        "lost": "Result: {result}! You lost {chips} chips! (round {round})",
+        "slots_won": "Result: {result}!\nYou won {chips} chips!",
+        "slots_lost": "Result: {result}!\nYou lost {chips} chips!",
+        "jackpot_won": "\n💎 **JACKPOT!** You won {chips} chips from the jackpot!",
+        "slots_footer": "Round {round} · Jackpot: {jackpot} chips",
+        "poll_title": "Prediction Poll",
+        "poll_option": "{bets} bets ({chips} chips)",
+        "poll_closes": "Betting closes",
+        "poll_footer": "Total bets: {chips} chips",
+    },
+    "de": {
+        "separator": ".",
+        "help_title": "Hilfe",
+        "help_description": "Das sind die verfügbaren Befehle:",
+        "help": [
+            "Antwortet mit 'Pong!' und der Latenz des Bots",
+            "Zeigt, wie lange der Bot schon läuft",
+            "Zeigt die Rangliste der Nutzer mit den meisten Chips",
+            "Zeigt deine Chips",
+            "Hol dir deine täglichen Chips",
+            "Hol dir deine stündlichen Chips",
+            "Zahle einem anderen Nutzer Chips",
+            "Zeigt deinen Chip-Verlauf",
+            "Zeigt, wie sich dein Guthaben oder die Wirtschaft entwickelt hat",
+            "Zeigt deine Spielstatistiken",
+            "Zeigt die besten Spieler eines Spiels",
+            "Zeigt alle Nutzer mit 0 Chips",
+            "Zeigt die Chip-Menge und ihre Verteilung",
+            "Zeigt, wie du Spielergebnisse überprüfen kannst",
+            "Wirf eine Münze mit Einsatz",
+            "Würfle mit Einsatz",
+            "Spiele eine Runde Roulette",
+            "Eröffnet eine Roulette-Runde, auf die alle im Kanal setzen können",
+            "Setze auf die offene Roulette-Runde in diesem Kanal",
+            "Spiele am Spielautomaten",
+            "Zeigt den progressiven Slots-Jackpot",
+            "Spiele eine Hand Blackjack",
+            "Zeigt die aktuelle Vorhersage-Umfrage",
+            "Setze auf eine Option der Umfrage",
+            "Zeigt die aktuelle Verlosung",
+            "Kaufe Lose für die aktuelle Verlosung",
+        ],
+        "chips_title": "Chips",
+        "chips": "Du hast {chips} Chips!",
+        "won": "Ergebnis: {result}! Du hast {chips} Chips gewonnen! (Runde {round})",
+        "lost": "Ergebnis: {result}! Du hast {chips} Chips verloren! (Runde {round})",
+        "slots_won": "Ergebnis: {result}!\nDu hast {chips} Chips gewonnen!",
+        "slots_lost": "Ergebnis: {result}!\nDu hast {chips} Chips verloren!",
+        "jackpot_won": "\n💎 **JACKPOT!** Du hast {chips} Chips aus dem Jackpot gewonnen!",
+        "slots_footer": "Runde {round} · Jackpot: {jackpot} Chips",
+        "poll_title": "Vorhersage-Umfrage",
+        "poll_option": "{bets} Wetten ({chips} Chips)",
+        "poll_closes": "Wetten schließen",
+        "poll_footer": "Gesamteinsatz: {chips} Chips",
+    },
+}
+
+_languages = {}
+
+
+def language(locale=None):
+    """The language of a Discord locale (like en-US or de) that has texts, English otherwise"""
+    code = _languages.get(locale)
+    if code is None:
+        code = str(locale).split("-")[0] if locale is not None else DEFAULT_LANGUAGE
+        code = _languages[locale] = code if code in TEXTS else DEFAULT_LANGUAGE
+    return code
+
+
+def format_chips(chips, locale=None):
+    """A chip amount with the thousands separator of the locale"""
+    if -1000 < chips < 1000:
+        return str(chips)
+    separator = TEXTS[language(locale)]["separator"]
+    return f"{chips:,}" if separator == "," else f"{chips:,}".replace(",", separator)
+
+
+def render(title, description, colour, fields=(), footer=None):
+    """An embed of a template's title, description, (name, value, inline) fields and footer"""
+    embed = discord.Embed(title=title, description=description, colour=colour)
+    for name, value, inline in fields:
+        embed.add_field(name=name, value=value, inline=inline)
+    if footer is not None:
+        embed.set_footer(text=footer)
+    return embed
+
+
+def _help_payload(texts):
+    embed = discord.Embed(title=texts["help_title"], description=texts["help_description"], colour=GREEN)
+    for name, description in zip(HELP_COMMANDS, texts["help"]):
+        embed.add_field(name=name, value=description, inline=False)
+    return embed.to_dict()
+
+
+HELP_PAYLOADS = {code: _help_payload(texts) for code, texts in TEXTS.items()}
+
+
+def help_embed(locale=None):
+    """The /help embed, loaded from the payload built once per language"""
+    payload = HELP_PAYLOADS[language(locale)]
+    # Embed.from_dict keeps the fields it is given, so every embed gets its own
+    return discord.Embed.from_dict(dict(payload, fields=[dict(field) for field in payload["fields"]]))
+
+
+def chips_embed(chips, locale=None):
+    """The /chips response"""
+    texts = TEXTS[language(locale)]
+    return render(texts["chips_title"], texts["chips"].format(chips=format_chips(chips, locale)), GREEN)
+
+
+def game_result(result, won, chips, round, locale=None):
+    """The result line of a flip, roll or roulette round"""
+    return TEXTS[language(locale)]["won" if won else "lost"].format(result=result, chips=format_chips(chips, locale), round=round)
+
+
+def slots_embed(symbols, won, chips, round, jackpot, jackpot_won=0, locale=None):
+    """The result of a slots spin"""
+    texts = TEXTS[language(locale)]
+    description = texts["slots_won" if won else "slots_lost"].format(result=" ".join(symbols), chips=format_chips(chips, locale))
+    if jackpot_won:
+        description += texts["jackpot_won"].format(chips=format_chips(jackpot_won, locale))
+    return render("Slots", description, GREEN if won else RED,
+                  footer=texts["slots_footer"].format(round=round, jackpot=format_chips(jackpot, locale)))
+
+
+def poll_embed(poll_data, locale=None):
+    """The /poll response for an active poll"""
+    texts = TEXTS[language(locale)]
+    fields = [(option, texts["poll_option"].format(bets=len(bets), chips=format_chips(sum(bets.values()), locale)), True)
+              for option, bets in poll_data["options"].items()]
+    closes_at = poll_data.get("closes_at")
+    if closes_at and not poll_data.get("closed", True):
+        fields.append((texts["poll_closes"], f"<t:{closes_at}:R>", False))
+    return render(texts["poll_title"], poll_data["question"], GREEN, fields,
+                  texts["poll_footer"].format(chips=format_chips(poll_data["total_bets"], locale)))
@@ -0,0 +1,262 @@
+import os
+import sys
+import hmac
+import json
+import hashlib
+import secrets
+import argparse
+from collections import deque, namedtuple
+
+from persistence import PersistenceWorker
+from raffle import MAX_WINNERS
+
+SLOT_SYMBOLS = ["🍒", "🍋", "🍊", "🍇", "🍉", "🍌", "🍓"]
+
+# Three of these win the progressive jackpot, about once in JACKPOT_ODDS spins
+JACKPOT_SYMBOL = "💎"
+JACKPOT_ODDS = 10000
+
+Round = namedtuple("Round", "game epoch nonce outcome stream", defaults=(None,))
+
+
+def round_id(round):
+    """Short reference shown to players, e.g. 3-1042, or s2-3-1042 in the process of shard 2"""
+    prefix = "" if round.stream is None else f"s{round.stream}-"
+    return f"{prefix}{round.epoch}-{round.nonce}"
+
+
+def parse_round_id(text):
+    """(stream, epoch, nonce) of a round id"""
+    parts = text.split("-")
+    stream = int(parts.pop(0)[1:]) if parts[0].startswith("s") else None
+    epoch, nonce = (int(part) for part in parts)
+    return stream, epoch, nonce
+
+
+def stream_file(seed_file, stream):
+    """Seed file of a stream, e.g. rng_seeds.s2.json for the process of shard 2"""
+    if stream is None:
+        return seed_file
+    root, extension = os.path.splitext(seed_file)
+    return f"{root}.s{stream}{extension}"
+
+
+def commitment(server_seed):
+    """Published hash of a server seed"""
+    return hashlib.sha256(server_seed).hexdigest()
+
+
+def _hmac_key(server_seed):
+    """HMAC-SHA256 keyed with the server seed, copied for every digest"""
+    return hmac.new(server_seed, digestmod=hashlib.sha256)
+
+
+def _digest(hmac_key, nonce, block):
+    """HMAC-SHA256(seed, "nonce:block"); copying the keyed HMAC skips the key setup"""
+    digest = hmac_key.copy()
+    digest.update(f"{nonce}:{block}".encode())
+    return digest.digest()
+
+
+class RoundRNG:
+    """randint/choice drawn from the HMAC-SHA256 stream of one round"""
+
+    def __init__(self, hmac_key, nonce, digest=None):
+        self._key = hmac_key
+        self._nonce = nonce
+        self._block = 0
+        self._buffer = digest or _digest(hmac_key, nonce, 0)
+        self._offset = 0
+
+    def _next_u32(self):
+        if self._offset == len(self._buffer):
+            self._block += 1
+            self._buffer = _digest(self._key, self._nonce, self._block)
+            self._offset = 0
+        value = int.from_bytes(self._buffer[self._offset:self._offset + 4], 'big')
+        self._offset += 4
+        return value
+
+    def randint(self, a, b):
+        span = b - a + 1
+        # Reject the top of the range so every value is equally likely
+        limit = (1 << 32) - (1 << 32) % span
+        while True:
+            value = self._next_u32()
+            if value < limit:
+                return a + value % span
+
+    def choice(self, seq):
+        return seq[self.randint(0, len(seq) - 1)]
+
+
+def slot_reels(r):
+    """Three symbols, as spun before the progressive jackpot"""
+    return [r.choice(SLOT_SYMBOLS) for _ in range(3)]
+
+
+def jackpot_slot_reels(r):
+    """Three symbols followed by the jackpot draw"""
+    reels = slot_reels(r)
+    if r.randint(1, JACKPOT_ODDS) == 1:
+        return [JACKPOT_SYMBOL] * 3
+    return reels
+
+
+def shuffled(r, size):
+    """Fisher-Yates shuffle of range(size)"""
+    items = list(range(size))
+    for i in range(size - 1, 0, -1):
+        j = r.randint(0, i)
+        items[i], items[j] = items[j], items[i]
+    return items
+
+
+# What each game draws from its round; replays use the same functions
+GAMES = {
+    "flip": lambda r: r.randint(0, 999),
+    "roll": lambda r: r.randint(1, 6),
+    "roulette": lambda r: r.randint(0, 36),
+    "slots": slot_reels,  # Rounds played before the progressive jackpot
+    "slots_v2": jackpot_slot_reels,
+    "blackjack": lambda r: shuffled(r, 52),
+    # One 64-bit draw per raffle winner
+    "raffle": lambda r: [r.randint(0, 0xFFFFFFFF) << 32 | r.randint(0, 0xFFFFFFFF) for _ in range(MAX_WINNERS)],
+}
+
+
+def replay(server_seed, nonce, game):
+    """Re-derive the outcome of a past round"""
+    return GAMES[game](RoundRNG(_hmac_key(server_seed), nonce))
+
+
+class RNGService:
+    """Provably fair outcomes for all games.
+
+    Every epoch has a secret server seed whose SHA-256 commitment is public.
+    Round ``n`` of an epoch draws from HMAC-SHA256(seed, "n:block"), so once
+    the seed is revealed by ``rotate`` anyone can replay each round and check
+    it against the commitment. First blocks are computed ``batch_size`` rounds
+    at a time; nonces are reserved in the seed file before a batch is used, so
+    a restart never hands out a round twice. The file is written by a writer
+    thread one batch ahead of use, so a refill only waits for the disk when
+    that write has not finished yet.
+
+    Every process of a sharded bot is its own ``stream`` with its own seed
+    file, so processes never share nonces or overwrite each other's seeds.
+    """
+
+    def __init__(self, seed_file='rng_seeds.json', batch_size=256, keep_revealed=50, stream=None):
+        self.stream = stream
+        self.seed_file = stream_file(seed_file, stream)
+        self.batch_size = batch_size
+        self.keep_revealed = keep_revealed
+        self._pool = deque()
+        self.rounds = 0
+        self._durable = None  # (epoch, next nonce) last written to the seed file
+        self.persistence = PersistenceWorker(f"rng:{self.seed_file}", self._write)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.seed_file, 'r') as f:
+                data = json.load(f)
+            self.epoch = data["epoch"]
+            self._set_seed(bytes.fromhex(data["seed"]))
+            self._next_nonce = data["next_nonce"]
+            self.revealed = data["revealed"]
+            self._durable = (self.epoch, self._next_nonce)
+        except FileNotFoundError:
+            self.epoch = 0
+            self._set_seed(secrets.token_bytes(32))
+            self._next_nonce = 0
+            self.revealed = []
+            self._write(self._snapshot(0))
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            # A lost seed cannot be recovered; refuse to start a new one silently
+            raise RuntimeError(f"Error loading RNG seed file {self.seed_file}: {e}")
+
+    def _set_seed(self, server_seed):
+        self._seed = server_seed
+        self._key = _hmac_key(server_seed)
+
+    def _snapshot(self, reserved):
+        return {
+            "epoch": self.epoch,
+            "seed": self._seed.hex(),
+            "next_nonce": reserved,
+            "revealed": self.revealed,
+        }
+
+    def _write(self, data):
+        temp_file = f"{self.seed_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_file, self.seed_file)
+        self._durable = (data["epoch"], data["next_nonce"])
+
+    def _save(self, reserved, wait=False):
+        """Reserve nonces below ``reserved`` in the seed file, waiting for the write if asked"""
+        self.persistence.submit(self._snapshot(reserved))
+        if wait and not self.persistence.drain(timeout=5):
+            raise RuntimeError(f"Error saving RNG seed file {self.seed_file}: {self.persistence.last_error}")
+
+    @property
+    def commitment(self):
+        return commitment(self._seed)
+
+    def _refill(self):
+        first = self._next_nonce
+        self._next_nonce += self.batch_size
+        # The file reserves the following batch too, so the next refill does not wait for it
+        durable = self._durable
+        self._save(self._next_nonce + self.batch_size,
+                   wait=durable is None or durable[0] != self.epoch or durable[1] < self._next_nonce)
+        key = self._key
+        self._pool.extend((nonce, _digest(key, nonce, 0)) for nonce in range(first, self._next_nonce))
+
+    def play(self, game):
+        """Draw the outcome of the next round of a game"""
+        if not self._pool:
+            self._refill()
+        nonce, digest = self._pool.popleft()
+        self.rounds += 1
+        return Round(game, self.epoch, nonce, GAMES[game](RoundRNG(self._key, nonce, digest)), self.stream)
+
+    def rotate(self):
+        """Reveal the current seed and commit to a new one"""
+        revealed = {
+            "epoch": self.epoch,
+            "seed": self._seed.hex(),
+            "commitment": self.commitment,
+            "rounds": self._next_nonce - len(self._pool),
+        }
+        self.revealed = (self.revealed + [revealed])[-self.keep_revealed:]
+        self.epoch += 1
+        self._set_seed(secrets.token_bytes(32))
+        self._next_nonce = 0
+        self._pool.clear()
+        # The old seed is only shown once the new one is on disk
+        self._save(0, wait=True)
+        return revealed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a past game round")
+    parser.add_argument("game", choices=sorted(GAMES))
+    parser.add_argument("round", help="Round id shown with the result, e.g. 3-1042 or s2-3-1042")
+    parser.add_argument("--seed", help="Revealed server seed (hex); read from the seed file if omitted")
+    parser.add_argument("--seed-file", default=os.getenv('RNG_SEED_FILE', 'rng_seeds.json'))
+    args = parser.parse_args()
+
+    stream, epoch, nonce = parse_round_id(args.round)
+    seed = args.seed
+    if seed is None:
+        with open(stream_file(args.seed_file, stream), 'r') as f:
+            revealed = {entry["epoch"]: entry["seed"] for entry in json.load(f)["revealed"]}
+        if epoch not in revealed:
+            sys.exit(f"The seed of epoch {epoch} has not been revealed yet")
+        seed = revealed[epoch]
+    seed = bytes.fromhex(seed)
+    print(f"Commitment: {commitment(seed)}")
+    print(f"Outcome: {replay(seed, nonce, args.game)}")
@@ -0,0 +1,87 @@
+import time
+
+RED_NUMBERS = frozenset([1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36])
+
+# Outside bets and the numbers they cover; a number bet covers only itself
+OUTSIDE_BETS = {
+    "red": RED_NUMBERS,
+    "black": frozenset(range(1, 37)) - RED_NUMBERS,
+    "odd": frozenset(range(1, 37, 2)),
+    "even": frozenset(range(2, 37, 2)),
+    "1-12": frozenset(range(1, 13)),
+    "13-24": frozenset(range(13, 25)),
+    "25-36": frozenset(range(25, 37)),
+}
+
+MAX_BETS_PER_PLAYER = 20
+
+
+def parse_bet(target):
+    """Normalize a bet like "17", "Red" or "13-24"; returns None if invalid"""
+    target = target.strip().lower()
+    if target in OUTSIDE_BETS:
+        return target
+    if target.isdigit() and 0 <= int(target) <= 36:
+        return str(int(target))
+    return None
+
+
+def covered(target):
+    return OUTSIDE_BETS.get(target) or frozenset([int(target)])
+
+
+def multiplier(target):
+    """Chips returned per chip staked on a winning bet, stake included"""
+    return 36 // len(covered(target))
+
+
+def color(number):
+    if number == 0:
+        return "green"
+    return "red" if number in RED_NUMBERS else "black"
+
+
+class RouletteTable:
+    """One open round of table roulette.
+
+    Bets only reserve chips in memory; nothing is stored until the round
+    closes, when one spin settles every player with a single ChipManager
+    update and one result message.
+    """
+
+    def __init__(self, channel_id, closes_at):
+        self.channel_id = channel_id
+        self.closes_at = closes_at
+        self.bets = {}  # user id -> [(target, amount)]
+        self.stakes = {}  # user id -> total staked this round
+        self.open = True
+        self.task = None
+
+    def seconds_left(self, now=None):
+        return max(0, self.closes_at - (now if now is not None else time.time()))
+
+    def place(self, user_id, target, amount):
+        """Add a bet; returns (success, error)"""
+        user_id = str(user_id)
+        if not self.open:
+            return False, "This round is closed!"
+        bets = self.bets.setdefault(user_id, [])
+        if len(bets) >= MAX_BETS_PER_PLAYER:
+            return False, f"You can place at most {MAX_BETS_PER_PLAYER} bets per round!"
+        bets.append((target, amount))
+        self.stakes[user_id] = self.stakes.get(user_id, 0) + amount
+        return True, None
+
+    def close(self):
+        self.open = False
+
+    def settle(self, number):
+        """Stake and payout of every player for the winning number"""
+        results = {}
+        for user_id, bets in self.bets.items():
+            payout = sum(amount * multiplier(target) for target, amount in bets if number in covered(target))
+            results[user_id] = (self.stakes[user_id], payout)
+        return results
+
+    def __len__(self):
+        return sum(len(bets) for bets in self.bets.values())
@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+# (low, high) of the five cron fields: minute hour day-of-month month day-of-week
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        span, _, step = part.partition("/")
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start, end = (int(value) for value in span.split("-"))
+        else:
+            start = end = int(span)
+            if step:
+                end = high
+        values.update(range(start, end + 1, int(step or 1)))
+    if not values or min(values) < low or max(values) > high:
+        raise ValueError(f"Cron field '{field}' is outside {low}-{high}")
+    return values
+
+
+class CronSchedule:
+    """Standard five-field cron expression evaluated in UTC, e.g. "0 0 * * *" """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs five fields")
+        # Sunday may be written as 0 or 7
+        fields[4] = ",".join("0" if part == "7" else part for part in fields[4].split(","))
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS))
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.isoweekday() % 7) in self.weekdays
+        # Like cron, a restricted day of month and day of week match either
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, timestamp):
+        """First matching minute strictly after timestamp"""
+        moment = datetime.fromtimestamp(timestamp, timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+class Scheduler:
+    """Persistent one-off and recurring jobs.
+
+    Jobs are kept in jobs.json and ordered in a heap by due time. A single
+    task sleeps until the earliest job is due (or a new, earlier job arrives),
+    so thousands of pending jobs cost no CPU while idle. Due jobs run as their
+    own tasks and never block the runner or the commands that scheduled them.
+    Jobs that came due while the bot was offline run once on startup.
+    """
+
+    def __init__(self, job_file='jobs.json'):
+        self.job_file = job_file
+        self.jobs = {}  # job id -> {"id", "handler", "run_at", "kwargs", "cron", "every"}
+        self._heap = []  # (run_at, job id); entries whose run_at no longer matches are stale
+        self._handlers = {}
+        self._crons = {}
+        self._wake = asyncio.Event()
+        self._task = None
+        self._save_pending = False
+        self._running = set()
+        self.runs = 0
+        self.failures = 0
+        self._load_jobs()
+
+    def _load_jobs(self):
+        """Load pending jobs from file"""
+        try:
+            if os.path.exists(self.job_file):
+                with open(self.job_file, 'r') as f:
+                    for job in json.load(f):
+                        self.jobs[job["id"]] = job
+                        self._heap.append((job["run_at"], job["id"]))
+                heapq.heapify(self._heap)
+        except Exception as e:
+            print(f"Error loading jobs: {e}")
+
+    def _save_jobs_sync(self):
+        """Write all pending jobs atomically"""
+        temp_file = f"{self.job_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(list(self.jobs.values()), f)
+        os.replace(temp_file, self.job_file)
+
+    async def _save_jobs(self):
+        # Changes made while waiting for this save are written along with it
+        await asyncio.sleep(0)
+        self._save_pending = False
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._save_jobs_sync)
+        except Exception as e:
+            print(f"Error saving jobs: {e}")
+
+    def _changed(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._save_jobs_sync()
+            return
+        if not self._save_pending:
+            self._save_pending = True
+            task = loop.create_task(self._save_jobs())
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def register(self, name, handler):
+        """Make an async handler available to jobs by name"""
+        self._handlers[name] = handler
+
+    def _cron(self, expression):
+        schedule = self._crons.get(expression)
+        if schedule is None:
+            schedule = self._crons[expression] = CronSchedule(expression)
+        return schedule
+
+    def _next_run(self, job, now):
+        if job["cron"]:
+            return self._cron(job["cron"]).next_after(now)
+        return now + job["every"]
+
+    def schedule(self, job_id, handler, run_at=None, cron=None, every=None, **kwargs):
+        """Add or replace a job; recurring jobs need cron or every (seconds)"""
+        if run_at is None and cron is None and every is None:
+            raise ValueError("A job needs run_at, cron or every")
+        existing = self.jobs.get(job_id)
+        job = {"id": job_id, "handler": handler, "run_at": run_at, "kwargs": kwargs, "cron": cron, "every": every}
+        if run_at is None:
+            if (existing is not None and existing["handler"] == handler and existing["cron"] == cron
+                    and existing["every"] == every):
+                # Re-registering an unchanged recurring job keeps its due time, and so any missed run
+                job["run_at"] = existing["run_at"]
+            else:
+                job["run_at"] = self._next_run(job, time.time())
+        if existing == job:
+            return job
+        self.jobs[job_id] = job
+        heapq.heappush(self._heap, (job["run_at"], job_id))
+        if self._heap[0][1] == job_id:
+            self._wake.set()
+        self._changed()
+        return job
+
+    def cancel(self, job_id):
+        """Remove a pending job; its heap entry is skipped when reached"""
+        if self.jobs.pop(job_id, None) is None:
+            return False
+        self._changed()
+        return True
+
+    def _pop_stale(self):
+        heap = self._heap
+        while heap:
+            run_at, job_id = heap[0]
+            job = self.jobs.get(job_id)
+            if job is not None and job["run_at"] == run_at:
+                return
+            heapq.heappop(heap)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def run(self):
+        while True:
+            self._pop_stale()
+            self._wake.clear()
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.run_due()
+
+    def run_due(self, now=None):
+        """Start every job that is due; returns how many were started"""
+        if now is None:
+            now = time.time()
+        started = 0
+        while True:
+            self._pop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, job_id = heapq.heappop(self._heap)
+            job = self.jobs[job_id]
+            if job["cron"] or job["every"]:
+                job["run_at"] = self._next_run(job, now)
+                heapq.heappush(self._heap, (job["run_at"], job_id))
+            else:
+                del self.jobs[job_id]
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            started += 1
+        if started:
+            self._changed()
+        return started
+
+    async def _execute(self, job):
+        handler = self._handlers.get(job["handler"])
+        try:
+            if handler is None:
+                raise KeyError(f"No handler registered for {job['handler']}")
+            await handler(**job["kwargs"])
+            self.runs += 1
+        except Exception as e:
+            self.failures += 1
+            print(f"Error in scheduled job {job['id']}: {e}")
+
+    def stats(self):
+        return {
+            "pending": len(self.jobs),
+            "heap": len(self._heap),
+            "runs": self.runs,
+            "failures": self.failures,
+        }
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import asyncio
+from collections import OrderedDict
+
+
+class SessionStore:
+    """In-flight game sessions keyed by user.
+
+    Sessions are kept in order of last activity, so expired sessions are
+    always at the front and eviction only touches the sessions it removes.
+    At most ``max_sessions`` are kept; the least recently active one makes
+    room for a new one. Evicted and expired sessions are handed to
+    ``on_evict`` so their stakes can be settled. All sessions are written to
+    a JSON file at most every ``save_delay`` seconds, so hands survive a
+    restart.
+    """
+
+    def __init__(self, session_file='sessions.json', ttl=600, max_sessions=10000, on_evict=None, save_delay=1.0):
+        self.session_file = session_file
+        self.save_delay = save_delay
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.on_evict = on_evict
+        self._sessions = OrderedDict()  # key -> [session, expires at]
+        self._save_pending = False
+        self._tasks = set()
+        self._maintenance = None
+        self.evictions = 0
+        self._load_sessions()
+
+    def _load_sessions(self):
+        """Load sessions from file, oldest activity first"""
+        try:
+            if os.path.exists(self.session_file):
+                with open(self.session_file, 'r') as f:
+                    for key, session, expires in json.load(f):
+                        self._sessions[key] = [session, expires]
+        except Exception as e:
+            print(f"Error loading sessions: {e}")
+            self._sessions = OrderedDict()
+
+    def _save_sessions_sync(self, data):
+        temp_file = f"{self.session_file}.tmp"
+        with open(temp_file, 'w') as f:
+            f.write(data)
+        os.replace(temp_file, self.session_file)
+
+    async def _save_sessions(self):
+        # Changes made while waiting for this save are written along with it
+        await asyncio.sleep(self.save_delay)
+        self._save_pending = False
+        try:
+            data = json.dumps([[key, session, expires] for key, (session, expires) in self._sessions.items()])
+            await asyncio.get_running_loop().run_in_executor(None, self._save_sessions_sync, data)
+        except Exception as e:
+            print(f"Error saving sessions: {e}")
+
+    def _spawn(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def changed(self):
+        """Schedule a save; call after mutating a session in place"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._save_sessions_sync(json.dumps([[k, s, e] for k, (s, e) in self._sessions.items()]))
+            return
+        if not self._save_pending:
+            self._save_pending = True
+            self._spawn(self._save_sessions())
+
+    def get(self, key, now=None):
+        """The live session of a key, renewing its TTL; None if missing or expired"""
+        entry = self._sessions.get(key)
+        if entry is None:
+            return None
+        now = now if now is not None else time.time()
+        if entry[1] <= now:
+            return None
+        entry[1] = now + self.ttl
+        self._sessions.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, session, now=None):
+        now = now if now is not None else time.time()
+        replaced = self._sessions.pop(key, None)
+        if replaced is not None:
+            # An expired session that maintenance has not reached yet still needs settling
+            self._evict(key, replaced)
+        self._sessions[key] = [session, now + self.ttl]
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._evict(*self._sessions.popitem(last=False))
+        self.changed()
+
+    def pop(self, key):
+        entry = self._sessions.pop(key, None)
+        if entry is None:
+            return None
+        self.changed()
+        return entry[0]
+
+    def _evict(self, key, entry):
+        self.evictions += 1
+        if self.on_evict is not None:
+            self._spawn(self.on_evict(key, entry[0]))
+
+    def evict_expired(self, now=None):
+        """Remove every expired session; returns how many were removed"""
+        now = now if now is not None else time.time()
+        expired = 0
+        while self._sessions:
+            key, entry = next(iter(self._sessions.items()))
+            if entry[1] > now:
+                break
+            del self._sessions[key]
+            self._evict(key, entry)
+            expired += 1
+        if expired:
+            self.changed()
+        return expired
+
+    def start(self, interval=30):
+        if self._maintenance is None:
+            self._maintenance = asyncio.create_task(self.run_maintenance(interval))
+        return self._maintenance
+
+    async def run_maintenance(self, interval=30):
+        """Expire idle sessions periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.evict_expired()
+            except Exception as e:
+                print(f"Error in session maintenance: {e}")
+
+    def __contains__(self, key):
+        return key in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,267 @@
+import os
+import json
+import struct
+import asyncio
+import itertools
+
+from dotenv import load_dotenv
+
+from chip_manager import ChipManager
+from events import EventBus
+from ledger import LedgerEntry
+from partitions import partition_key
+from poll_manager import PollManager
+from raffle import RaffleManager
+
+load_dotenv()
+
+
+class _Connection:
+    """Length-prefixed JSON stream that batches writes per event loop tick"""
+
+    # Size of a message, in front of its JSON
+    HEADER = struct.Struct('>I')
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._out = bytearray()
+
+    def send(self, message):
+        data = json.dumps(message).encode()
+        if not self._out:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._out += self.HEADER.pack(len(data)) + data
+
+    def _flush(self):
+        if self._out and not self.writer.is_closing():
+            self.writer.write(bytes(self._out))
+        self._out.clear()
+
+    async def receive(self):
+        try:
+            header = await self.reader.readexactly(self.HEADER.size)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise ConnectionError("State service connection closed mid-message")
+            return None
+        (size,) = self.HEADER.unpack(header)
+        return json.loads(await self.reader.readexactly(size))
+
+
+class StateService:
+    """Owns ChipManager, PollManager and RaffleManager on behalf of several shard processes.
+
+    Shards send requests ``[id, target, method, args, kwargs]`` over a Unix
+    socket. Requests are executed concurrently as they arrive, so a shard can
+    pipeline many calls, and all responses finished in the same loop tick go
+    out in one write. Balance events are forwarded to one subscribed shard.
+    """
+
+    def __init__(self, socket_path='state.sock', chip_manager=None, poll_manager=None, raffle_manager=None):
+        self.socket_path = socket_path
+        self.chip_manager = chip_manager or ChipManager()
+        self.targets = {"chips": self.chip_manager, "polls": poll_manager or PollManager(),
+                        "raffles": raffle_manager or RaffleManager()}
+        self.partitions = {"chips": ChipManager, "polls": PollManager, "raffles": RaffleManager}
+        self._subscribers = []
+        self._tasks = set()
+        self.requests = 0
+
+    async def serve_forever(self):
+        self.chip_manager.start_background_tasks()
+        events = self.chip_manager.events.subscribe()
+        forwarder = asyncio.create_task(self._forward_events(events))
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, self.socket_path)
+        print(f"State service listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            forwarder.cancel()
+
+    async def _handle(self, reader, writer):
+        connection = _Connection(reader, writer)
+        try:
+            while True:
+                request = await connection.receive()
+                if request is None:
+                    break
+                task = asyncio.create_task(self._dispatch(connection, *request))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except (ConnectionError, ValueError) as e:
+            print(f"State service connection error: {e}")
+        finally:
+            if connection in self._subscribers:
+                self._subscribers.remove(connection)
+            writer.close()
+
+    async def _dispatch(self, connection, request_id, target, method, args, kwargs):
+        self.requests += 1
+        try:
+            if target == "service" and method == "subscribe_events":
+                if connection not in self._subscribers:
+                    self._subscribers.append(connection)
+                result = True
+            else:
+                if method.startswith("_"):
+                    raise AttributeError(f"{method} is not a public method")
+                result = await getattr(self._resolve(target), method)(*args, **kwargs)
+            connection.send([request_id, True, result])
+        except Exception as e:
+            connection.send([request_id, False, f"{type(e).__name__}: {e}"])
+
+    def _resolve(self, target):
+        """Map a kind like "chips", or "chips:<guild id>", to the manager of that economy"""
+        kind, _, guild_id = target.partition(":")
+        if not guild_id:
+            return self.targets[kind]
+        return self.partitions[kind](guild_id)
+    
+    async def _forward_events(self, queue):
+        while True:
+            event = await queue.get()
+            # Only one shard delivers notifications; the next one takes over if it leaves
+            for connection in self._subscribers:
+                if not connection.writer.is_closing():
+                    connection.send([None, "event", list(event)])
+                    break
+
+
+class StateClient:
+    """Shard-side connection to the state service with request pipelining"""
+
+    def __init__(self, socket_path='state.sock'):
+        self.socket_path = socket_path
+        self._connection = None
+        self._connect_lock = asyncio.Lock()
+        self._pending = {}
+        self._ids = itertools.count()
+        self._reader_task = None
+        self._subscribed = False
+        self._managers = {}
+        self.events = EventBus()
+
+    async def connect(self):
+        async with self._connect_lock:
+            if self._connection is None:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+                self._connection = _Connection(reader, writer)
+                self._reader_task = asyncio.create_task(self._read_responses(self._connection))
+                if self._subscribed:
+                    # Resubscribe after a reconnect; the reply needs no waiting for
+                    self._connection.send([next(self._ids), "service", "subscribe_events", [], {}])
+        return self
+
+    async def close(self):
+        if self._connection is not None:
+            self._connection.writer.close()
+            self._reader_task.cancel()
+            self._connection = None
+
+    def chip_manager(self, guild_id=None):
+        """Remote ChipManager of a guild's economy"""
+        return self._manager(RemoteChipManager, "chips", guild_id)
+    
+    def poll_manager(self, guild_id=None):
+        """Remote PollManager of a guild's economy"""
+        return self._manager(RemoteManager, "polls", guild_id)
+    
+    def raffle_manager(self, guild_id=None):
+        """Remote RaffleManager of a guild's economy"""
+        return self._manager(RemoteManager, "raffles", guild_id)
+    
+    def _manager(self, cls, kind, guild_id):
+        # Guilds sharing an economy share one proxy
+        guild_id = partition_key(guild_id)
+        key = (kind, guild_id)
+        manager = self._managers.get(key)
+        if manager is None:
+            target = kind if guild_id is None else f"{kind}:{guild_id}"
+            manager = self._managers[key] = cls(self, target)
+        return manager
+    
+    async def subscribe_events(self):
+        """Republish balance events from the service on the local events bus"""
+        self._subscribed = True
+        return await self.call("service", "subscribe_events")
+
+    async def call(self, target, method, *args, **kwargs):
+        if self._connection is None:
+            await self.connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            # Requests made in the same loop tick are sent in one write
+            self._connection.send([request_id, target, method, args, kwargs])
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _read_responses(self, connection):
+        try:
+            while True:
+                response = await connection.receive()
+                if response is None:
+                    break
+                request_id, ok, result = response
+                if request_id is None:
+                    self.events.publish(*result)
+                    continue
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(result))
+        except (ConnectionError, ValueError) as e:
+            print(f"State service connection error: {e}")
+        finally:
+            connection.writer.close()
+            # A reconnect may already have replaced this connection
+            if self._connection is connection:
+                self._connection = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("State service connection lost"))
+            self._pending.clear()
+
+
+class RemoteManager:
+    """Forwards awaited method calls of a manager to the state service"""
+
+    def __init__(self, client, target):
+        self._client = client
+        self._target = target
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self._client.call(self._target, name, *args, **kwargs)
+        return call
+
+
+class RemoteChipManager(RemoteManager):
+    """ChipManager stand-in for shard processes"""
+
+    def __init__(self, client, target="chips"):
+        super().__init__(client, target)
+        self.events = client.events
+
+    def start_background_tasks(self):
+        """Maintenance runs in the state service"""
+
+    async def get_history(self, user_id, page=0, per_page=10):
+        entries, total = await self._client.call(self._target, "get_history", user_id, page, per_page)
+        return [LedgerEntry(*entry) for entry in entries], total
+
+
+if __name__ == '__main__':
+    asyncio.run(StateService(os.getenv('STATE_SOCKET', 'state.sock')).serve_forever())
@@ -9,6 +9,29 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from tests.test_chip_manager import TestChipManager
 from tests.test_poll_manager import TestPollManager
 from tests.test_game_mechanics import TestGameMechanics
+from tests.test_ledger import TestLedger
+from tests.test_tiered_store import TestTieredStore
+from tests.test_events import TestEvents
+from tests.test_rate_limiter import TestRateLimiter
+from tests.test_state_service import TestStateService
+from tests.test_partitions import TestPartitions
+from tests.test_leaderboard import TestLeaderboard
+from tests.test_economy_stats import TestEconomyStats
+from tests.test_rng import TestRNG
+from tests.test_scheduler import TestScheduler
+from tests.test_claims import TestClaims
+from tests.test_roulette import TestRoulette
+from tests.test_blackjack import TestBlackjack
+from tests.test_sessions import TestSessions
+from tests.test_jackpot import TestJackpot
+from tests.test_raffle import TestRaffle
+from tests.test_game_stats import TestGameStats
+from tests.test_economy_io import TestEconomyIO
+from tests.test_stress import TestStress
+from tests.test_persistence import TestPersistenceWorker
+from tests.test_outbound import TestOutboundScheduler
+from tests.test_balance_history import TestBalanceHistory
+from tests.test_responses import TestResponses
 
 if __name__ == '__main__':
     # Create test suite
@@ -19,6 +42,29 @@ if __name__ == '__main__':
     test_suite.addTest(loader.loadTestsFromTestCase(TestChipManager))
     test_suite.addTest(loader.loadTestsFromTestCase(TestPollManager))
     test_suite.addTest(loader.loadTestsFromTestCase(TestGameMechanics))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestLedger))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestTieredStore))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestEvents))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestRateLimiter))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestStateService))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestPartitions))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestLeaderboard))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestEconomyStats))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestRNG))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestScheduler))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestClaims))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestRoulette))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestBlackjack))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestSessions))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestJackpot))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestRaffle))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestGameStats))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestEconomyIO))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestStress))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestPersistenceWorker))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestOutboundScheduler))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestBalanceHistory))
+    test_suite.addTest(loader.loadTestsFromTestCase(TestResponses))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
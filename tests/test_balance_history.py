@@ -0,0 +1,97 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from balance_history import BalanceHistory, ECONOMY
+
+DAY = 86400
+# A Monday at midnight UTC, so minutes, hours and days line up
+START = 1_700_438_400
+
+class TestBalanceHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history = BalanceHistory(os.path.join(self.tmp.name, 'balance_history.db'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rows(self, series, tier):
+        return self.history._reader.execute('SELECT bucket, balance FROM samples WHERE series = ? AND tier = ? ORDER BY bucket',
+                                            (series, tier)).fetchall()
+
+    def test_only_changed_series_are_sampled(self):
+        self.history.changed(1, 500)
+        self.history.changed(1, 700)
+        self.history.changed(2, 100)
+        self.assertEqual(self.history.sample(START), 2)
+        self.assertEqual(self.history.sample(START + 60), 0)
+        self.history.flush(START + 60)
+
+        # One row per tier with the newest balance
+        for tier in range(3):
+            self.assertEqual(self.rows(1, tier), [(START, 700)])
+        self.assertEqual(self.rows(3, 0), [])
+
+    def test_tiers_keep_the_closing_balance(self):
+        for minute in range(120):
+            self.history.changed(1, minute)
+            self.history.sample(START + minute * 60 + 5)
+        self.history.flush(START + 7200)
+
+        self.assertEqual(len(self.rows(1, 0)), 120)
+        self.assertEqual(self.rows(1, 1), [(START, 59), (START + 3600, 119)])
+        self.assertEqual(self.rows(1, 2), [(START, 119)])
+
+    def test_expired_buckets_are_pruned(self):
+        for day in range(40):
+            for hour in range(0, 24, 6):
+                self.history.changed(1, day * 100 + hour)
+                self.history.sample(START + day * DAY + hour * 3600)
+            self.history.flush(START + day * DAY + 23 * 3600)
+
+        now = START + 39 * DAY + 23 * 3600
+        self.assertTrue(all(bucket >= now - DAY for bucket, _ in self.rows(1, 0)))
+        self.assertTrue(all(bucket >= now - 30 * DAY for bucket, _ in self.rows(1, 1)))
+        # Daily samples are kept forever
+        self.assertEqual(len(self.rows(1, 2)), 40)
+        self.assertEqual(self.rows(1, 2)[0], (START, 18))
+
+    def test_month_query_reads_hourly_tier(self):
+        for minute in range(0, 31 * 24 * 60, 10):
+            self.history.changed(1, minute)
+            self.history.sample(START + minute * 60)
+            if minute % 1440 == 0:
+                self.history.flush(START + minute * 60)
+        now = START + 31 * DAY
+        self.history.flush(now)
+
+        points = self.history.query(1, now - 30 * DAY, points=300, now=now)
+        self.assertLessEqual(len(points), 300)
+        self.assertGreater(len(points), 200)
+        # Points are in order, evenly spaced, and end with the newest balance
+        self.assertEqual(points, sorted(points))
+        self.assertEqual(points[-1][1], 31 * 24 * 60 - 10)
+        self.assertEqual(len({b - a for (a, _), (b, _) in zip(points, points[1:])}), 1)
+
+        # The last day still has every minute sample
+        day = self.history.query(1, now - DAY + 60, points=2000, now=now)
+        self.assertEqual(len(day), 143)
+
+    def test_unflushed_samples_are_retried_after_a_failed_write(self):
+        self.history.changed(ECONOMY, 1000)
+        self.history.sample(START)
+        self.history._writer.close()
+        with self.assertRaises(Exception):
+            self.history.flush(START)
+
+        reopened = BalanceHistory(self.history.db_file)
+        reopened._pending = self.history._pending
+        reopened.flush(START)
+        self.assertEqual(reopened.query(ECONOMY, START - 60, now=START + 60), [(START, 1000)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import blackjack
+from rng import RNGService
+from sessions import SessionStore
+from views import BlackjackView
+
+# Cards by rank in spades: 0 is the ace, 9 the ten, 12 the king
+ACE, TWO, FIVE, SIX, SEVEN, NINE, TEN, KING = 0, 1, 4, 5, 6, 8, 9, 12
+
+def deal(*cards):
+    """Deal from a deck that starts with the given cards"""
+    deck = list(cards) + [card for card in range(52) if card not in cards]
+    return blackjack.new_hand(1, None, 100, deck, "0-0")
+
+def click(user_id=1):
+    """Interaction of a button click that records what the bot responded"""
+    response = SimpleNamespace(sent=[], edited=[])
+    response.send_message = AsyncMock(side_effect=lambda content, **kwargs: response.sent.append(content))
+    response.edit_message = AsyncMock(side_effect=lambda **kwargs: response.edited.append(kwargs))
+    return SimpleNamespace(user=SimpleNamespace(id=user_id), response=response)
+
+class TestBlackjack(unittest.TestCase):
+    def test_hand_value(self):
+        self.assertEqual(blackjack.hand_value([ACE, KING]), (21, True))
+        self.assertEqual(blackjack.hand_value([ACE, ACE, NINE]), (21, True))
+        self.assertEqual(blackjack.hand_value([ACE, NINE, KING]), (20, False))
+        self.assertEqual(blackjack.card_name(KING + 13), "K♥")
+    
+    def test_natural_blackjack_settles_immediately(self):
+        # Player gets ace and king, dealer nine and seven
+        session = deal(ACE, NINE, KING, SEVEN)
+        self.assertTrue(session["finished"])
+        self.assertEqual(blackjack.result(session), ("blackjack", 250))
+        
+        session = deal(ACE, ACE + 13, KING, KING + 13)
+        self.assertEqual(blackjack.result(session), ("push", 100))
+    
+    def test_hit_and_bust(self):
+        session = deal(TEN, NINE, SIX, SEVEN, KING)
+        self.assertFalse(session["finished"])
+        blackjack.hit(session)
+        self.assertTrue(session["finished"])
+        self.assertEqual(blackjack.result(session), ("bust", 0))
+    
+    def test_stand_dealer_draws_to_17(self):
+        # Player 19, dealer 9 + 2 draws a five and a seven to 23
+        session = deal(TEN, NINE, NINE + 13, TWO, FIVE, SEVEN)
+        blackjack.stand(session)
+        self.assertEqual(len(session["dealer"]), 4)
+        self.assertEqual(blackjack.result(session), ("win", 200))
+    
+    def test_double(self):
+        # Player 5 + 6 doubles into a king for 21 against dealer 17
+        session = deal(FIVE, TEN, SIX, SEVEN, KING)
+        self.assertTrue(blackjack.can_double(session))
+        blackjack.double(session)
+        self.assertTrue(session["finished"])
+        self.assertEqual(blackjack.stake(session), 200)
+        self.assertEqual(blackjack.result(session), ("win", 400))
+        self.assertFalse(blackjack.can_double(session))
+    
+    def test_dealer_wins_and_push(self):
+        session = deal(TEN, TEN + 13, SEVEN, NINE)
+        blackjack.stand(session)
+        self.assertEqual(blackjack.result(session), ("lose", 0))
+        
+        session = deal(TEN, TEN + 13, NINE, NINE + 13)
+        blackjack.stand(session)
+        self.assertEqual(blackjack.result(session), ("push", 100))
+    
+    def test_view_plays_one_move_at_a_time(self):
+        session_file = 'test_blackjack_sessions.json'
+        
+        async def run():
+            sessions = SessionStore(session_file, save_delay=0)
+            sessions.put("1", deal(FIVE, TEN, SIX, SEVEN, KING))
+            released = asyncio.Event()
+            
+            async def settle_round(*args, **kwargs):
+                await released.wait()
+                return True
+            chip_manager = SimpleNamespace(settle_round=AsyncMock(side_effect=settle_round))
+            view = BlackjackView(1, chip_manager, sessions)
+            
+            # A stand while the double is being settled is refused instead of settling the hand again
+            double = asyncio.create_task(view._act(click(), "double"))
+            await asyncio.sleep(0)
+            stand = click()
+            await view._act(stand, "stand")
+            self.assertEqual(stand.response.sent, ["Your last move is still being played!"])
+            released.set()
+            await double
+            
+            chip_manager.settle_round.assert_awaited_once_with(1, 400, "blackjack", 200, debit=100)
+            self.assertNotIn("1", sessions)
+            await asyncio.sleep(0.05)
+        
+        try:
+            asyncio.run(run())
+        finally:
+            for path in (session_file, f"{session_file}.tmp"):
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    def test_refused_double_keeps_the_hand(self):
+        session_file = 'test_blackjack_sessions.json'
+        
+        async def run():
+            sessions = SessionStore(session_file, save_delay=0)
+            session = deal(FIVE, TEN, SIX, SEVEN, KING)
+            sessions.put("1", session)
+            chip_manager = SimpleNamespace(settle_round=AsyncMock(return_value=False))
+            view = BlackjackView(1, chip_manager, sessions)
+            
+            interaction = click()
+            await view._act(interaction, "double")
+            self.assertEqual(interaction.response.sent, ["You don't have enough chips to double!"])
+            self.assertEqual((len(session["player"]), session["doubled"], session["finished"]), (2, False, False))
+            self.assertIn("1", sessions)
+            await asyncio.sleep(0.05)
+        
+        try:
+            asyncio.run(run())
+        finally:
+            for path in (session_file, f"{session_file}.tmp"):
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    def test_seeded_deck(self):
+        seed_file = 'test_blackjack_seeds.json'
+        try:
+            deck = RNGService(seed_file).play("blackjack").outcome
+            self.assertEqual(sorted(deck), list(range(52)))
+        finally:
+            os.remove(seed_file)
+
+if __name__ == '__main__':
+    unittest.main()
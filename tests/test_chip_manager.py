@@ -4,16 +4,34 @@ import os
 import json
 import sys
 import shutil
+import time
 from unittest.mock import patch, MagicMock
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from chip_manager import ChipManager
+from ledger import Ledger
+from claims import ClaimStore
+from jackpot import JackpotPool, UNITS
+from game_stats import GameStats
+from economy_stats import EconomyStats
+from events import EventBus
+from persistence import PersistenceWorker
+from balance_history import BalanceHistory
+from leaderboard import LeaderboardCache
+import events
+import ledger
+import economy_io
 
 class TestChipManager(unittest.TestCase):
     def setUp(self):
         # Create a test file
         self.test_file = 'test_chips.json'
+        self.test_ledger_file = 'test_ledger.bin'
+        self.test_claim_file = 'test_claims.bin'
+        self.test_jackpot_file = 'test_jackpot.json'
+        self.test_stats_file = 'test_game_stats.bin'
+        self.test_history_file = 'test_balance_history.db'
         
         # Reset the singleton instance for clean tests
         ChipManager._instance = None
@@ -25,6 +43,17 @@ class TestChipManager(unittest.TestCase):
             self.chip_manager.users = {}
             self.chip_manager.default_chips = 1000
             self.chip_manager.chip_file = self.test_file
+            self.chip_manager.ledger = Ledger(self.test_ledger_file)
+            self.chip_manager.events = EventBus()
+            self.chip_manager.leaderboard = LeaderboardCache()
+            self.chip_manager.stats = EconomyStats()
+            self.chip_manager.claims = ClaimStore(self.test_claim_file)
+            self.chip_manager.jackpot = JackpotPool(self.test_jackpot_file, fold_interval=0)
+            self.chip_manager.game_stats = GameStats(self.test_stats_file)
+            self.chip_manager.history = BalanceHistory(self.test_history_file)
+            self.chip_manager.persistence = PersistenceWorker("chips", self.chip_manager._save_chips_sync)
+            self.chip_manager._progress = {}
+            self.chip_manager._unsaved = {}
         
         # Sample test data
         self.test_data = {
@@ -41,17 +70,42 @@ class TestChipManager(unittest.TestCase):
         self.chip_manager._load_chips()
     
     def tearDown(self):
+        # Finish queued writes before their files are removed
+        self.chip_manager.persistence.close()
+        
         # Remove test file
         if os.path.exists(self.test_file):
             os.remove(self.test_file)
+        if os.path.exists(self.test_ledger_file):
+            os.remove(self.test_ledger_file)
+        if os.path.exists(self.test_claim_file):
+            os.remove(self.test_claim_file)
+        if os.path.exists(self.test_jackpot_file):
+            os.remove(self.test_jackpot_file)
+        if os.path.exists(self.test_stats_file):
+            os.remove(self.test_stats_file)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_history_file + suffix):
+                os.remove(self.test_history_file + suffix)
     
     def test_get_chips(self):
         result = asyncio.run(self.chip_manager.get_chips('123456'))
         self.assertEqual(result, 1000)
         
-        # Test with non-existent user (should create with default)
-        result = asyncio.run(self.chip_manager.get_chips('999999'))
-        self.assertEqual(result, 1000)  # Default value
+        # Test with non-existent user (should return the default)
+        with patch.object(self.chip_manager, '_save_chips') as mock_save:
+            result = asyncio.run(self.chip_manager.get_chips('999999'))
+            self.assertEqual(result, 1000)  # Default value
+            # Reading does not store or save the default
+            self.assertNotIn('999999', self.chip_manager.users)
+            mock_save.assert_not_called()
+    
+    def test_get_chips_does_not_wait_for_lock(self):
+        async def read_while_locked():
+            async with ChipManager._lock:
+                return await asyncio.wait_for(self.chip_manager.get_chips('123456'), 1)
+        
+        self.assertEqual(asyncio.run(read_while_locked()), 1000)
     
     def test_set_chips(self):
         # Set chips for existing user
@@ -144,6 +198,277 @@ class TestChipManager(unittest.TestCase):
             self.assertEqual(count, 2)
             self.assertEqual(self.chip_manager.users['345678'], 1000)
             self.assertEqual(self.chip_manager.users['555555'], 1000)
+    
+    def test_settle_rounds(self):
+        results = {'123456': (300, 900), '789012': (500, 0), '345678': (100, 200), '999999': (50, 0)}
+        with patch.object(self.chip_manager, '_save_chips', wraps=self.chip_manager._save_chips) as save:
+            voided = asyncio.run(self.chip_manager.settle_rounds(results))
+            save.assert_called_once()
+        
+        # 345678 has no chips to cover the stake
+        self.assertEqual(voided, ['345678'])
+        self.assertEqual(self.chip_manager.users['123456'], 1600)
+        self.assertEqual(self.chip_manager.users['789012'], 0)
+        self.assertEqual(self.chip_manager.users['345678'], 0)
+        self.assertEqual(self.chip_manager.users['999999'], 950)
+        entries, total = asyncio.run(self.chip_manager.get_history('123456'))
+        self.assertEqual(total, 2)
+        self.assertEqual([e.reason for e in entries], [ledger.PAYOUT, ledger.STAKE])
+    
+    def test_settle_round_with_debit(self):
+        async def run():
+            # The extra stake and the payout are applied together, or not at all
+            self.assertFalse(await self.chip_manager.settle_round('789012', 2000, 'blackjack', 1000, debit=600))
+            return await self.chip_manager.settle_round('123456', 400, 'blackjack', 200, debit=100)
+        
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual(self.chip_manager.users['789012'], 500)
+        self.assertEqual(self.chip_manager.users['123456'], 1300)
+        entries, _ = asyncio.run(self.chip_manager.get_history('123456'))
+        self.assertEqual([(e.reason, e.delta) for e in entries], [(ledger.PAYOUT, 400), (ledger.STAKE, -100)])
+    
+    def test_import_is_staged_before_it_is_applied(self):
+        import_file = 'test_import.csv'
+        try:
+            with open(import_file, 'w') as f:
+                f.write('user_id,chips\n123456,5\n789012,6\n345678,7\n999999,x\n')
+            with self.assertRaises(ValueError):
+                asyncio.run(self.chip_manager.import_balances(import_file))
+            # A bad line leaves every balance as it was
+            self.assertEqual(self.chip_manager.users['123456'], 1000)
+            
+            with open(import_file, 'w') as f:
+                f.write('user_id,chips\n123456,5\n789012,6\n345678,7\n123456,8\n')
+            with patch.object(economy_io, 'CHUNK_SIZE', 1), \
+                 patch.object(self.chip_manager.ledger, 'flush', wraps=self.chip_manager.ledger.flush) as flush:
+                self.assertEqual(asyncio.run(self.chip_manager.import_balances(import_file)), 4)
+                # The ledger is written out while applying instead of collecting every row
+                self.assertGreaterEqual(flush.call_count, 3)
+            self.assertEqual([self.chip_manager.users[user_id] for user_id in ('123456', '789012', '345678')], [8, 6, 7])
+        finally:
+            if os.path.exists(import_file):
+                os.remove(import_file)
+    
+    def test_import_does_not_block_the_event_loop(self):
+        import_file = 'test_import.csv'
+        slow_flush = self.chip_manager.ledger.flush
+        
+        def flush():
+            time.sleep(0.01)
+            return slow_flush()
+        
+        async def run():
+            task = asyncio.create_task(self.chip_manager.import_balances(import_file))
+            seen = set()
+            ticks = 0
+            while not task.done():
+                seen.add(tuple([await self.chip_manager.get_chips(user_id) for user_id in ('123456', '789012', '345678')]))
+                ticks += 1
+                await asyncio.sleep(0.001)
+            await task
+            return seen, ticks
+        
+        try:
+            with open(import_file, 'w') as f:
+                f.write('user_id,chips\n123456,5\n789012,6\n345678,7\n')
+            with patch.object(economy_io, 'CHUNK_SIZE', 1), patch.object(self.chip_manager.ledger, 'flush', flush):
+                seen, ticks = asyncio.run(run())
+            # The loop kept running while the import was applied, and only ever saw all or none of it
+            self.assertGreater(ticks, 10)
+            self.assertLessEqual(seen, {(1000, 500, 0), (5, 6, 7)})
+            self.assertEqual(self.chip_manager.leaderboard.version, 3)
+        finally:
+            if os.path.exists(import_file):
+                os.remove(import_file)
+    
+    def test_game_stats_saved_with_balances(self):
+        async def run():
+            await self.chip_manager.settle_round('123456', 0, 'flip', 100)
+            await self.chip_manager.settle_rounds({'123456': (50, 100), '789012': (50, 0)}, 'roulette')
+            await self.chip_manager.settle_round('789012', 300, 'flip', 100)
+        
+        asyncio.run(run())
+        profile = asyncio.run(self.chip_manager.get_profile('123456'))
+        self.assertEqual(profile['flip']['streak'], -1)
+        self.assertEqual(profile['roulette']['won'], 100)
+        self.assertEqual(asyncio.run(self.chip_manager.get_game_leaderboard('flip', 'net')), [('789012', 200), ('123456', -100)])
+        
+        # Rounds are stored by the balance save that follows them
+        self.chip_manager.persistence.drain()
+        self.assertEqual(GameStats(self.test_stats_file).profile('789012')['flip']['biggest_win'], 200)
+    
+    def test_export_and_import_balances(self):
+        export_file = 'test_export.csv'
+        import_file = 'test_import.jsonl'
+        try:
+            count = asyncio.run(self.chip_manager.export_data('balances', export_file, 'csv'))
+            self.assertEqual(count, 3)
+            with open(export_file) as f:
+                self.assertEqual(f.read().split(), ['user_id,chips', '123456,1000', '789012,500', '345678,0'])
+            
+            with open(import_file, 'w') as f:
+                f.write('{"user_id": "345678", "chips": 250}\n{"user_id": "999999", "chips": 40}\n')
+            with patch.object(self.chip_manager, '_save_chips', wraps=self.chip_manager._save_chips) as save:
+                self.assertEqual(asyncio.run(self.chip_manager.import_balances(import_file)), 2)
+                save.assert_called_once()
+            self.assertEqual(self.chip_manager.users['345678'], 250)
+            self.assertEqual(self.chip_manager.users['999999'], 40)
+            entries, _ = asyncio.run(self.chip_manager.get_history('999999'))
+            self.assertEqual((entries[0].delta, entries[0].reason), (-960, ledger.ADMIN_SET))
+            
+            self.assertEqual(asyncio.run(self.chip_manager.export_data('ledger', export_file, 'csv')), 2)
+        finally:
+            for path in (export_file, import_file):
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    def test_grant_all(self):
+        count = asyncio.run(self.chip_manager.grant_all(100))
+        self.assertEqual(count, 3)
+        self.assertEqual(self.chip_manager.users, {'123456': 1100, '789012': 600, '345678': 100})
+        entries, _ = asyncio.run(self.chip_manager.get_history('345678'))
+        self.assertEqual(entries[0].reason, ledger.DAILY_REWARD)
+    
+    def test_claim_reward(self):
+        now = 1_700_000_000
+        success, amount, streak = asyncio.run(self.chip_manager.claim_reward('345678', 'daily', now))
+        self.assertEqual((success, amount, streak), (True, 200, 1))
+        self.assertEqual(self.chip_manager.users['345678'], 200)
+        
+        # Too early, then a streak when claimed again within two days
+        success, wait, _ = asyncio.run(self.chip_manager.claim_reward('345678', 'daily', now + 3600))
+        self.assertFalse(success)
+        self.assertEqual(wait, 82800)
+        success, amount, streak = asyncio.run(self.chip_manager.claim_reward('345678', 'daily', now + 90000))
+        self.assertEqual((amount, streak), (250, 2))
+        
+        # Hourly claims are tracked separately
+        self.assertTrue(asyncio.run(self.chip_manager.claim_reward('345678', 'hourly', now + 90000))[0])
+        
+        # Claim times are saved with the balances
+        self.chip_manager.persistence.drain()
+        self.assertEqual(len(ClaimStore(self.test_claim_file)), 1)
+        status = asyncio.run(self.chip_manager.get_claim_status('345678', now + 90000))
+        self.assertEqual(status['daily'], (86400, 2))
+        entries, _ = asyncio.run(self.chip_manager.get_history('345678'))
+        self.assertEqual(entries[0].reason, ledger.HOURLY_REWARD)
+    
+    def test_spin_jackpot(self):
+        for _ in range(10):
+            result = asyncio.run(self.chip_manager.spin_jackpot('123456', 1000))
+        self.assertEqual(result, (0, 0, 1100))
+
+        # The triple pays on the 99 chips left after the cut
+        result = asyncio.run(self.chip_manager.spin_jackpot('789012', 100, 15, hit=True))
+        self.assertEqual(result, (1485, 1101, 1000))
+        self.assertEqual(self.chip_manager.users['789012'], 500 + 1485 + 1101)
+        entries, _ = asyncio.run(self.chip_manager.get_history('789012'))
+        self.assertEqual(entries[0].reason, ledger.JACKPOT)
+
+        # The pool is saved with the balances
+        self.chip_manager.persistence.drain()
+        self.assertEqual(JackpotPool(self.test_jackpot_file).last_win["amount"], 1101)
+
+    def test_spin_conserves_chips(self):
+        jackpot = self.chip_manager.jackpot
+        for bet, multiplier in ((7, 0), (7, 3), (333, 15)):
+            before = self.chip_manager.users['123456'] * UNITS + jackpot._units + sum(jackpot._stripes)
+            asyncio.run(self.chip_manager.remove_chips('123456', bet))
+            payout, _, _ = asyncio.run(self.chip_manager.spin_jackpot('123456', bet, multiplier))
+            after = self.chip_manager.users['123456'] * UNITS + jackpot._units + sum(jackpot._stripes)
+            # The cut only moves chips from the bet into the pool: together they change as much as a spin of the
+            # bet less the cut without any jackpot would
+            staked = bet * UNITS - bet * jackpot.cut
+            self.assertEqual(after - before, staked * (multiplier - 1))
+            self.assertEqual(payout, staked * multiplier // UNITS)
+
+    def test_history_records_movements(self):
+        asyncio.run(self.chip_manager.remove_chips('123456', 100))
+        asyncio.run(self.chip_manager.add_chips('123456', 200))
+        asyncio.run(self.chip_manager.transfer_chips('123456', '789012', 50))
+        
+        entries, total = asyncio.run(self.chip_manager.get_history('123456'))
+        self.assertEqual(total, 3)
+        # Newest first
+        self.assertEqual(entries[0].reason, ledger.TRANSFER_OUT)
+        self.assertEqual(entries[0].counterparty, 789012)
+        self.assertEqual(entries[0].balance, 1050)
+        self.assertEqual(entries[1].delta, 200)
+        self.assertEqual(entries[2].reason, ledger.STAKE)
+        
+        entries, total = asyncio.run(self.chip_manager.get_history('789012'))
+        self.assertEqual(total, 1)
+        self.assertEqual(entries[0].reason, ledger.TRANSFER_IN)
+        self.assertEqual(entries[0].balance, 550)
+    
+    def test_balance_events(self):
+        async def run():
+            queue = self.chip_manager.events.subscribe()
+            await self.chip_manager.transfer_chips('123456', '789012', 100)
+            await self.chip_manager.remove_chips('789012', 600)
+            await self.chip_manager.settle_round('789012', 0)
+            await self.chip_manager.settle_round('123456', 0)
+            await self.chip_manager.pay_poll_winners({'345678': 250})
+            await self.chip_manager.pay_raffle_winners({'345678': 40})
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+        
+        published = asyncio.run(run())
+        self.assertEqual([e.kind for e in published],
+                         [events.PAYMENT_RECEIVED, events.WENT_BROKE, events.POLL_PAYOUT, events.RAFFLE_PRIZE])
+        self.assertEqual(published[0].counterparty, '123456')
+        self.assertEqual(published[1].user_id, '789012')
+        self.assertEqual(published[2].amount, 250)
+        self.assertEqual(self.chip_manager.users['345678'], 290)
+    
+    def test_leaderboard_pages(self):
+        self.chip_manager.users.update({str(uid): uid for uid in range(1, 21)})
+        version, total, entries = asyncio.run(self.chip_manager.get_leaderboard_page(0, 2, ['123456']))
+        self.assertEqual(total, 22)
+        self.assertEqual(entries, [(1, '789012', 500), (2, '20', 20)])
+        
+        version, total, entries = asyncio.run(self.chip_manager.get_leaderboard_page(10, 2, ['123456']))
+        self.assertEqual(entries, [(21, '1', 1), (22, '345678', 0)])
+        self.assertEqual(asyncio.run(self.chip_manager.get_leaderboard_rank('20', ['123456'])), 2)
+        self.assertIsNone(asyncio.run(self.chip_manager.get_leaderboard_rank('123456', ['123456'])))
+        
+        # Moving into the top is visible right away
+        asyncio.run(self.chip_manager.add_chips('1', 999))
+        new_version, total, entries = asyncio.run(self.chip_manager.get_leaderboard_page(0, 2, ['123456']))
+        self.assertGreater(new_version, version)
+        self.assertEqual(entries[0], (1, '1', 1000))
+    
+    def test_economy_report(self):
+        report = asyncio.run(self.chip_manager.get_economy_report())
+        self.assertEqual(report["supply"], 1500)
+        self.assertEqual(report["broke"], 1)
+        self.assertEqual(report["percentiles"]["p50"], 500)
+        
+        # Balance changes are reflected without reloading
+        asyncio.run(self.chip_manager.add_chips('345678', 500))
+        report = asyncio.run(self.chip_manager.get_economy_report())
+        self.assertEqual(report["supply"], 2000)
+        self.assertEqual(report["broke"], 0)
+        self.assertEqual(report["users"], 3)
+    
+    def test_balance_history(self):
+        now = 1_700_438_400
+        
+        async def run():
+            await self.chip_manager.add_chips('123456', 100)
+            await self.chip_manager.remove_chips('123456', 300)
+            await self.chip_manager.sample_history(now)
+            await self.chip_manager.add_chips('789012', 50)
+            await self.chip_manager.sample_history(now + 60)
+            # Nothing changed, so nothing is sampled
+            await self.chip_manager.sample_history(now + 120)
+            return (await self.chip_manager.get_balance_history('123456', 1, 1440, now + 180),
+                    await self.chip_manager.get_balance_history('789012', 1, 1440, now + 180),
+                    await self.chip_manager.get_balance_history(None, 1, 1440, now + 180))
+        
+        user, other, economy = asyncio.run(run())
+        self.assertEqual(user, [(now, 800)])
+        self.assertEqual(other, [(now + 60, 550)])
+        self.assertEqual(economy, [(now, 1300), (now + 60, 1350)])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
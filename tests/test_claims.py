@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from claims import ClaimStore, reward
+
+class TestClaims(unittest.TestCase):
+    def setUp(self):
+        self.claim_file = 'test_claims.bin'
+        self.store = ClaimStore(self.claim_file)
+        self.now = 1_700_000_000
+    
+    def tearDown(self):
+        if os.path.exists(self.claim_file):
+            os.remove(self.claim_file)
+    
+    def test_cooldown_and_streak(self):
+        self.assertEqual(self.store.claim(1, "hourly", self.now), (0, 1))
+        self.assertEqual(self.store.claim(1, "hourly", self.now + 60), (3540, 1))
+        self.assertEqual(self.store.claim(1, "hourly", self.now + 3600), (0, 2))
+        # A missed window restarts the streak
+        self.assertEqual(self.store.claim(1, "hourly", self.now + 3600 * 4), (0, 1))
+        self.assertEqual(self.store.status(1, "hourly", self.now + 3600 * 4), (3600, 1))
+        self.assertEqual(self.store.status(1, "daily", self.now), (0, 0))
+    
+    def test_reward_caps_streak(self):
+        self.assertEqual(reward("daily", 1), 200)
+        self.assertEqual(reward("daily", 3), 300)
+        self.assertEqual(reward("daily", 100), reward("daily", 7))
+    
+    def test_flush_writes_only_changed_slots(self):
+        for user_id in range(100):
+            self.store.claim(user_id, "daily", self.now)
+        self.assertEqual(self.store.flush(), 100)
+        self.assertEqual(os.path.getsize(self.claim_file), 100 * ClaimStore.RECORD.size)
+        self.assertEqual(self.store.flush(), 0)
+        
+        self.store.claim(42, "hourly", self.now)
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(os.path.getsize(self.claim_file), 100 * ClaimStore.RECORD.size)
+        
+        reloaded = ClaimStore(self.claim_file)
+        self.assertEqual(len(reloaded), 100)
+        self.assertEqual(reloaded.status(42, "hourly", self.now), (3600, 1))
+        self.assertEqual(reloaded.status(7, "daily", self.now + 10), (86390, 1))
+        self.assertEqual(reloaded.claim(7, "daily", self.now + 86400), (0, 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import economy_io
+from ledger import Ledger
+import ledger
+
+class TestEconomyIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+    
+    def _write(self, name, text):
+        with open(self._path(name), 'w') as f:
+            f.write(text)
+        return self._path(name)
+    
+    def test_round_trip(self):
+        balances = [("1", 100), ("2", 0), ("3", 5000)]
+        for name in ("balances.csv", "balances.jsonl", "balances.csv.gz", "balances.jsonl.gz"):
+            path = self._path(name)
+            fmt = economy_io.file_format(path)
+            progress = economy_io.Progress()
+            self.assertEqual(economy_io.write_rows(path, economy_io.EXPORTS["balances"], balances, fmt, progress), 3)
+            self.assertEqual(progress.rows, 3)
+            with economy_io.open_text(path, 'r') as f:
+                self.assertEqual(list(economy_io.read_balances(f, fmt)), balances)
+        
+        with open(self._path("balances.jsonl")) as f:
+            self.assertEqual(json.loads(f.readline()), {"user_id": "1", "chips": 100})
+    
+    def test_validation_names_the_bad_line(self):
+        path = self._write("bad.csv", "user_id,chips\n1,100\n2,lots\n")
+        self.assertEqual(economy_io.validate_balances(path), (1, "Line 3: expected a user id and a chip count"))
+        
+        path = self._write("bad.jsonl", '{"user_id": 1, "chips": 5}\n\n{"user_id": 2, "chips": -5}\n')
+        self.assertEqual(economy_io.validate_balances(path)[1], 
+                         "Line 3: user ids must be positive and chips cannot be negative")
+        
+        path = self._write("headless.csv", "1,100\n")
+        self.assertEqual(economy_io.validate_balances(path)[1], "Line 1: expected a user_id,chips header")
+        self.assertIsNotNone(economy_io.validate_balances(self._write("balances.txt", ""))[1])
+        
+        path = self._write("good.csv", "user_id,chips\n1,100\n2,0\n")
+        self.assertEqual(economy_io.validate_balances(path), (2, None))
+    
+    def test_read_chunk(self):
+        rows = iter(range(25))
+        self.assertEqual([len(economy_io.read_chunk(rows, 10)) for _ in range(4)], [10, 10, 5, 0])
+    
+    def test_ledger_rows(self):
+        log = Ledger(self._path("ledger.bin"))
+        log.record(1, 100, 1100, ledger.PAYOUT)
+        log.record(2, -50, 950, ledger.STAKE)
+        log.flush()
+        log.record(3, 10, 10, ledger.PAYOUT)
+        
+        # Only entries already written to the file are exported
+        rows = list(economy_io.ledger_rows(log.ledger_file))
+        self.assertEqual([row[1:] for row in rows], [(1, 100, 1100, 0, "Game payout"), (2, -50, 950, 0, "Game stake")])
+        self.assertEqual(list(economy_io.ledger_rows(self._path("missing.bin"))), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ledger
+from economy_stats import EconomyStats, HISTOGRAM_EDGES
+from ledger import Ledger
+
+class TestEconomyStats(unittest.TestCase):
+    def setUp(self):
+        self.ledger_file = 'test_economy_ledger.bin'
+        self.users = {str(uid): uid * 10 for uid in range(100)}
+        self.stats = EconomyStats(interval=60)
+    
+    def tearDown(self):
+        if os.path.exists(self.ledger_file):
+            os.remove(self.ledger_file)
+    
+    def test_load_totals(self):
+        self.stats.load(self.users)
+        report = self.stats.report(self.stats.distribution(*self.stats.snapshot()))
+        self.assertEqual(report["users"], 100)
+        self.assertEqual(report["supply"], sum(self.users.values()))
+        self.assertEqual(report["broke"], 1)
+        self.assertEqual(report["percentiles"]["p50"], round(np.percentile(list(self.users.values()), 50)))
+        self.assertEqual(sum(count for _, count in report["histogram"]), 100)
+        self.assertEqual(dict(report["histogram"])[100], 90)
+        # Shards get the report through JSON
+        self.assertEqual(json.loads(json.dumps(report))["percentiles"], report["percentiles"])
+    
+    def test_gini(self):
+        self.stats.load({str(uid): 100 for uid in range(10)})
+        self.assertAlmostEqual(self.stats.distribution(*self.stats.snapshot())["gini"], 0.0)
+        
+        # One user owning everything approaches 1
+        self.stats.load({**{str(uid): 0 for uid in range(99)}, '99': 1000})
+        distribution = self.stats.distribution(*self.stats.snapshot())
+        self.assertAlmostEqual(distribution["gini"], 0.99)
+        self.assertEqual(distribution["top1_share"], 1.0)
+    
+    def test_incremental_updates_match_full_load(self):
+        self.stats.load(self.users)
+        changes = [('5', 0), ('0', 5000), ('new', 250), ('99', 7)]
+        for uid, chips in changes:
+            self.users[uid] = chips
+            self.stats.update(uid, chips)
+        
+        fresh = EconomyStats()
+        fresh.load(self.users)
+        incremental = self.stats.report(self.stats.distribution(*self.stats.snapshot()))
+        full = fresh.report(fresh.distribution(*fresh.snapshot()))
+        for key in ("users", "supply", "broke", "histogram", "percentiles", "gini"):
+            self.assertEqual(incremental[key], full[key])
+    
+    def test_updates_ignored_until_loaded(self):
+        self.stats.update('1', 500)
+        self.assertEqual(self.stats.supply, 0)
+        self.assertEqual(self.stats.version, 0)
+    
+    def test_inflation_from_ledger(self):
+        entries = Ledger(self.ledger_file)
+        entries.record(1, 1000, 1000, ledger.BROKE_RESET)
+        entries.record(2, -50, 950, ledger.STAKE)
+        entries.record(3, 200, 1200, ledger.ADMIN_SET)
+        entries.flush()
+        
+        self.stats.load(self.users, self.ledger_file)
+        self.assertEqual(self.stats.reset_inflation, 1000)
+        self.assertEqual(self.stats.admin_adjustments, 200)
+        self.stats.update('4', 1000, 1000, ledger.BROKE_RESET)
+        self.assertEqual(self.stats.reset_inflation, 2000)
+    
+    def test_distribution_cache(self):
+        self.stats.load(self.users)
+        self.assertIsNone(self.stats.cached_distribution())
+        distribution = self.stats.distribution(*self.stats.snapshot())
+        self.stats.store_distribution(distribution)
+        
+        # Reused while young, even after changes
+        self.stats.update('1', 99999)
+        self.assertIs(self.stats.cached_distribution(), distribution)
+        self.stats._distribution_time = time.monotonic() - 61
+        self.assertIsNone(self.stats.cached_distribution())
+        
+        # Live figures never come from the cache
+        self.assertEqual(self.stats.report(distribution)["supply"], sum(self.users.values()) - 10 + 99999)
+    
+    def test_histogram_edges(self):
+        self.stats.load({'a': 0, 'b': 1, 'c': 9, 'd': HISTOGRAM_EDGES[-1] * 5})
+        histogram = dict(self.stats.report(self.stats.distribution(*self.stats.snapshot()))["histogram"])
+        self.assertEqual(histogram[0], 1)
+        self.assertEqual(histogram[1], 2)
+        self.assertEqual(histogram[HISTOGRAM_EDGES[-1]], 1)
+
+if __name__ == '__main__':
+    unittest.main()
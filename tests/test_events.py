@@ -0,0 +1,86 @@
+import unittest
+import asyncio
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import events
+from events import EventBus, NotificationDispatcher, format_notification
+
+class RateLimited(Exception):
+    retry_after = 0.01
+
+class TestEvents(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBus()
+        self.sent = []
+    
+    async def _send(self, user_id, message):
+        self.sent.append((user_id, message))
+    
+    def test_format_coalesces_events(self):
+        message = format_notification([
+            events.BalanceEvent(events.PAYMENT_RECEIVED, '1', 50, '2'),
+            events.BalanceEvent(events.PAYMENT_RECEIVED, '1', 25, '2'),
+            events.BalanceEvent(events.WENT_BROKE, '1', 0, None),
+        ])
+        self.assertEqual(message.splitlines()[0], "<@2> paid you 75 chips!")
+        self.assertIn("You lost all your chips!", message)
+        
+        # A payment after going broke makes the broke notice stale
+        message = format_notification([
+            events.BalanceEvent(events.WENT_BROKE, '1', 0, None),
+            events.BalanceEvent(events.POLL_PAYOUT, '1', 300, None),
+        ])
+        self.assertEqual(message, "You won 300 chips from the prediction poll!")
+        
+        message = format_notification([events.BalanceEvent(events.RAFFLE_PRIZE, '1', 40, None)])
+        self.assertEqual(message, "You won 40 chips in the raffle!")
+    
+    def test_dispatcher_merges_per_user(self):
+        async def run():
+            dispatcher = NotificationDispatcher(self.bus, self._send, rate=1000)
+            self.bus.publish(events.PAYMENT_RECEIVED, '1', 10, '3')
+            self.bus.publish(events.PAYMENT_RECEIVED, '2', 20, '3')
+            self.bus.publish(events.PAYMENT_RECEIVED, '1', 30, '4')
+            task = dispatcher.start()
+            await asyncio.sleep(0.05)
+            task.cancel()
+            return dispatcher.stats()
+        
+        stats = asyncio.run(run())
+        self.assertEqual(self.sent, [('1', "<@3> paid you 10 chips!\n<@4> paid you 30 chips!"),
+                                     ('2', "<@3> paid you 20 chips!")])
+        self.assertEqual(stats['sent'], 2)
+        self.assertEqual(stats['coalesced'], 1)
+    
+    def test_dispatcher_retries_rate_limited_sends(self):
+        attempts = []
+        
+        async def send(user_id, message):
+            attempts.append(user_id)
+            if len(attempts) == 1:
+                raise RateLimited()
+            self.sent.append((user_id, message))
+        
+        async def run():
+            dispatcher = NotificationDispatcher(self.bus, send, rate=1000)
+            self.bus.publish(events.WENT_BROKE, '1')
+            task = dispatcher.start()
+            await asyncio.sleep(0.05)
+            task.cancel()
+        
+        asyncio.run(run())
+        self.assertEqual(attempts, ['1', '1'])
+        self.assertEqual(len(self.sent), 1)
+    
+    def test_bounded_queue_drops(self):
+        queue = self.bus.subscribe(maxsize=1)
+        self.bus.publish(events.WENT_BROKE, '1')
+        self.bus.publish(events.WENT_BROKE, '2')
+        self.assertEqual(queue.qsize(), 1)
+        self.assertEqual(self.bus.dropped, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,31 +2,45 @@ import unittest
 import asyncio
 import os
 import sys
-import random
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from views import SlotsView
 from chip_manager import ChipManager
+from rng import Round, RNGService, replay
+
+class FixedRNG:
+    """Returns preset outcomes instead of drawing them"""
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+    
+    def play(self, game):
+        return Round(game, 0, 0, self.outcomes.pop(0))
 
 class TestGameMechanics(unittest.TestCase):
     def setUp(self):
         # Mock ChipManager
         self.chip_manager = MagicMock(spec=ChipManager)
+        # Pays without a cut, so the payouts are whole multiples of the bet
+        self.chip_manager.spin_jackpot.side_effect = lambda user_id, bet, multiplier, hit: (bet * multiplier, 0, 1000)
         
         # Sample test data
         self.user_id = 123456
         self.bet = 100
         self.superuser = "999999"
+        self.seed_file = 'test_rng_seeds.json'
+    
+    def tearDown(self):
+        if os.path.exists(self.seed_file):
+            os.remove(self.seed_file)
     
-    @patch('random.choice')
-    async def _test_slots_win_logic(self, mock_choice):
-        # Set up mocks for all symbols
-        mock_choice.side_effect = ["🍒", "🍒", "🍒"]  # All matching
+    async def _test_slots_win_logic(self):
+        # Inject the outcome for all symbols
+        rng = FixedRNG(["🍒", "🍒", "🍒"])  # All matching
         
         # Create slots view and process spin
-        slots_view = SlotsView(self.user_id, self.bet, self.chip_manager)
+        slots_view = SlotsView(self.user_id, self.bet, self.chip_manager, rng=rng)
         result, is_win, winnings, _ = await slots_view._process_spin(self.user_id)
         
         # Check results
@@ -34,16 +48,16 @@ class TestGameMechanics(unittest.TestCase):
         self.assertTrue(is_win)
         self.assertEqual(winnings, self.bet * 14)
         
-        # Verify chips were added
-        self.chip_manager.add_chips.assert_called_once_with(self.user_id, self.bet * 15)
+        # Verify chips were paid
+        self.chip_manager.spin_jackpot.assert_called_once_with(self.user_id, self.bet, 15, False)
+        self.chip_manager.record_game.assert_called_once_with(self.user_id, "slots", self.bet, self.bet * 15)
     
-    @patch('random.choice')
-    async def _test_slots_partial_win_logic(self, mock_choice):
-        # Set up mocks for partial match
-        mock_choice.side_effect = ["🍊", "🍊", "🍌"]  # Two matching
+    async def _test_slots_partial_win_logic(self):
+        # Inject the outcome for partial match
+        rng = FixedRNG(["🍊", "🍊", "🍌"])  # Two matching
         
         # Create slots view and process spin
-        slots_view = SlotsView(self.user_id, self.bet, self.chip_manager)
+        slots_view = SlotsView(self.user_id, self.bet, self.chip_manager, rng=rng)
         result, is_win, winnings, _ = await slots_view._process_spin(self.user_id)
         
         # Check results
@@ -51,16 +65,15 @@ class TestGameMechanics(unittest.TestCase):
         self.assertTrue(is_win)
         self.assertEqual(winnings, self.bet * 2)
         
-        # Verify chips were added
-        self.chip_manager.add_chips.assert_called_once_with(self.user_id, self.bet * 3)
+        # Verify chips were paid
+        self.chip_manager.spin_jackpot.assert_called_once_with(self.user_id, self.bet, 3, False)
     
-    @patch('random.choice')
-    async def _test_slots_loss_logic(self, mock_choice):
-        # Set up mocks for no match
-        mock_choice.side_effect = ["🍎", "🍊", "🍌"]  # No matches
+    async def _test_slots_loss_logic(self):
+        # Inject the outcome for no match
+        rng = FixedRNG(["🍎", "🍊", "🍌"])  # No matches
         
         # Create slots view and process spin
-        slots_view = SlotsView(self.user_id, self.bet, self.chip_manager)
+        slots_view = SlotsView(self.user_id, self.bet, self.chip_manager, rng=rng)
         result, is_win, winnings, _ = await slots_view._process_spin(self.user_id)
         
         # Check results
@@ -68,8 +81,9 @@ class TestGameMechanics(unittest.TestCase):
         self.assertFalse(is_win)
         self.assertEqual(winnings, 0)
         
-        # Verify no chips were added
-        self.chip_manager.add_chips.assert_not_called()
+        # Verify no chips were paid
+        self.chip_manager.spin_jackpot.assert_called_once_with(self.user_id, self.bet, 0, False)
+        self.chip_manager.record_game.assert_called_once_with(self.user_id, "slots", self.bet, 0)
     
     async def _test_superuser_always_win(self):
         # Create slots view with superuser settings
@@ -78,7 +92,8 @@ class TestGameMechanics(unittest.TestCase):
             self.bet, 
             self.chip_manager,
             superuser=self.superuser,
-            superuser_always_win=True
+            superuser_always_win=True,
+            rng=FixedRNG(["🍒", "🍋", "🍊"])
         )
         
         # Process spin
@@ -89,6 +104,27 @@ class TestGameMechanics(unittest.TestCase):
         self.assertTrue(is_win)
         self.assertEqual(winnings, self.bet * 14)
     
+    async def _test_seeded_spin_is_replayable(self):
+        rng = RNGService(self.seed_file)
+        slots_view = SlotsView(self.user_id, self.bet, self.chip_manager, rng=rng)
+        result, _, _, embed = await slots_view._process_spin(self.user_id)
+        
+        # The round shown to the player re-derives the same symbols
+        epoch, nonce = (int(part) for part in embed.footer.text.split(" · ")[0].split()[-1].split("-"))
+        self.assertEqual(rng.rotate()["epoch"], epoch)
+        self.assertEqual(replay(bytes.fromhex(rng.revealed[-1]["seed"]), nonce, "slots_v2"), result)
+    
+    async def _test_slots_jackpot(self):
+        self.chip_manager.spin_jackpot.side_effect = None
+        self.chip_manager.spin_jackpot.return_value = (self.bet * 15, 5000, 1000)
+        slots_view = SlotsView(self.user_id, self.bet, self.chip_manager, rng=FixedRNG(["💎", "💎", "💎"]))
+        result, is_win, winnings, embed = await slots_view._process_spin(self.user_id)
+        
+        # Three diamonds pay the triple and the whole jackpot
+        self.chip_manager.spin_jackpot.assert_called_once_with(self.user_id, self.bet, 15, True)
+        self.assertEqual(winnings, self.bet * 14 + 5000)
+        self.assertIn("JACKPOT", embed.description)
+    
     def test_slots_win_logic(self):
         asyncio.run(self._test_slots_win_logic())
     
@@ -100,6 +136,12 @@ class TestGameMechanics(unittest.TestCase):
     
     def test_superuser_always_win(self):
         asyncio.run(self._test_superuser_always_win())
+    
+    def test_seeded_spin_is_replayable(self):
+        asyncio.run(self._test_seeded_spin_is_replayable())
+    
+    def test_slots_jackpot(self):
+        asyncio.run(self._test_slots_jackpot())
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
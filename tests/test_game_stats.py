@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from game_stats import GameStats
+
+class TestGameStats(unittest.TestCase):
+    def setUp(self):
+        self.stats_file = 'test_game_stats.bin'
+        self.stats = GameStats(self.stats_file, capacity=4)
+    
+    def tearDown(self):
+        for path in (self.stats_file, f"{self.stats_file}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def test_counters_and_streaks(self):
+        for stake, payout in [(10, 20), (10, 20), (10, 0), (10, 10), (10, 0), (50, 150)]:
+            self.stats.record(1, "flip", stake, payout)
+        flip = self.stats.profile(1)["flip"]
+        self.assertEqual((flip["rounds"], flip["wins"]), (6, 3))
+        self.assertEqual((flip["wagered"], flip["won"], flip["biggest_win"]), (100, 200, 100))
+        # The push in the middle keeps the losing streak going
+        self.assertEqual((flip["streak"], flip["best_streak"]), (1, 2))
+        self.assertEqual(list(self.stats.profile(1)), ["flip"])
+        self.assertEqual(self.stats.profile(2), {})
+    
+    def test_top(self):
+        self.stats.record(1, "slots", 100, 0)
+        self.stats.record(2, "slots", 100, 1500)
+        self.stats.record(3, "slots", 10, 30)
+        self.stats.record(4, "roll", 10, 60)
+        self.assertEqual(self.stats.top("slots", "net"), [('2', 1400), ('3', 20), ('1', -100)])
+        self.assertEqual(self.stats.top("slots", "wagered", 2), [('1', 100), ('2', 100)])
+        # Users who never played a game are not ranked in it
+        self.assertEqual(self.stats.top("roll", "rounds"), [('4', 1)])
+        self.assertEqual(list(self.stats.rows())[-1], [4, "roll", 1, 1, 10, 60, 50, 1, 1])
+    
+    def test_flush_writes_changed_slots_in_place(self):
+        for user_id in range(3):
+            self.stats.record(user_id, "slots", 10, 0)
+        self.stats.flush()
+        size = os.path.getsize(self.stats_file)
+        self.assertEqual(self.stats.flush(), 0)
+        
+        self.stats.record(1, "roll", 10, 60)
+        self.stats.record(3, "roll", 10, 0)
+        self.assertEqual(self.stats.flush(), 2 * 7)
+        self.assertEqual(os.path.getsize(self.stats_file), size)
+        
+        restarted = GameStats(self.stats_file)
+        self.assertEqual(len(restarted), 4)
+        self.assertEqual(restarted.profile(1), self.stats.profile(1))
+        self.assertEqual(restarted.profile(3)["roll"]["streak"], -1)
+    
+    def test_growing_past_capacity(self):
+        self.stats.flush()
+        for user_id in range(10):
+            self.stats.record(user_id, "blackjack", 10, 25)
+        self.stats.flush()
+        self.assertEqual(self.stats.capacity, 16)
+        
+        restarted = GameStats(self.stats_file)
+        self.assertEqual(restarted.top("blackjack", "won", 20), [(str(user_id), 25) for user_id in range(10)])
+    
+    def test_recording_during_rewrite(self):
+        self.stats.record(1, "flip", 10, 20)
+        rewrite = self.stats._rewrite
+        finished = []
+        
+        def slow_rewrite(capacity, writes):
+            # Rounds are recorded from another thread while the file is written
+            recorder = threading.Thread(target=lambda: finished.append(self.stats.record(2, "flip", 10, 0)))
+            recorder.start()
+            recorder.join(1)
+            rewrite(capacity, writes)
+        
+        with patch.object(self.stats, '_rewrite', side_effect=slow_rewrite):
+            self.stats.flush()
+        self.assertEqual(finished, [None])
+        self.assertEqual(len(GameStats(self.stats_file)), 1)
+        self.stats.flush()
+        self.assertEqual(GameStats(self.stats_file).profile(2)["flip"]["rounds"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jackpot import JackpotPool
+from rng import RoundRNG, slot_reels, _hmac_key, JACKPOT_SYMBOL, SLOT_SYMBOLS
+
+class TestJackpot(unittest.TestCase):
+    def setUp(self):
+        self.pool_file = 'test_jackpot.json'
+        self.pool = JackpotPool(self.pool_file, seed=1000, cut=0.01, fold_interval=60)
+    
+    def tearDown(self):
+        if os.path.exists(self.pool_file):
+            os.remove(self.pool_file)
+    
+    def test_contributions_accumulate(self):
+        # One percent of a 1 chip bet is kept as a fraction until it adds up
+        for _ in range(150):
+            self.pool.contribute(1, 1)
+        self.assertEqual(self.pool.value, 1001)
+        self.pool.contribute(2, 1000)
+        self.assertEqual(self.pool.value, 1011)
+    
+    def test_win_folds_and_resets(self):
+        self.pool.contribute(1, 5000)
+        self.pool.contribute(2, 5050)
+        self.assertEqual(self.pool.win(3, now=100), 1100)
+        self.assertEqual(self.pool.value, 1000)
+        self.assertEqual(self.pool.last_win, {"user_id": "3", "amount": 1100, "time": 100})
+        
+        # The half chip left over stays in the next pool
+        self.pool.contribute(1, 50)
+        self.assertEqual(self.pool.value, 1001)
+    
+    def test_flush_is_periodic(self):
+        self.assertTrue(self.pool.flush())
+        self.pool.contribute(1, 1000)
+        # The stripes are not folded before the interval, so nothing changed yet
+        self.assertFalse(self.pool.flush())
+        self.assertTrue(self.pool.flush(force=True))
+        self.assertFalse(self.pool.flush(force=True))
+        self.assertEqual(JackpotPool(self.pool_file).value, 1010)
+    
+    def test_concurrent_contributions(self):
+        def spin(user_id):
+            for _ in range(1000):
+                self.pool.contribute(user_id, 100)
+        
+        threads = [threading.Thread(target=spin, args=(user_id,)) for user_id in range(8)]
+        for thread in threads:
+            thread.start()
+        for _ in range(100):
+            self.pool.fold()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.pool.win(1), 1000 + 8 * 1000)
+    
+    def test_jackpot_reels(self):
+        key = _hmac_key(b"seed")
+        spins = [slot_reels(RoundRNG(key, nonce)) for nonce in range(20000)]
+        hits = sum(spin == [JACKPOT_SYMBOL] * 3 for spin in spins)
+        self.assertLess(hits, 10)
+        self.assertTrue(all(symbol in SLOT_SYMBOLS for spin in spins if spin[0] != JACKPOT_SYMBOL for symbol in spin))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from leaderboard import LeaderboardCache
+
+class TestLeaderboard(unittest.TestCase):
+    def setUp(self):
+        self.users = {str(uid): uid * 10 for uid in range(1, 101)}
+        self.cache = LeaderboardCache(interval=60, top_size=10)
+    
+    def test_snapshot_ranking(self):
+        snapshot = self.cache.get(self.users, ['100'])
+        self.assertEqual(snapshot.ranking[0], ('99', 990))
+        self.assertEqual(snapshot.positions['1'], 98)
+        self.assertNotIn('100', snapshot.positions)
+        self.assertEqual(snapshot.threshold, 900)
+    
+    def test_changes_below_top_reuse_snapshot(self):
+        first = self.cache.get(self.users)
+        self.users['5'] = 60
+        self.cache.changed('5', 60)
+        self.assertIs(self.cache.get(self.users), first)
+        self.assertEqual(self.cache.rebuilds, 1)
+        
+        # Stale snapshots are rebuilt once the interval has passed
+        self.cache._built_at = time.monotonic() - 61
+        rebuilt = self.cache.get(self.users)
+        self.assertIsNot(rebuilt, first)
+        self.assertEqual(rebuilt.version, 1)
+        self.assertIs(self.cache.get(self.users), rebuilt)
+    
+    def test_top_changes_rebuild_immediately(self):
+        self.cache.get(self.users)
+        self.users['5'] = 5000
+        self.cache.changed('5', 5000)
+        self.assertEqual(self.cache.get(self.users).ranking[0], ('5', 5000))
+        
+        # A top user dropping out also counts
+        self.users['5'] = 0
+        self.cache.changed('5', 0)
+        self.assertEqual(self.cache.get(self.users).ranking[0], ('100', 1000))
+        self.assertEqual(self.cache.rebuilds, 3)
+    
+    def test_exclusion_change_rebuilds(self):
+        self.cache.get(self.users)
+        self.assertEqual(self.cache.get(self.users, ['100']).ranking[0][0], '99')
+        self.assertEqual(self.cache.rebuilds, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ledger
+from ledger import Ledger
+
+class TestLedger(unittest.TestCase):
+    def setUp(self):
+        self.test_file = 'test_ledger.bin'
+        if os.path.exists(self.test_file):
+            os.remove(self.test_file)
+        self.ledger = Ledger(self.test_file)
+    
+    def tearDown(self):
+        if os.path.exists(self.test_file):
+            os.remove(self.test_file)
+    
+    def test_records_are_buffered_until_flush(self):
+        self.ledger.record('123456', -100, 900, ledger.STAKE)
+        self.assertFalse(os.path.exists(self.test_file))
+        
+        # Unflushed records are still readable
+        entries = self.ledger.history('123456')
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].delta, -100)
+        
+        self.assertEqual(self.ledger.flush(), 1)
+        self.assertEqual(os.path.getsize(self.test_file), Ledger.RECORD.size)
+        self.assertEqual(self.ledger.flush(), 0)
+    
+    def test_history_pagination(self):
+        for i in range(25):
+            self.ledger.record('123456', i, 1000 + i, ledger.PAYOUT)
+            self.ledger.record('789012', -i, 1000 - i, ledger.STAKE)
+        self.ledger.flush()
+        # Mix flushed and buffered records
+        self.ledger.record('123456', 25, 1025, ledger.PAYOUT)
+        
+        self.assertEqual(self.ledger.count('123456'), 26)
+        first = self.ledger.history('123456', 0, 10)
+        self.assertEqual([e.delta for e in first], list(range(25, 15, -1)))
+        last = self.ledger.history('123456', 2, 10)
+        self.assertEqual([e.delta for e in last], list(range(5, -1, -1)))
+        self.assertEqual(self.ledger.history('123456', 3, 10), [])
+        self.assertEqual(self.ledger.history('555555'), [])
+    
+    def test_record_many(self):
+        self.ledger.record('123456', -100, 900, ledger.STAKE)
+        self.ledger.record_many([('123456', 50, 950), ('789012', -10, 490)], ledger.ADMIN_SET)
+        self.assertEqual(self.ledger.flush(), 3)
+        entries = self.ledger.history('123456')
+        self.assertEqual([(e.delta, e.balance, e.reason) for e in entries], [(50, 950, ledger.ADMIN_SET), (-100, 900, ledger.STAKE)])
+        self.assertEqual(Ledger(self.test_file).history('789012')[0].delta, -10)
+    
+    def test_failed_flush_keeps_records(self):
+        directory = 'test_ledger_dir'
+        failing = Ledger(os.path.join(directory, 'ledger.bin'))
+        failing.record('123456', -100, 900, ledger.STAKE)
+        with self.assertRaises(OSError):
+            failing.flush()
+        failing.record('123456', 50, 950, ledger.PAYOUT)
+        os.mkdir(directory)
+        try:
+            self.assertEqual(failing.flush(), 2)
+            entries = Ledger(failing.ledger_file).history('123456')
+            self.assertEqual([e.delta for e in entries], [50, -100])
+        finally:
+            os.remove(failing.ledger_file)
+            os.rmdir(directory)
+    
+    def test_index_is_rebuilt_on_load(self):
+        self.ledger.record('123456', 500, 1500, ledger.TRANSFER_IN, counterparty='789012')
+        self.ledger.record('789012', -500, 500, ledger.TRANSFER_OUT, counterparty='123456')
+        self.ledger.flush()
+        
+        # Simulate a torn write at the end of the file
+        with open(self.test_file, 'ab') as f:
+            f.write(b'\x00' * 5)
+        
+        reloaded = Ledger(self.test_file)
+        self.assertEqual(reloaded.count('123456'), 1)
+        entry = reloaded.history('789012')[0]
+        self.assertEqual(entry.reason, ledger.TRANSFER_OUT)
+        self.assertEqual(entry.counterparty, 123456)
+        self.assertEqual(os.path.getsize(self.test_file), 2 * Ledger.RECORD.size)
+        
+        # New records continue after the existing ones
+        reloaded.record('123456', 1, 1501)
+        self.assertEqual([e.delta for e in reloaded.history('123456')], [1, 500])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+import asyncio
+import os
+import sys
+
+from discord.http import Route
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outbound import OutboundScheduler, budgets_from_env, route_key, INTERACTION, MESSAGE, LOOKUP, DM
+
+class FakeHTTP:
+    def __init__(self):
+        self.routes = []
+
+    async def request(self, route, **kwargs):
+        self.routes.append(route)
+        if route.path == "/users/@me/channels":
+            return {"id": "55"}
+        return {}
+
+class TestOutboundScheduler(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+
+    def send(self, label):
+        async def send():
+            self.sent.append(label)
+            return label
+        return send
+
+    def test_classify(self):
+        scheduler = OutboundScheduler()
+        scheduler.dm_channels.add(55)
+        self.assertEqual(scheduler.classify(Route("POST", "/interactions/{interaction_id}/{interaction_token}/callback", interaction_id=1, interaction_token="t")), INTERACTION)
+        self.assertEqual(scheduler.classify(Route("POST", "/webhooks/{webhook_id}/{webhook_token}", webhook_id=1, webhook_token="t")), INTERACTION)
+        self.assertEqual(scheduler.classify(Route("POST", "/users/@me/channels")), DM)
+        self.assertEqual(scheduler.classify(Route("GET", "/users/{user_id}", user_id=1)), LOOKUP)
+        self.assertEqual(scheduler.classify(Route("POST", "/channels/{channel_id}/messages", channel_id=55)), DM)
+        self.assertEqual(scheduler.classify(Route("POST", "/channels/{channel_id}/messages", channel_id=10)), MESSAGE)
+
+    def test_interactions_are_never_queued(self):
+        scheduler = OutboundScheduler(global_budget=(1, 0.001))
+
+        async def run():
+            await scheduler.submit(MESSAGE, "POST /channels", self.send("message"))
+            # The global budget is used up, but interactions do not count against it
+            for n in range(3):
+                await asyncio.wait_for(scheduler.submit(INTERACTION, "POST /interactions", self.send(n)), 1)
+
+        asyncio.run(run())
+        self.assertEqual(self.sent, ["message", 0, 1, 2])
+        self.assertEqual(scheduler.stats()["interaction"]["sent"], 3)
+
+    def test_urgent_classes_go_first(self):
+        scheduler = OutboundScheduler(global_budget=(1, 20.0))
+
+        async def run():
+            await asyncio.gather(
+                scheduler.submit(DM, "POST /dm", self.send("dm")),
+                scheduler.submit(LOOKUP, "GET /users", self.send("lookup")),
+                scheduler.submit(MESSAGE, "POST /channels", self.send("message")),
+            )
+
+        asyncio.run(run())
+        self.assertEqual(self.sent, ["message", "lookup", "dm"])
+
+    def test_route_budgets(self):
+        scheduler = OutboundScheduler({MESSAGE: (5, 5.0), LOOKUP: (10, 10.0), DM: (1, 0.001)}, max_queued=3)
+
+        async def run():
+            # The second DM on the same route waits for its budget; other routes and classes do not
+            first = asyncio.ensure_future(scheduler.submit(DM, "POST /a", self.send("a1")))
+            second = asyncio.ensure_future(scheduler.submit(DM, "POST /a", self.send("a2")))
+            await asyncio.wait_for(scheduler.submit(DM, "POST /b", self.send("b1")), 1)
+            await asyncio.wait_for(scheduler.submit(LOOKUP, "GET /users", self.send("lookup")), 1)
+            await first
+            self.assertFalse(second.done())
+            self.assertEqual(scheduler.stats()["dm"]["queued"], 1)
+            waiting = [asyncio.ensure_future(scheduler.submit(DM, "POST /a", self.send(label))) for label in ("a3", "a4")]
+            await asyncio.sleep(0)
+            with self.assertRaises(RuntimeError):
+                await scheduler.submit(DM, "POST /a", self.send("a5"))
+            for future in [second] + waiting:
+                future.cancel()
+
+        asyncio.run(run())
+        self.assertEqual(sorted(self.sent), ["a1", "b1", "lookup"])
+        stats = scheduler.stats()["dm"]
+        self.assertEqual(stats["sent"], 2)
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["max_queued"], 3)
+
+    def test_route_keys(self):
+        messages = "/channels/{channel_id}/messages"
+        self.assertEqual(route_key(Route("POST", messages, channel_id=10)), route_key(Route("POST", messages, channel_id=10)))
+        self.assertNotEqual(route_key(Route("POST", messages, channel_id=10)), route_key(Route("POST", messages, channel_id=11)))
+        self.assertNotEqual(route_key(Route("POST", messages, channel_id=10)), route_key(Route("GET", messages, channel_id=10)))
+        self.assertNotEqual(route_key(Route("GET", "/guilds/{guild_id}", guild_id=1)), route_key(Route("GET", "/guilds/{guild_id}", guild_id=2)))
+
+    def test_channels_have_their_own_budget(self):
+        scheduler = OutboundScheduler({MESSAGE: (1, 0.001), LOOKUP: (10, 10.0), DM: (5, 5.0)})
+        http = FakeHTTP()
+        scheduler.install(http)
+
+        async def run():
+            message = Route("POST", "/channels/{channel_id}/messages", channel_id=10)
+            await asyncio.wait_for(http.request(message, json={}), 1)
+            # A message to another channel is not held up by the first channel's budget
+            await asyncio.wait_for(http.request(Route("POST", "/channels/{channel_id}/messages", channel_id=11), json={}), 1)
+            second = asyncio.ensure_future(http.request(message, json={}))
+            await asyncio.sleep(0.05)
+            self.assertFalse(second.done())
+            second.cancel()
+
+        asyncio.run(run())
+        self.assertEqual(scheduler.stats()["message"]["sent"], 2)
+
+    def test_install_learns_dm_channels(self):
+        scheduler = OutboundScheduler()
+        http = FakeHTTP()
+        scheduler.install(http)
+
+        async def run():
+            channel = await http.request(Route("POST", "/users/@me/channels"), json={"recipient_id": 1})
+            await http.request(Route("POST", "/channels/{channel_id}/messages", channel_id=channel["id"]), json={})
+            await http.request(Route("POST", "/channels/{channel_id}/messages", channel_id=10), json={})
+
+        asyncio.run(run())
+        self.assertEqual(len(http.routes), 3)
+        self.assertIn(55, scheduler.dm_channels)
+        stats = scheduler.stats()
+        self.assertEqual(stats["dm"]["sent"], 2)
+        self.assertEqual(stats["message"]["sent"], 1)
+        self.assertGreaterEqual(stats["dm"]["p99_ms"], stats["dm"]["p50_ms"])
+
+    def test_budgets_from_env(self):
+        os.environ["OUTBOUND_RATE_DM"] = "10,2"
+        try:
+            budgets = budgets_from_env()
+        finally:
+            del os.environ["OUTBOUND_RATE_DM"]
+        self.assertEqual(budgets[DM], (10, 2.0))
+        self.assertEqual(budgets[LOOKUP], (10, 10.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chip_manager import ChipManager
+from poll_manager import PollManager
+
+class TestPartitions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'GUILD_DATA_DIR': self.tmp.name, 'GLOBAL_ECONOMY': 'False'})
+        self.env.start()
+        ChipManager._partitions = {}
+        PollManager._partitions = {}
+    
+    def tearDown(self):
+        # Finish queued writes before their directory is removed
+        for manager in list(ChipManager._partitions.values()) + list(PollManager._partitions.values()):
+            manager.persistence.close()
+        self.env.stop()
+        ChipManager._partitions = {}
+        PollManager._partitions = {}
+        self.tmp.cleanup()
+    
+    def test_guilds_have_separate_economies(self):
+        first = ChipManager(111)
+        second = ChipManager('222')
+        self.assertIs(first, ChipManager('111'))
+        self.assertIsNot(first, second)
+        self.assertIsNot(first._lock, second._lock)
+        self.assertIs(first.events, second.events)
+        self.assertEqual(first.chip_file, os.path.join(self.tmp.name, '111', 'chips.json'))
+        
+        asyncio.run(first.add_chips('123456', 500))
+        self.assertEqual(asyncio.run(first.get_chips('123456')), 1500)
+        self.assertEqual(asyncio.run(second.get_chips('123456')), 1000)
+        first.persistence.drain()
+        self.assertTrue(os.path.exists(first.chip_file))
+        self.assertEqual(asyncio.run(second.get_top_users()), [])
+        
+        # A fresh partition loads what the first one saved
+        ChipManager._partitions = {}
+        self.assertEqual(asyncio.run(ChipManager(111).get_chips('123456')), 1500)
+    
+    def test_guilds_have_separate_polls(self):
+        first = PollManager(111)
+        second = PollManager(222)
+        with patch.object(PollManager, '_save_poll', return_value=True):
+            asyncio.run(first.create_poll("Question", "A", "B"))
+        self.assertTrue(asyncio.run(first.has_active_poll()))
+        self.assertFalse(asyncio.run(second.has_active_poll()))
+    
+    def test_global_economy_option(self):
+        with patch.dict(os.environ, {'GLOBAL_ECONOMY': 'True'}):
+            with patch.object(ChipManager, '_instance', object.__new__(ChipManager)) as instance:
+                self.assertIs(ChipManager(111), instance)
+                self.assertIs(ChipManager(None), instance)
+        self.assertEqual(ChipManager._partitions, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from persistence import PersistenceWorker
+
+class TestPersistenceWorker(unittest.TestCase):
+    def setUp(self):
+        self.written = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.writing = threading.Event()
+        self.fail = 0
+        
+        def write(snapshot):
+            self.writing.set()
+            self.gate.wait()
+            if self.fail:
+                self.fail -= 1
+                raise OSError("disk full")
+            self.written.append(snapshot)
+        
+        self.worker = PersistenceWorker("test", write, max_lag=0.05, retry_delay=0)
+    
+    def tearDown(self):
+        self.gate.set()
+        self.worker.close(timeout=5)
+    
+    def test_saves_are_written_in_order(self):
+        async def run():
+            for snapshot in range(3):
+                await self.worker.save(snapshot)
+                self.assertTrue(self.worker.drain(timeout=5))
+        
+        asyncio.run(run())
+        self.assertEqual(self.written, [0, 1, 2])
+        self.assertEqual(self.worker.stats()["depth"], 0)
+        self.assertEqual(self.worker.stats()["writes"], 3)
+    
+    def test_waiting_snapshots_are_coalesced(self):
+        # The first write blocks, so the next saves wait and only the newest is written
+        self.gate.clear()
+        self.worker.submit("first")
+        self.assertTrue(self.writing.wait(5))
+        for snapshot in ("second", "third", "fourth"):
+            self.worker.submit(snapshot)
+        self.assertEqual(self.worker.stats()["depth"], 4)
+        self.gate.set()
+        
+        self.assertTrue(self.worker.drain(timeout=5))
+        self.assertEqual(self.written, ["first", "fourth"])
+        self.assertEqual(self.worker.stats()["coalesced"], 2)
+        self.assertEqual(self.worker.stats()["max_depth"], 4)
+    
+    def test_merged_snapshots_are_coalesced(self):
+        def write(snapshot):
+            self.writing.set()
+            self.gate.wait()
+            self.written.append(snapshot)
+        
+        # Snapshots holding only changes are folded together instead of replaced
+        worker = PersistenceWorker("merge", write, merge=lambda older, newer: {**older, **newer})
+        self.gate.clear()
+        worker.submit({"1": 10})
+        self.assertTrue(self.writing.wait(5))
+        worker.submit({"1": 20, "2": 5})
+        worker.submit({"2": 6, "3": 7})
+        self.gate.set()
+        self.assertTrue(worker.close(timeout=5))
+        self.assertEqual(self.written, [{"1": 10}, {"1": 20, "2": 6, "3": 7}])
+    
+    def test_backpressure_waits_for_the_disk(self):
+        self.gate.clear()
+        
+        async def run():
+            # Many saves in a row do not wait while the disk keeps up
+            for snapshot in range(10):
+                await self.worker.save(snapshot)
+            self.assertEqual(self.worker.stats()["backpressure_waits"], 0)
+            self.assertTrue(self.writing.wait(5))
+            # The oldest save is now older than max_lag, so the next one waits until a write finishes
+            await asyncio.sleep(0.1)
+            self.assertGreaterEqual(self.worker.stats()["lag_ms"], 50)
+            save = asyncio.ensure_future(self.worker.save(10))
+            await asyncio.sleep(0.05)
+            self.assertFalse(save.done())
+            self.gate.set()
+            await asyncio.wait_for(save, 5)
+        
+        asyncio.run(run())
+        self.assertTrue(self.worker.drain(timeout=5))
+        self.assertEqual(self.written[-1], 10)
+        self.assertEqual(self.worker.stats()["lag_ms"], 0)
+        self.assertGreater(self.worker.stats()["backpressure_waits"], 0)
+    
+    def test_failed_write_keeps_its_age(self):
+        self.fail = 1
+        self.worker.retry_delay = 0.2
+        self.gate.clear()
+        self.worker.submit("first")
+        self.assertTrue(self.writing.wait(5))
+        time.sleep(0.06)
+        self.worker.submit("second")
+        self.gate.set()
+        while not self.worker.stats()["failures"]:
+            time.sleep(0.01)
+        # The retry covers the first save, so the lag still counts from it
+        self.assertGreaterEqual(self.worker.stats()["lag_ms"], 60)
+        self.assertTrue(self.worker.drain(timeout=5))
+        self.assertEqual(self.written, ["second"])
+    
+    def test_failed_write_is_retried(self):
+        self.fail = 1
+        self.worker.submit("snapshot")
+        self.assertTrue(self.worker.drain(timeout=5))
+        self.assertEqual(self.written, ["snapshot"])
+        self.assertEqual(self.worker.stats()["failures"], 1)
+        self.assertEqual(self.worker.stats()["last_error"], "disk full")
+    
+    def test_one_writer_thread(self):
+        threads = set()
+        worker = PersistenceWorker("threads", lambda snapshot: threads.add(threading.current_thread()))
+        for snapshot in range(20):
+            worker.submit(snapshot)
+        self.assertTrue(worker.close(timeout=5))
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(next(iter(threads)), threading.main_thread())
+        with self.assertRaises(RuntimeError):
+            worker.submit("late")
+
+if __name__ == '__main__':
+    unittest.main()
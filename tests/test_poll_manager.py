@@ -24,6 +24,7 @@ class TestPollManager(unittest.TestCase):
             # Manually set attributes that would be set in _initialize
             self.poll_manager.poll_file = self.test_file
             self.poll_manager.poll_data = {}
+            self.poll_manager._option_index = []
         
         # Clear any existing poll data
         self.poll_manager.poll_data = {}
@@ -72,6 +73,25 @@ class TestPollManager(unittest.TestCase):
             self.assertFalse(success)
             self.assertEqual(error, "The poll is already closed!")
     
+    def test_close_expired_poll(self):
+        with patch.object(self.poll_manager, '_save_poll', return_value=True):
+            asyncio.run(self.poll_manager.create_poll("Test Question", "Option A", "Option B", closes_at=1000))
+            
+            # Not due yet
+            success, error = asyncio.run(self.poll_manager.close_expired_poll(now=999))
+            self.assertFalse(success)
+            self.assertFalse(self.poll_manager.poll_data["closed"])
+            
+            success, error = asyncio.run(self.poll_manager.close_expired_poll(now=1000))
+            self.assertTrue(success)
+            self.assertTrue(self.poll_manager.poll_data["closed"])
+            
+            # Bets after the deadline are refused even before the job has run
+            self.poll_manager.poll_data["closed"] = False
+            success, error = asyncio.run(self.poll_manager.place_bet('123456', "Option A", 100))
+            self.assertFalse(success)
+            self.assertEqual(error, "The poll is closed!")
+    
     def test_place_bet(self):
         # Create a poll first
         with patch.object(self.poll_manager, '_save_poll', return_value=True):
@@ -164,5 +184,36 @@ class TestPollManager(unittest.TestCase):
             self.assertTrue(poll_data["active"])
             self.assertFalse(poll_data["closed"])
 
+    def test_complete_options(self):
+        with patch.object(self.poll_manager, '_save_poll', return_value=True):
+            # Nothing to suggest without an active poll
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("")), [])
+            
+            asyncio.run(self.poll_manager.create_poll("Who wins?", "Red Team", "Blue Team"))
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("")), ["Blue Team", "Red Team"])
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("re")), ["Red Team"])
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("BLUE  t")), ["Blue Team"])
+            # Later words of an option match too, and each option is suggested once
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("team")), ["Blue Team", "Red Team"])
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("green")), [])
+            
+            # Closed polls are still suggested for ending but not for betting
+            asyncio.run(self.poll_manager.close_poll())
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("red", betting=True)), [])
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("red")), ["Red Team"])
+            
+            asyncio.run(self.poll_manager.end_poll("Red Team"))
+            self.assertEqual(asyncio.run(self.poll_manager.complete_options("")), [])
+    
+    def test_complete_options_does_not_wait_for_lock(self):
+        with patch.object(self.poll_manager, '_save_poll', return_value=True):
+            asyncio.run(self.poll_manager.create_poll("Who wins?", "Red Team", "Blue Team"))
+        
+        async def complete_while_locked():
+            async with self.poll_manager._lock:
+                return await asyncio.wait_for(self.poll_manager.complete_options("b", betting=True), timeout=1)
+        
+        self.assertEqual(asyncio.run(complete_while_locked()), ["Blue Team"])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import unittest
+import asyncio
+import os
+import sys
+import random
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from raffle import RaffleManager, TicketTree, MAX_WINNERS
+from rng import replay
+
+class TestRaffle(unittest.TestCase):
+    def setUp(self):
+        self.raffle_file = 'test_raffle.json'
+        
+        # Reset the singleton instance for clean tests
+        RaffleManager._instance = None
+        with patch.object(RaffleManager, '_initialize'):
+            self.raffle_manager = RaffleManager()
+        self.raffle_manager.raffle_file = self.raffle_file
+        self.raffle_manager.raffle_data = {}
+        self.raffle_manager._load_raffle()
+    
+    def tearDown(self):
+        RaffleManager._instance = None
+        if os.path.exists(self.raffle_file):
+            os.remove(self.raffle_file)
+    
+    def test_tree_matches_counts(self):
+        counts = [random.randint(0, 1000) for _ in range(257)]
+        tree = TicketTree(counts)
+        self.assertEqual(tree.total, sum(counts))
+        tree.add(100, 5)
+        counts[100] += 5
+        
+        # Every ticket belongs to the participant whose range covers it
+        ticket = 0
+        for slot, count in enumerate(counts):
+            if count:
+                self.assertEqual(tree.find(ticket), slot)
+                self.assertEqual(tree.find(ticket + count - 1), slot)
+            ticket += count
+    
+    def test_draw_is_weighted_and_distinct(self):
+        tree = TicketTree([1, 0, 3])
+        self.assertEqual(tree.draw([0]), [0])
+        
+        tree = TicketTree([1, 0, 3])
+        self.assertEqual(tree.draw([1, 0, 0]), [2, 0])
+        
+        # Three quarters of the draws go to the participant with three tickets
+        wins = [TicketTree([1, 0, 3]).draw([random.getrandbits(64)])[0] for _ in range(4000)]
+        self.assertAlmostEqual(wins.count(2) / len(wins), 0.75, delta=0.05)
+        self.assertNotIn(1, wins)
+    
+    def test_millions_of_tickets(self):
+        tree = TicketTree()
+        for user in range(1000):
+            tree.add(tree.append(), 10000)
+        self.assertEqual(tree.total, 10_000_000)
+        self.assertEqual(tree.find(9_999_999), 999)
+        self.assertEqual(len(set(tree.draw([random.getrandbits(64) for _ in range(10)]))), 10)
+    
+    def test_one_draw_per_possible_winner(self):
+        self.assertEqual(len(replay(b"seed", 0, "raffle")), MAX_WINNERS)
+    
+    def test_raffle_lifecycle(self):
+        async def run():
+            self.assertEqual(await self.raffle_manager.check_purchase(3), (None, "There is no active raffle!"))
+            self.assertEqual(await self.raffle_manager.start_raffle(10, 2), (True, None))
+            self.assertFalse((await self.raffle_manager.start_raffle(10, 2))[0])
+            
+            cost, _ = await self.raffle_manager.check_purchase(3)
+            self.assertEqual(cost, 30)
+            self.assertTrue((await self.raffle_manager.add_tickets('1', 3, cost))[0])
+            self.assertTrue((await self.raffle_manager.add_tickets('2', 1, 10))[0])
+            self.assertTrue((await self.raffle_manager.add_tickets('1', 2, 20))[0])
+            info = await self.raffle_manager.get_raffle('1')
+            self.assertEqual((info["tickets"], info["participants"], info["own"]), (6, 2, 5))
+            
+            # Tickets survive a restart
+            self.raffle_manager._load_raffle()
+            self.assertEqual((await self.raffle_manager.get_raffle('2'))["own"], 1)
+            
+            # Not due when drawn by the scheduler without a deadline
+            self.assertFalse((await self.raffle_manager.draw_raffle([0, 0], now=0))[0])
+            success, pot, prizes = await self.raffle_manager.draw_raffle([5, 0])
+            self.assertTrue(success)
+            self.assertEqual(pot, 60)
+            self.assertEqual(prizes, {'2': 30, '1': 30})
+            
+            # Tickets bought for a raffle that has ended are rejected
+            self.assertFalse((await self.raffle_manager.add_tickets('1', 1, 10))[0])
+            self.assertIsNone(await self.raffle_manager.get_raffle())
+        
+        asyncio.run(run())
+    
+    def test_uneven_pot(self):
+        async def run():
+            await self.raffle_manager.start_raffle(7, 2)
+            await self.raffle_manager.add_tickets('1', 1, 7)
+            await self.raffle_manager.add_tickets('2', 2, 14)
+            return await self.raffle_manager.draw_raffle([0, 0])
+        
+        success, pot, prizes = asyncio.run(run())
+        self.assertEqual(prizes, {'1': 11, '2': 10})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from discord import app_commands
+from rate_limiter import TokenBucketLimiter, cooldown_check, rates_from_env
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.limiter = TokenBucketLimiter({"flip": (2, 1.0), "pay": (1, 0.1)})
+    
+    def test_burst_then_refill(self):
+        self.assertEqual(self.limiter.hit("flip", 1, now=0), 0)
+        self.assertEqual(self.limiter.hit("flip", 1, now=0), 0)
+        self.assertAlmostEqual(self.limiter.hit("flip", 1, now=0), 1.0)
+        self.assertAlmostEqual(self.limiter.hit("flip", 1, now=0.5), 0.5)
+        self.assertEqual(self.limiter.hit("flip", 1, now=1.0), 0)
+        
+        # Buckets are per user and per command
+        self.assertEqual(self.limiter.hit("flip", 2, now=1.0), 0)
+        self.assertEqual(self.limiter.hit("pay", 1, now=1.0), 0)
+        # Commands without a rate are not limited
+        self.assertEqual(self.limiter.hit("chips", 1, now=1.0), 0)
+    
+    def test_idle_buckets_are_evicted(self):
+        for user_id in range(100):
+            self.limiter.hit("flip", user_id, now=0)
+        self.assertEqual(len(self.limiter), 100)
+        
+        # After the longest refill time (pay: 1 token / 0.1 per second) old buckets go away
+        self.limiter.hit("flip", 1000, now=10)
+        self.assertEqual(len(self.limiter), 1)
+    
+    def test_max_buckets(self):
+        limiter = TokenBucketLimiter({"flip": (1, 0.001)}, max_buckets=10)
+        for user_id in range(50):
+            limiter.hit("flip", user_id, now=0)
+        self.assertEqual(len(limiter), 10)
+    
+    def test_rates_from_env(self):
+        with patch.dict(os.environ, {"RATE_LIMIT_FLIP": "5,2.5"}):
+            rates = rates_from_env({"flip": (1, 1.0), "roll": (1, 1.0)})
+        self.assertEqual(rates, {"flip": (5, 2.5), "roll": (1, 1.0)})
+    
+    def test_cooldown_check_raises(self):
+        @cooldown_check(self.limiter)
+        async def pay(interaction):
+            pass
+        predicate = pay.__discord_app_commands_checks__[0]
+        
+        interaction = MagicMock()
+        interaction.command.name = "pay"
+        interaction.user.id = 123456
+        self.assertTrue(predicate(interaction))
+        with self.assertRaises(app_commands.CommandOnCooldown) as ctx:
+            predicate(interaction)
+        self.assertGreater(ctx.exception.retry_after, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+
+import discord
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import responses
+
+POLL = {"active": True, "closed": False, "question": "Who wins?", "closes_at": 1_700_000_000, "total_bets": 2500,
+        "options": {"Red": {"1": 1000, "2": 500}, "Blue": {"3": 1000}}}
+
+class TestResponses(unittest.TestCase):
+    def assertPayload(self, embed):
+        # The payload written by the template is what building the embed through discord.py gives
+        expected = discord.Embed(title=embed.title, description=embed.description, colour=embed.colour)
+        for field in embed.fields:
+            expected.add_field(name=field.name, value=field.value, inline=field.inline)
+        if embed.footer.text is not None:
+            expected.set_footer(text=embed.footer.text)
+        self.assertEqual(embed.to_dict(), expected.to_dict())
+
+    def test_language(self):
+        self.assertEqual(responses.language(discord.Locale.german), "de")
+        self.assertEqual(responses.language(discord.Locale.american_english), "en")
+        self.assertEqual(responses.language(discord.Locale.british_english), "en")
+        self.assertEqual(responses.language(discord.Locale.japanese), "en")
+        self.assertEqual(responses.language(None), "en")
+
+    def test_format_chips(self):
+        self.assertEqual(responses.format_chips(999), "999")
+        self.assertEqual(responses.format_chips(1234567, discord.Locale.american_english), "1,234,567")
+        self.assertEqual(responses.format_chips(1234567, discord.Locale.german), "1.234.567")
+        self.assertEqual(responses.format_chips(-5000, discord.Locale.german), "-5.000")
+
+    def test_help_is_built_once_per_language(self):
+        english = responses.help_embed(discord.Locale.american_english)
+        self.assertIs(responses.HELP_PAYLOADS["en"], responses.HELP_PAYLOADS[responses.language(discord.Locale.british_english)])
+        # Every call gets an embed of its own, so changing one does not change the next
+        english.add_field(name="/extra", value="Added later")
+        english.set_field_at(0, name="/changed", value="Changed")
+        english.set_footer(text="Page 1")
+        self.assertEqual(english.to_dict()["fields"][-1]["name"], "/extra")
+        self.assertEqual(english.to_dict()["footer"], {"text": "Page 1"})
+        english = responses.help_embed(discord.Locale.british_english)
+        self.assertIsNone(english.footer.text)
+        german = responses.help_embed(discord.Locale.german)
+        self.assertEqual(german.title, "Hilfe")
+        for embed in (english, german):
+            self.assertEqual([field.name for field in embed.fields], responses.HELP_COMMANDS)
+            self.assertPayload(embed)
+        for texts in responses.TEXTS.values():
+            self.assertEqual(set(texts), set(responses.TEXTS["en"]))
+
+    def test_templates(self):
+        embed = responses.chips_embed(1500, discord.Locale.german)
+        self.assertEqual(embed.description, "Du hast 1.500 Chips!")
+        self.assertPayload(embed)
+        # Template embeds can still be changed before they are sent
+        embed.add_field(name="Rank", value="#3")
+        embed.set_footer(text="Updated")
+        self.assertEqual(embed.to_dict()["fields"], [{"name": "Rank", "value": "#3", "inline": True}])
+        self.assertEqual(embed.to_dict()["footer"], {"text": "Updated"})
+
+        embed = responses.slots_embed(["💎", "💎", "💎"], True, 1400, "3-17", 1000, 52000)
+        self.assertEqual(embed.colour, responses.GREEN)
+        self.assertIn("You won 52,000 chips from the jackpot", embed.description)
+        self.assertEqual(embed.footer.text, "Round 3-17 · Jackpot: 1,000 chips")
+        self.assertPayload(embed)
+        self.assertEqual(responses.slots_embed(["🍒", "🍋", "🍉"], False, 100, "3-18", 1000).colour, responses.RED)
+
+        embed = responses.poll_embed(POLL)
+        self.assertEqual([(field.name, field.value) for field in embed.fields],
+                         [("Red", "2 bets (1,500 chips)"), ("Blue", "1 bets (1,000 chips)"), ("Betting closes", "<t:1700000000:R>")])
+        self.assertEqual(embed.footer.text, "Total bets: 2,500 chips")
+        self.assertPayload(embed)
+        self.assertPayload(responses.poll_embed(dict(POLL, closed=True), discord.Locale.german))
+
+    def test_game_result(self):
+        self.assertEqual(responses.game_result("heads", True, 5000, "1-2"), "Result: heads! You won 5,000 chips! (round 1-2)")
+        self.assertEqual(responses.game_result(4, False, 10, "1-3", discord.Locale.german),
+                         "Ergebnis: 4! Du hast 10 Chips verloren! (Runde 1-3)")
+
+if __name__ == '__main__':
+    unittest.main()
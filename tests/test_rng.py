@@ -0,0 +1,110 @@
+import unittest
+import os
+import sys
+import hmac
+import json
+import hashlib
+from collections import Counter
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rng import RNGService, RoundRNG, SLOT_SYMBOLS, JACKPOT_SYMBOL, commitment, replay, round_id, parse_round_id, stream_file, _digest, _hmac_key
+
+class TestRNG(unittest.TestCase):
+    def setUp(self):
+        self.seed_file = 'test_rng_seeds.json'
+        self.rng = RNGService(self.seed_file, batch_size=8)
+    
+    def tearDown(self):
+        self.rng.persistence.close()
+        for path in (self.seed_file, f"{self.seed_file}.tmp", stream_file(self.seed_file, 0), stream_file(self.seed_file, 2)):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def test_rounds_replay_after_reveal(self):
+        rounds = [self.rng.play(game) for game in ("flip", "roll", "roulette", "slots_v2") * 5]
+        committed = self.rng.commitment
+        revealed = self.rng.rotate()
+        seed = bytes.fromhex(revealed["seed"])
+        
+        self.assertEqual(commitment(seed), committed)
+        self.assertEqual(revealed["rounds"], 20)
+        self.assertEqual([r.nonce for r in rounds], list(range(20)))
+        for r in rounds:
+            self.assertEqual(r.epoch, 0)
+            self.assertEqual(replay(seed, r.nonce, r.game), r.outcome)
+    
+    def test_outcomes_in_range(self):
+        rng = RoundRNG(_hmac_key(b"seed"), 0)
+        counts = Counter(rng.randint(1, 6) for _ in range(6000))
+        self.assertEqual(set(counts), set(range(1, 7)))
+        # Loose bound; a biased derivation would be far outside it
+        for count in counts.values():
+            self.assertTrue(850 < count < 1150)
+        self.assertIn(RoundRNG(_hmac_key(b"seed"), 1).choice(SLOT_SYMBOLS), SLOT_SYMBOLS)
+    
+    def test_digest_is_hmac_sha256(self):
+        for seed in (b"\x01" * 32, b"long" * 40):
+            self.assertEqual(_digest(_hmac_key(seed), 7, 2), hmac.digest(seed, b"7:2", hashlib.sha256))
+    
+    def test_nonces_reserved_across_restart(self):
+        first = self.rng.play("flip")
+        # The first refill waits for its batch and reserves the next one with it
+        with open(self.seed_file) as f:
+            self.assertEqual(json.load(f)["next_nonce"], 16)
+        
+        # Later refills reserve one batch ahead in the background
+        for _ in range(8):
+            self.rng.play("flip")
+        self.assertTrue(self.rng.persistence.drain(timeout=5))
+        with open(self.seed_file) as f:
+            self.assertEqual(json.load(f)["next_nonce"], 24)
+        
+        # A restarted service continues after the reserved batches with the same seed
+        restarted = RNGService(self.seed_file, batch_size=8)
+        self.assertEqual(restarted.commitment, self.rng.commitment)
+        self.assertEqual(restarted.play("flip").nonce, 24)
+        self.assertEqual(first.nonce, 0)
+    
+    def test_rotate_starts_new_epoch(self):
+        self.rng.play("slots")
+        old_commitment = self.rng.commitment
+        self.rng.rotate()
+        self.assertNotEqual(self.rng.commitment, old_commitment)
+        r = self.rng.play("slots")
+        self.assertEqual((r.epoch, r.nonce), (1, 0))
+        self.assertEqual(RNGService(self.seed_file).revealed[0]["commitment"], old_commitment)
+    
+    def test_slots_before_jackpot_replay_unchanged(self):
+        seed = b"\x02" * 32
+        nonce = next(n for n in range(100000) if replay(seed, n, "slots_v2") == [JACKPOT_SYMBOL] * 3)
+        # The jackpot draw only exists in slots_v2, so the old round keeps the reels it paid out
+        reels = replay(seed, nonce, "slots")
+        self.assertNotEqual(reels, [JACKPOT_SYMBOL] * 3)
+        self.assertTrue(all(symbol in SLOT_SYMBOLS for symbol in reels))
+    
+    def test_shard_streams_are_independent(self):
+        first = RNGService(self.seed_file, batch_size=8, stream=0)
+        second = RNGService(self.seed_file, batch_size=8, stream=2)
+        self.assertEqual(second.seed_file, 'test_rng_seeds.s2.json')
+        self.assertNotEqual(first.commitment, second.commitment)
+        
+        a, b = first.play("roulette"), second.play("roulette")
+        self.assertEqual((a.nonce, b.nonce), (0, 0))
+        self.assertEqual((round_id(a), round_id(b)), ("s0-0-0", "s2-0-0"))
+        self.assertEqual(parse_round_id(round_id(b)), (2, 0, 0))
+        self.assertEqual(parse_round_id("3-1042"), (None, 3, 1042))
+        
+        # Rotating one stream leaves the others' seeds alone
+        revealed = second.rotate()
+        self.assertEqual(RNGService(self.seed_file, stream=0).commitment, first.commitment)
+        self.assertEqual(replay(bytes.fromhex(revealed["seed"]), b.nonce, "roulette"), b.outcome)
+    
+    def test_corrupt_seed_file(self):
+        with open(self.seed_file, 'w') as f:
+            f.write("{")
+        with self.assertRaises(RuntimeError):
+            RNGService(self.seed_file)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from roulette import RouletteTable, MAX_BETS_PER_PLAYER, color, multiplier, parse_bet
+
+class TestRoulette(unittest.TestCase):
+    def setUp(self):
+        self.table = RouletteTable(1, closes_at=1000)
+    
+    def test_parse_bet(self):
+        self.assertEqual(parse_bet(" Red "), "red")
+        self.assertEqual(parse_bet("07"), "7")
+        self.assertEqual(parse_bet("13-24"), "13-24")
+        self.assertIsNone(parse_bet("37"))
+        self.assertIsNone(parse_bet("green"))
+    
+    def test_multipliers(self):
+        self.assertEqual(multiplier("17"), 36)
+        self.assertEqual(multiplier("1-12"), 3)
+        self.assertEqual(multiplier("black"), 2)
+        self.assertEqual(color(0), "green")
+        self.assertEqual(color(1), "red")
+        self.assertEqual(color(2), "black")
+    
+    def test_settle(self):
+        self.table.place(1, "17", 10)
+        self.table.place(1, "odd", 20)
+        self.table.place(2, "even", 50)
+        self.table.place(3, "13-24", 30)
+        self.assertEqual(len(self.table), 4)
+        
+        results = self.table.settle(17)
+        self.assertEqual(results, {'1': (30, 400), '2': (50, 0), '3': (30, 90)})
+        
+        # Zero loses every outside bet
+        self.assertEqual(self.table.settle(0), {'1': (30, 0), '2': (50, 0), '3': (30, 0)})
+    
+    def test_closed_and_bet_limit(self):
+        for _ in range(MAX_BETS_PER_PLAYER):
+            self.assertTrue(self.table.place(1, "red", 1)[0])
+        self.assertFalse(self.table.place(1, "red", 1)[0])
+        self.table.close()
+        success, error = self.table.place(2, "red", 1)
+        self.assertFalse(success)
+        self.assertEqual(error, "This round is closed!")
+        self.assertEqual(self.table.seconds_left(now=990), 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import asyncio
+import os
+import sys
+import json
+import time
+from datetime import datetime, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scheduler import CronSchedule, Scheduler
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.job_file = 'test_jobs.json'
+        self.scheduler = Scheduler(self.job_file)
+        self.calls = []
+        
+        async def record(**kwargs):
+            self.calls.append(kwargs)
+        self.scheduler.register("record", record)
+    
+    def tearDown(self):
+        for path in (self.job_file, f"{self.job_file}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def test_cron_next_after(self):
+        daily = CronSchedule("0 0 * * *")
+        self.assertEqual(daily.next_after(utc(2024, 1, 1, 0, 0)), utc(2024, 1, 2, 0, 0))
+        self.assertEqual(daily.next_after(utc(2024, 1, 31, 12, 30)), utc(2024, 2, 1, 0, 0))
+        
+        quarter_hours = CronSchedule("*/15 9-17 * * 1-5")
+        # Friday 17:50 -> Monday 09:00
+        self.assertEqual(quarter_hours.next_after(utc(2024, 3, 1, 17, 50)), utc(2024, 3, 4, 9, 0))
+        self.assertEqual(quarter_hours.next_after(utc(2024, 3, 4, 9, 0)), utc(2024, 3, 4, 9, 15))
+        
+        # Restricted day of month and day of week match either
+        self.assertEqual(CronSchedule("0 12 13 * 5").next_after(utc(2024, 9, 1)), utc(2024, 9, 6, 12, 0))
+        self.assertEqual(CronSchedule("30 6 * * 7").next_after(utc(2024, 9, 1, 7)), utc(2024, 9, 8, 6, 30))
+        
+        for expression in ("* * *", "60 * * * *", "0 0 31 2 *"):
+            with self.assertRaises(ValueError):
+                CronSchedule(expression).next_after(utc(2024, 1, 1))
+    
+    def test_due_jobs_run_in_order(self):
+        async def run():
+            now = time.time()
+            self.scheduler.schedule("late", "record", run_at=now - 1, name="late")
+            self.scheduler.schedule("early", "record", run_at=now - 10, name="early")
+            self.scheduler.schedule("future", "record", run_at=now + 3600, name="future")
+            self.scheduler.schedule("cancelled", "record", run_at=now - 5, name="cancelled")
+            self.scheduler.cancel("cancelled")
+            started = self.scheduler.run_due(now)
+            await asyncio.sleep(0)
+            return started
+        
+        self.assertEqual(asyncio.run(run()), 2)
+        self.assertEqual([call["name"] for call in self.calls], ["early", "late"])
+        self.assertEqual(set(self.scheduler.jobs), {"future"})
+    
+    def test_recurring_jobs_reschedule(self):
+        async def run():
+            job = self.scheduler.schedule("tick", "record", every=60)
+            self.scheduler.run_due(job["run_at"])
+            await asyncio.sleep(0)
+            return job
+        
+        job = asyncio.run(run())
+        self.assertEqual(len(self.calls), 1)
+        self.assertGreater(self.scheduler.jobs["tick"]["run_at"], job["run_at"] - 60)
+        self.assertEqual(len(self.scheduler._heap), 1)
+    
+    def test_jobs_survive_restart(self):
+        past = time.time() - 100
+        self.scheduler.schedule("missed", "record", run_at=past, poll=1)
+        self.scheduler.schedule("daily", "record", cron="0 0 * * *")
+        with open(self.job_file) as f:
+            self.assertEqual(len(json.load(f)), 2)
+        
+        restarted = Scheduler(self.job_file)
+        restarted.register("record", self.scheduler._handlers["record"])
+        daily = restarted.jobs["daily"]["run_at"]
+        
+        # Re-registering an unchanged recurring job keeps its due time
+        restarted.schedule("daily", "record", cron="0 0 * * *")
+        self.assertEqual(restarted.jobs["daily"]["run_at"], daily)
+        
+        async def run():
+            restarted.run_due()
+            await asyncio.sleep(0)
+        asyncio.run(run())
+        self.assertEqual(self.calls, [{"poll": 1}])
+    
+    def test_runner_wakes_for_earlier_job(self):
+        async def run():
+            self.scheduler.schedule("later", "record", run_at=time.time() + 3600, name="later")
+            task = self.scheduler.start()
+            await asyncio.sleep(0.01)
+            self.scheduler.schedule("soon", "record", run_at=time.time() + 0.05, name="soon")
+            for _ in range(100):
+                if self.calls:
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+        
+        asyncio.run(run())
+        self.assertEqual(self.calls, [{"name": "soon"}])
+    
+    def test_many_pending_jobs(self):
+        async def run():
+            now = time.time()
+            for i in range(10000):
+                self.scheduler.schedule(f"job{i}", "record", run_at=now + 3600 + i, index=i)
+            # Replacing jobs leaves stale heap entries that are skipped
+            for i in range(0, 10000, 2):
+                self.scheduler.schedule(f"job{i}", "record", run_at=now - 1, index=i)
+            started = self.scheduler.run_due(now)
+            await asyncio.sleep(0)
+            return started
+        
+        self.assertEqual(asyncio.run(run()), 5000)
+        self.assertEqual(len(self.calls), 5000)
+        self.assertEqual(len(self.scheduler.jobs), 5000)
+    
+    def test_failing_job_is_counted(self):
+        async def fail():
+            raise RuntimeError("boom")
+        self.scheduler.register("fail", fail)
+        
+        async def run():
+            self.scheduler.schedule("fail", "fail", run_at=0)
+            self.scheduler.schedule("unknown", "missing", run_at=0)
+            self.scheduler.run_due()
+            await asyncio.sleep(0)
+        
+        asyncio.run(run())
+        self.assertEqual(self.scheduler.stats()["failures"], 2)
+        self.assertEqual(self.scheduler.stats()["pending"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
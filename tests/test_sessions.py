@@ -0,0 +1,85 @@
+import unittest
+import asyncio
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sessions import SessionStore
+
+class TestSessions(unittest.TestCase):
+    def setUp(self):
+        self.session_file = 'test_sessions.json'
+        self.evicted = []
+        
+        async def on_evict(key, session):
+            self.evicted.append((key, session))
+        self.on_evict = on_evict
+    
+    def tearDown(self):
+        for path in (self.session_file, f"{self.session_file}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _store(self, **kwargs):
+        return SessionStore(self.session_file, on_evict=self.on_evict, save_delay=0, **kwargs)
+    
+    def test_ttl_expiry(self):
+        async def run():
+            store = self._store(ttl=10)
+            store.put("1", {"hand": 1}, now=100)
+            store.put("2", {"hand": 2}, now=105)
+            self.assertEqual(store.get("1", now=109), {"hand": 1})
+            
+            # get renewed "1", so "2" expires first
+            self.assertIsNone(store.get("2", now=115))
+            self.assertEqual(store.evict_expired(now=115), 1)
+            self.assertEqual(store.evict_expired(now=120), 1)
+            await asyncio.sleep(0)
+            return store
+        
+        store = asyncio.run(run())
+        self.assertEqual(len(store), 0)
+        self.assertEqual([key for key, _ in self.evicted], ["2", "1"])
+    
+    def test_bounded(self):
+        async def run():
+            store = self._store(max_sessions=2)
+            for key in ("1", "2", "3"):
+                store.put(key, {"hand": key})
+            await asyncio.sleep(0)
+            return store
+        
+        store = asyncio.run(run())
+        self.assertEqual(len(store), 2)
+        self.assertNotIn("1", store)
+        self.assertEqual(self.evicted, [("1", {"hand": "1"})])
+    
+    def test_replacing_expired_session_settles_it(self):
+        async def run():
+            store = self._store(ttl=10)
+            store.put("1", {"hand": "old"}, now=0)
+            self.assertIsNone(store.get("1", now=20))
+            store.put("1", {"hand": "new"}, now=20)
+            await asyncio.sleep(0)
+        
+        asyncio.run(run())
+        self.assertEqual(self.evicted, [("1", {"hand": "old"})])
+    
+    def test_sessions_survive_restart(self):
+        async def run():
+            store = self._store()
+            store.put("1", {"hand": [1, 2]})
+            store.put("2", {"hand": [3]})
+            store.get("1")["hand"].append(5)
+            store.changed()
+            store.pop("2")
+            await asyncio.sleep(0.05)
+        
+        asyncio.run(run())
+        restarted = self._store()
+        self.assertEqual(len(restarted), 1)
+        self.assertEqual(restarted.get("1"), {"hand": [1, 2, 5]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import events
+from chip_manager import ChipManager
+from claims import ClaimStore
+from jackpot import JackpotPool
+from game_stats import GameStats
+from economy_stats import EconomyStats
+from events import EventBus
+from leaderboard import LeaderboardCache
+from ledger import Ledger
+from poll_manager import PollManager
+from raffle import RaffleManager, TicketTree
+from persistence import PersistenceWorker
+from balance_history import BalanceHistory
+from state_service import StateService, StateClient, RemoteChipManager, RemoteManager
+
+class TestStateService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, 'state.sock')
+        
+        # Reset the singleton instances for clean tests
+        ChipManager._instance = None
+        PollManager._instance = None
+        RaffleManager._instance = None
+        with patch.object(ChipManager, '_initialize'), patch.object(PollManager, '_initialize'), \
+                patch.object(RaffleManager, '_initialize'):
+            self.chip_manager = ChipManager()
+            self.poll_manager = PollManager()
+            self.raffle_manager = RaffleManager()
+        self.chip_manager.users = {'123456': 1000, '789012': 500}
+        self.chip_manager.default_chips = 1000
+        self.chip_manager.chip_file = os.path.join(self.tmp.name, 'chips.json')
+        self.chip_manager.ledger = Ledger(os.path.join(self.tmp.name, 'ledger.bin'))
+        self.chip_manager.events = EventBus()
+        self.chip_manager.leaderboard = LeaderboardCache()
+        self.chip_manager.stats = EconomyStats()
+        self.chip_manager.claims = ClaimStore(os.path.join(self.tmp.name, 'claims.bin'))
+        self.chip_manager.jackpot = JackpotPool(os.path.join(self.tmp.name, 'jackpot.json'))
+        self.chip_manager.game_stats = GameStats(os.path.join(self.tmp.name, 'game_stats.bin'))
+        self.chip_manager.history = BalanceHistory(os.path.join(self.tmp.name, 'balance_history.db'))
+        self.chip_manager.persistence = PersistenceWorker("chips", self.chip_manager._save_chips_sync)
+        self.chip_manager._tasks = []
+        self.chip_manager._progress = {}
+        self.chip_manager._unsaved = {}
+        self.chip_manager._saved = dict(self.chip_manager.users)
+        self.poll_manager.poll_data = {}
+        self.poll_manager.poll_file = os.path.join(self.tmp.name, 'poll.json')
+        self.poll_manager.persistence = PersistenceWorker("polls", self.poll_manager._save_poll_sync)
+        self.raffle_manager.raffle_file = os.path.join(self.tmp.name, 'raffle.json')
+        self.raffle_manager.raffle_data = {}
+        self.raffle_manager._slots = {}
+        self.raffle_manager._tree = TicketTree()
+    
+    def tearDown(self):
+        self.chip_manager.persistence.close()
+        self.poll_manager.persistence.close()
+        ChipManager._instance = None
+        PollManager._instance = None
+        RaffleManager._instance = None
+        self.tmp.cleanup()
+    
+    async def _with_service(self, scenario):
+        service = StateService(self.socket_path, self.chip_manager, self.poll_manager, self.raffle_manager)
+        server = asyncio.create_task(service.serve_forever())
+        while not os.path.exists(self.socket_path):
+            await asyncio.sleep(0.01)
+        client = StateClient(self.socket_path)
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+            server.cancel()
+    
+    def test_remote_calls_are_pipelined(self):
+        async def scenario(client):
+            chips = RemoteChipManager(client)
+            # Many requests in flight on one connection
+            results = await asyncio.gather(*(chips.add_chips('123456', 1) for _ in range(100)))
+            balance = await chips.get_chips('123456')
+            entries, total = await chips.get_history('123456', 0, 5)
+            return results, balance, entries, total
+        
+        results, balance, entries, total = asyncio.run(self._with_service(scenario))
+        self.assertTrue(all(results))
+        self.assertEqual(balance, 1100)
+        self.assertEqual(total, 100)
+        self.assertEqual(entries[0].balance, 1100)
+    
+    def test_polls_and_errors(self):
+        async def scenario(client):
+            polls = RemoteManager(client, "polls")
+            created = await polls.create_poll("Question", "A", "B")
+            data = await polls.get_poll_data()
+            # Private methods are rejected by the service
+            with self.assertRaises(RuntimeError):
+                await client.call("polls", "_save_poll")
+            with self.assertRaises(RuntimeError):
+                await polls.missing_method()
+            return created, data
+        
+        created, data = asyncio.run(self._with_service(scenario))
+        self.assertEqual(created, [True, None])
+        self.assertEqual(data["question"], "Question")
+    
+    def test_bulk_jobs(self):
+        export_file = os.path.join(self.tmp.name, 'balances.csv')
+        
+        async def scenario(client):
+            chips = client.chip_manager()
+            # Progress is asked for separately instead of being passed along
+            count = await chips.export_data('balances', export_file, 'csv')
+            return count, await chips.get_progress(export_file)
+        
+        self.assertEqual(asyncio.run(self._with_service(scenario)), (2, None))
+    
+    def test_raffles(self):
+        async def scenario(client):
+            raffles = client.raffle_manager()
+            other_shard = StateClient(self.socket_path)
+            try:
+                await raffles.start_raffle(10, 1)
+                # Tickets bought through any shard end up in the one raffle
+                await asyncio.gather(raffles.add_tickets('123456', 3, 30), other_shard.raffle_manager().add_tickets('789012', 2, 20))
+                raffle = await raffles.get_raffle('123456')
+                return raffle, await raffles.draw_raffle([4])
+            finally:
+                await other_shard.close()
+        
+        raffle, (success, pot, prizes) = asyncio.run(self._with_service(scenario))
+        self.assertEqual((raffle["tickets"], raffle["own"]), (5, 3))
+        self.assertEqual((success, pot, prizes), (True, 50, {'789012': 50}))
+    
+    def test_events_are_forwarded(self):
+        async def scenario(client):
+            chips = RemoteChipManager(client)
+            queue = chips.events.subscribe()
+            await client.subscribe_events()
+            await chips.transfer_chips('123456', '789012', 100)
+            return await asyncio.wait_for(queue.get(), 1)
+        
+        event = asyncio.run(self._with_service(scenario))
+        self.assertEqual(event.kind, events.PAYMENT_RECEIVED)
+        self.assertEqual(event.user_id, '789012')
+        self.assertEqual(event.counterparty, '123456')
+    
+    def test_large_replies_and_unsendable_requests(self):
+        self.chip_manager.users.update({str(1_000_000 + i): 0 for i in range(20000)})
+        
+        async def scenario(client):
+            chips = RemoteChipManager(client)
+            broke = await chips.get_broke_users()
+            # A request that can't be encoded fails alone and leaves nothing pending
+            with self.assertRaises(TypeError):
+                await chips.add_chips('123456', object())
+            self.assertEqual(client._pending, {})
+            return len(broke), await chips.get_chips('123456')
+        
+        self.assertEqual(asyncio.run(self._with_service(scenario)), (20000, 1000))
+    
+    def test_guild_partitions(self):
+        async def scenario(client):
+            with patch.dict(os.environ, {'GUILD_DATA_DIR': self.tmp.name, 'GLOBAL_ECONOMY': 'False'}):
+                guild_chips = client.chip_manager(111)
+                self.assertIs(guild_chips, client.chip_manager(111))
+                await guild_chips.add_chips('123456', 5)
+                return await guild_chips.get_chips('123456'), await client.chip_manager().get_chips('123456')
+        
+        try:
+            self.assertEqual(asyncio.run(self._with_service(scenario)), (1005, 1000))
+        finally:
+            ChipManager._partitions = {}
+    
+    def test_global_economy_shares_one_proxy(self):
+        client = StateClient(self.socket_path)
+        with patch.dict(os.environ, {'GLOBAL_ECONOMY': 'True'}):
+            self.assertIs(client.chip_manager(111), client.chip_manager())
+            self.assertIs(client.chip_manager(222), client.chip_manager())
+            self.assertIs(client.poll_manager(111), client.poll_manager())
+            self.assertEqual(client.chip_manager(111)._target, "chips")
+
+if __name__ == '__main__':
+    unittest.main()
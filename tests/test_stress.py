@@ -0,0 +1,74 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.stress_economy import run_stress, legacy_bet
+from chip_manager import ChipManager
+from poll_manager import PollManager, buy_bet
+import ledger
+
+class TestStress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_concurrent_operations_conserve_chips(self):
+        stress, elapsed, violations = run_stress(self.tmp.name, 3000, seed=1)
+        self.assertEqual(violations, [])
+        self.assertGreater(stress.counts["poll_bet"], 0)
+        self.assertGreater(stress.counts["settle_poll"], 0)
+    
+    def test_slow_disk_conserves_chips(self):
+        stress, elapsed, violations = run_stress(self.tmp.name, 256, disk_delay=0.001, seed=2)
+        self.assertEqual(violations, [])
+    
+    def test_detects_old_bet_overspend(self):
+        # Checking the balance before placing the bet and debiting afterwards lets bets spend the same chips twice
+        stress, elapsed, violations = run_stress(self.tmp.name, 3000, seed=3, bet=legacy_bet)
+        self.assertTrue(any("appeared from nowhere" in violation for violation in violations))
+    
+    def test_buy_bet_refunds_refused_bet(self):
+        previous = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            chip_manager = object.__new__(ChipManager)
+            chip_manager._initialize("refund")
+            chip_manager.users = {}
+            poll_manager = object.__new__(PollManager)
+            poll_manager._initialize("refund")
+            
+            async def run():
+                # No poll is open, so the bet is refused and the chips come back
+                success, error = await buy_bet(chip_manager, poll_manager, "1", "Red", 100)
+                self.assertFalse(success)
+                self.assertEqual(error, "There is no active poll!")
+                self.assertEqual(await chip_manager.get_chips("1"), 1000)
+                entries, _ = await chip_manager.get_history("1")
+                self.assertEqual([(e.reason, e.delta) for e in entries], [(ledger.POLL_REFUND, 100), (ledger.POLL_BET, -100)])
+                
+                await poll_manager.create_poll("Who wins?", "Red", "Blue")
+                success, error = await buy_bet(chip_manager, poll_manager, "1", "Red", 2000)
+                self.assertFalse(success)
+                self.assertEqual(error, "You don't have enough chips!")
+                
+                # Two bets racing for the same chips: only one can be paid for
+                results = await asyncio.gather(buy_bet(chip_manager, poll_manager, "1", "Red", 600),
+                                               buy_bet(chip_manager, poll_manager, "1", "Red", 600))
+                self.assertEqual(sorted(success for success, _ in results), [False, True])
+                self.assertEqual(await chip_manager.get_chips("1"), 400)
+                self.assertEqual(poll_manager.poll_data["total_bets"], 600)
+            
+            asyncio.run(run())
+            chip_manager.persistence.close()
+            poll_manager.persistence.close()
+        finally:
+            os.chdir(previous)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import os
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tiered_store import TieredStore
+
+class PausingWriter:
+    """Connection wrapper that runs a callback between a flush's write and its commit"""
+    def __init__(self, connection, during_flush):
+        self.connection = connection
+        self.during_flush = during_flush
+
+    def executemany(self, *args):
+        result = self.connection.executemany(*args)
+        self.during_flush()
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+class TestTieredStore(unittest.TestCase):
+    def setUp(self):
+        self.test_file = 'test_chips.db'
+        self._remove_files()
+        self.store = TieredStore(self.test_file, max_users=2, ttl=60)
+        self.store.update_many([('123456', 1000), ('789012', 500), ('345678', 0)])
+    
+    def tearDown(self):
+        self.store._reader.close()
+        self.store._writer.close()
+        self._remove_files()
+    
+    def _remove_files(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.test_file + suffix):
+                os.remove(self.test_file + suffix)
+    
+    def test_page_in_on_access(self):
+        self.assertEqual(self.store['123456'], 1000)
+        self.assertEqual(self.store['123456'], 1000)
+        self.assertNotIn('999999', self.store)
+        
+        stats = self.store.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['hot_users'], 1)
+    
+    def test_lru_eviction_keeps_dirty_values(self):
+        self.store['123456'] = 1500
+        self.assertEqual(self.store['789012'], 500)
+        self.assertEqual(self.store['345678'], 0)  # Evicts the dirty 123456
+        
+        self.assertEqual(self.store.stats()['hot_users'], 2)
+        self.assertEqual(self.store.stats()['evictions'], 1)
+        # The evicted value is not lost before it is written back
+        self.assertEqual(self.store['123456'], 1500)
+        
+        self.assertEqual(self.store.flush(), 1)
+        reopened = TieredStore(self.test_file)
+        self.assertEqual(reopened['123456'], 1500)
+        reopened._reader.close()
+        reopened._writer.close()
+    
+    def test_ttl_eviction(self):
+        self.store['999999'] = 42
+        self.store._hot['999999'][1] = time.monotonic() - 120
+        self.assertEqual(self.store.evict_expired(), 1)
+        self.assertEqual(self.store.stats()['hot_users'], 0)
+        self.assertEqual(self.store['999999'], 42)
+    
+    def test_items_without_paging_in(self):
+        self.store['123456'] = 2000
+        self.store['555555'] = 10
+        items = dict(self.store.items())
+        self.assertEqual(items, {'123456': 2000, '789012': 500, '345678': 0, '555555': 10})
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.stats()['hot_users'], 2)
+
+    def test_flush_keeps_rows_in_flight_until_commit(self):
+        self.store.max_users = 1
+        self.store['123456'] = 1
+        self.store.flush()
+        self.store['123456'] = 500
+        seen = []
+
+        def during_flush():
+            # Evicts the just-cleaned user and pages them back in before the commit
+            self.assertEqual(self.store['789012'], 500)
+            seen.append(self.store['123456'])
+
+        writer = self.store._writer
+        self.store._writer = PausingWriter(writer, during_flush)
+        self.store.flush()
+        self.store._writer = writer
+        self.assertEqual(seen, [500])
+        self.assertEqual(self.store['123456'], 500)
+        self.assertEqual(self.store._reader.execute("SELECT chips FROM chips WHERE user_id = '123456'").fetchone()[0], 500)
+
+    def test_replace_many(self):
+        self.store['123456'] = 1500
+        self.assertEqual(self.store['789012'], 500)
+        
+        def chunks():
+            yield [('123456', 1), ('345678', 3)]
+            # Nothing is visible before the commit, and a user paged in meanwhile gets the new balance too
+            self.assertEqual(self.store['345678'], 0)
+            self.assertEqual(self.store['789012'], 500)
+            yield [('789012', 2), ('999999', 9)]
+        
+        changes = []
+        self.store.replace_many(chunks(), changes.append)
+        self.assertEqual(changes, [[('123456', 1500, 1), ('345678', 0, 3)], [('789012', 500, 2), ('999999', None, 9)]])
+        self.assertEqual([self.store[user_id] for user_id in ('123456', '345678', '789012', '999999')], [1, 3, 2, 9])
+        # The balance that was parked before the import is not written over it
+        self.store.flush()
+        self.assertEqual(dict(self.store._reader.execute('SELECT user_id, chips FROM chips')),
+                         {'123456': 1, '345678': 3, '789012': 2, '999999': 9})
+    
+    def test_delete(self):
+        self.store['123456'] = 2000
+        del self.store['123456']
+        self.assertNotIn('123456', self.store)
+        with self.assertRaises(KeyError):
+            del self.store['123456']
+
+if __name__ == '__main__':
+    unittest.main()
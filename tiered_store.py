@@ -0,0 +1,258 @@
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class TieredStore(MutableMapping):
+    """Balance mapping that keeps only recently used users in memory.
+
+    Cold users live in an SQLite table and are paged in transparently on
+    access. Changed balances stay dirty in memory until ``flush`` writes
+    them back; dirty users that get evicted are parked until then, and
+    balances being written stay in flight until their commit returns.
+    """
+
+    def __init__(self, db_file='chips.db', max_users=100000, ttl=3600):
+        self.db_file = db_file
+        self.max_users = max_users
+        self.ttl = ttl
+        self._hot = OrderedDict()  # user_id -> [chips, last access]
+        self._dirty = set()
+        self._parked = {}  # evicted dirty users waiting for write-back
+        self._inflight = {}  # balances written by a flush that has not committed yet
+        self._paged = None  # users read from the table while replace_many runs
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+
+        self._writer = sqlite3.connect(db_file, check_same_thread=False)
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        self._writer.execute('CREATE TABLE IF NOT EXISTS chips (user_id TEXT PRIMARY KEY, chips INTEGER NOT NULL)')
+        self._writer.commit()
+        self._reader = sqlite3.connect(db_file, check_same_thread=False)
+
+    def _page_in(self, user_id):
+        """Return the cached entry for a user, loading it from disk if needed"""
+        with self._lock:
+            entry = self._hot.get(user_id)
+            if entry is not None:
+                self.hits += 1
+                entry[1] = time.monotonic()
+                self._hot.move_to_end(user_id)
+                return entry
+            self.misses += 1
+            if user_id in self._parked:
+                chips = self._parked.pop(user_id)
+                self._dirty.add(user_id)
+            elif user_id in self._inflight:
+                # The table may still hold an older balance until the flush commits
+                chips = self._inflight[user_id]
+            else:
+                row = self._reader.execute('SELECT chips FROM chips WHERE user_id = ?', (user_id,)).fetchone()
+                if self._paged is not None:
+                    self._paged.add(user_id)
+                if row is None:
+                    return None
+                chips = row[0]
+            entry = self._hot[user_id] = [chips, time.monotonic()]
+            self._evict_overflow()
+            return entry
+
+    def _evict(self, user_id):
+        chips, _ = self._hot.pop(user_id)
+        if user_id in self._dirty:
+            self._dirty.discard(user_id)
+            self._parked[user_id] = chips
+        self.evictions += 1
+
+    def _evict_overflow(self):
+        while len(self._hot) > self.max_users:
+            self._evict(next(iter(self._hot)))
+
+    def evict_expired(self):
+        """Drop users that have not been touched within the TTL"""
+        cutoff = time.monotonic() - self.ttl
+        evicted = 0
+        with self._lock:
+            # Entries are kept in access order, so expired ones are at the front
+            while self._hot:
+                user_id, (_, last_access) = next(iter(self._hot.items()))
+                if last_access > cutoff:
+                    break
+                self._evict(user_id)
+                evicted += 1
+        return evicted
+
+    def __getitem__(self, user_id):
+        entry = self._page_in(user_id)
+        if entry is None:
+            raise KeyError(user_id)
+        return entry[0]
+
+    def __setitem__(self, user_id, chips):
+        with self._lock:
+            entry = self._hot.get(user_id)
+            if entry is None:
+                self._parked.pop(user_id, None)
+                self._hot[user_id] = [chips, time.monotonic()]
+                self._evict_overflow()
+            else:
+                entry[0] = chips
+                entry[1] = time.monotonic()
+                self._hot.move_to_end(user_id)
+            if user_id in self._hot:
+                self._dirty.add(user_id)
+            else:
+                self._parked[user_id] = chips
+
+    def __delitem__(self, user_id):
+        # Same lock order as flush: the write lock first, then the cache lock
+        with self._write_lock:
+            with self._lock:
+                if user_id not in self:
+                    raise KeyError(user_id)
+                self._hot.pop(user_id, None)
+                self._dirty.discard(user_id)
+                self._parked.pop(user_id, None)
+                self._writer.execute('DELETE FROM chips WHERE user_id = ?', (user_id,))
+                self._writer.commit()
+
+    def __contains__(self, user_id):
+        return self._page_in(user_id) is not None
+
+    def _overrides(self):
+        """Balances held in memory that are newer than the table"""
+        with self._lock:
+            overrides = dict(self._inflight)
+            overrides.update(self._parked)
+            for user_id in self._dirty:
+                overrides[user_id] = self._hot[user_id][0]
+            return overrides
+
+    def items(self):
+        """Iterate every user without pulling cold users into memory"""
+        overrides = self._overrides()
+        for user_id, chips in self._reader.execute('SELECT user_id, chips FROM chips'):
+            yield user_id, overrides.pop(user_id, chips)
+        yield from overrides.items()
+
+    def __iter__(self):
+        for user_id, _ in self.items():
+            yield user_id
+
+    def __len__(self):
+        overrides = self._overrides()
+        count = self._reader.execute('SELECT COUNT(*) FROM chips').fetchone()[0]
+        for user_id in overrides:
+            if self._reader.execute('SELECT 1 FROM chips WHERE user_id = ?', (user_id,)).fetchone() is None:
+                count += 1
+        return count
+
+    def update_many(self, balances):
+        """Bulk-load balances straight into the table, bypassing the cache"""
+        with self._write_lock:
+            self._writer.executemany('INSERT OR REPLACE INTO chips (user_id, chips) VALUES (?, ?)', balances)
+            self._writer.commit()
+
+    def replace_many(self, chunks, changed=None):
+        """Set the balances of many users in one transaction that readers see all at once.
+
+        ``chunks`` yields lists of (user id, chips), each user at most once, and
+        ``changed`` gets every chunk as (user id, previous chips or None, chips)
+        before any of it is visible. Callers keep other writers out meanwhile.
+        """
+        with self._write_lock:
+            with self._lock:
+                overrides = self._overrides()
+                self._paged = set()
+            # Imported balances of users that are in memory, put there when the transaction commits
+            cached = {}
+            try:
+                for chunk in chunks:
+                    if changed is not None:
+                        marks = ",".join("?" * len(chunk))
+                        previous = dict(self._writer.execute(f'SELECT user_id, chips FROM chips WHERE user_id IN ({marks})',
+                                                             [user_id for user_id, _ in chunk]))
+                        changed([(user_id, overrides[user_id] if user_id in overrides else previous.get(user_id), chips)
+                                 for user_id, chips in chunk])
+                    self._writer.executemany('INSERT OR REPLACE INTO chips (user_id, chips) VALUES (?, ?)', chunk)
+                    with self._lock:
+                        cached.update((user_id, chips) for user_id, chips in chunk if user_id in self._hot or user_id in self._parked)
+                with self._lock:
+                    # Users read since their chunk was written hold the balance from before the import
+                    for user_id in self._paged:
+                        row = self._writer.execute('SELECT chips FROM chips WHERE user_id = ?', (user_id,)).fetchone()
+                        if row is not None:
+                            cached[user_id] = row[0]
+                    self._writer.commit()
+                    for user_id, chips in cached.items():
+                        entry = self._hot.get(user_id)
+                        if entry is not None:
+                            entry[0] = chips
+                            self._dirty.discard(user_id)
+                        else:
+                            self._parked.pop(user_id, None)
+            except Exception:
+                self._writer.rollback()
+                raise
+            finally:
+                with self._lock:
+                    self._paged = None
+
+    def flush(self):
+        """Write all dirty balances back to disk in one transaction"""
+        with self._write_lock:
+            with self._lock:
+                rows = list(self._parked.items())
+                rows.extend((user_id, self._hot[user_id][0]) for user_id in self._dirty)
+                self._parked = {}
+                self._dirty = set()
+                self._inflight = dict(rows)
+            if rows:
+                try:
+                    self._writer.executemany('INSERT OR REPLACE INTO chips (user_id, chips) VALUES (?, ?)', rows)
+                    self._writer.commit()
+                except Exception:
+                    # Keep the rows dirty so the next flush retries them
+                    with self._lock:
+                        for user_id, chips in self._inflight.items():
+                            if user_id in self._hot:
+                                self._dirty.add(user_id)
+                            elif user_id not in self._parked:
+                                self._parked[user_id] = chips
+                    raise
+                finally:
+                    with self._lock:
+                        self._inflight = {}
+                self.writebacks += len(rows)
+            return len(rows)
+
+    def stats(self):
+        """Cache metrics for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "hot_users": len(self._hot),
+            "dirty_users": len(self._dirty) + len(self._parked),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "writebacks": self.writebacks,
+        }
+
+    async def run_maintenance(self, interval=60):
+        """Periodically evict idle users and write back dirty balances"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.evict_expired()
+                await loop.run_in_executor(None, self.flush)
+            except Exception as e:
+                print(f"Error in chip store maintenance: {e}")
@@ -1,13 +1,17 @@
 import discord
-import random
 from discord import Interaction
 
+import blackjack
+import responses
+from rng import round_id, JACKPOT_SYMBOL
+
 class SlotsView(discord.ui.View):
-    def __init__(self, user_id: int, bet: int, chip_manager, superuser=None, superuser_always_win=False):
+    def __init__(self, user_id: int, bet: int, chip_manager, superuser=None, superuser_always_win=False, rng=None):
         super().__init__(timeout=600)  # Views timeout after 10 minutes
         self.user_id = user_id
         self.bet = bet
         self.chip_manager = chip_manager
+        self.rng = rng
         self.superuser = superuser
         self.superuser_always_win = superuser_always_win
         # Set custom ID for persistence
@@ -21,42 +25,34 @@ class SlotsView(discord.ui.View):
             return
         
         # Process slot spin using shared logic
-        result, is_win, winnings, embed = await self._process_spin(interaction.user.id)
+        result, is_win, winnings, embed = await self._process_spin(interaction.user.id, interaction.locale)
         await interaction.response.send_message(embed=embed, view=self, ephemeral=True)
     
-    async def _process_spin(self, user_id):
+    async def _process_spin(self, user_id, locale=None):
         """Shared logic for processing a slots spin"""
         # Generate slots result
-        result = [random.choice(["🍒", "🍋", "🍊", "🍇", "🍉", "🍌", "🍓"]) for _ in range(3)]
+        game_round = self.rng.play("slots_v2")
+        result = game_round.outcome
         
         # Superuser always win logic
         if str(user_id) == self.superuser and self.superuser_always_win:
             result = ["🍉", "🍉", "🍉"]
 
-        # Calculate winnings
-        is_win = False
-        winnings = 0
-        
+        # Calculate the multiplier of the bet paid back
         if result[0] == result[1] == result[2]:
-            await self.chip_manager.add_chips(user_id, self.bet * 15)
-            embed = discord.Embed(title="Slots", 
-                                 description=f"Result: {' '.join(result)}!\nYou won {self.bet * 14} chips!", 
-                                 color=0x00ff00)
-            is_win = True
-            winnings = self.bet * 14
+            multiplier = 15
         elif result[0] == result[1] or result[1] == result[2]:
-            await self.chip_manager.add_chips(user_id, self.bet * 3)
-            embed = discord.Embed(title="Slots", 
-                                 description=f"Result: {' '.join(result)}!\nYou won {self.bet * 2} chips!", 
-                                 color=0x00ff00)
-            is_win = True
-            winnings = self.bet * 2
+            multiplier = 3
         else:
-            embed = discord.Embed(title="Slots", 
-                                 description=f"Result: {' '.join(result)}!\nYou lost {self.bet} chips!", 
-                                 color=0xff0000)
-            is_win = False
-            winnings = 0
+            multiplier = 0
+
+        # Every spin feeds the progressive jackpot from its bet, and the rest is paid; three diamonds win the pool
+        payout, jackpot_won, jackpot = await self.chip_manager.spin_jackpot(user_id, self.bet, multiplier, result == [JACKPOT_SYMBOL] * 3)
+        is_win = multiplier > 0
+        winnings = payout - self.bet if is_win else 0
+        embed = responses.slots_embed(result, is_win, winnings if is_win else self.bet, round_id(game_round), jackpot, jackpot_won, locale)
+        winnings += jackpot_won
+        await self.chip_manager.record_game(user_id, "slots", self.bet, payout + jackpot_won)
         
         return result, is_win, winnings, embed
         
@@ -73,12 +69,192 @@ class SlotsView(discord.ui.View):
                 return
             
             # Process spin using shared logic
-            result, is_win, winnings, embed = await self._process_spin(interaction.user.id)
+            result, is_win, winnings, embed = await self._process_spin(interaction.user.id, interaction.locale)
             
             # Create a new view for the next spin
-            new_view = SlotsView(interaction.user.id, self.bet, self.chip_manager, self.superuser, self.superuser_always_win)
+            new_view = SlotsView(interaction.user.id, self.bet, self.chip_manager, self.superuser, self.superuser_always_win, self.rng)
             await interaction.response.send_message(embed=embed, view=new_view, ephemeral=True)
             
         except Exception as e:
             print(f"Error in spin_button: {e}")
-            await interaction.response.send_message("An error occurred while processing your spin.", ephemeral=True)
\ No newline at end of file
+            await interaction.response.send_message("An error occurred while processing your spin.", ephemeral=True)
+
+class LeaderboardView(discord.ui.View):
+    def __init__(self, user_id: int, render_page, page: int, pages: int, user_rank=None, per_page: int = 10):
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.render_page = render_page
+        self.page = page
+        self.pages = pages
+        self.user_rank = user_rank
+        self.per_page = per_page
+        self._update_buttons()
+    
+    def _update_buttons(self):
+        self.previous_button.disabled = self.page <= 0
+        self.next_button.disabled = self.page >= self.pages - 1
+        self.me_button.disabled = self.user_rank is None
+    
+    async def _show(self, interaction: Interaction, page: int):
+        """Render a page (served from the page cache when possible) and update the message"""
+        try:
+            embed, self.pages = await self.render_page(page)
+            self.page = min(page, self.pages - 1)
+            self._update_buttons()
+            await interaction.response.edit_message(embed=embed, view=self)
+        except Exception as e:
+            print(f"Error in leaderboard view: {e}")
+            await interaction.response.send_message("An error occurred while retrieving the leaderboard.", ephemeral=True)
+    
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.grey)
+    async def previous_button(self, interaction: Interaction, button: discord.ui.Button):
+        await self._show(interaction, max(0, self.page - 1))
+    
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.grey)
+    async def next_button(self, interaction: Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+    
+    @discord.ui.button(label="My Position", style=discord.ButtonStyle.green)
+    async def me_button(self, interaction: Interaction, button: discord.ui.Button):
+        await self._show(interaction, (self.user_rank - 1) // self.per_page)
+
+BLACKJACK_OUTCOMES = {
+    "blackjack": ("Blackjack! You won {profit} chips!", 0x00ff00),
+    "win": ("You won {profit} chips!", 0x00ff00),
+    "push": ("Push! Your {stake} chips were returned.", 0xffff00),
+    "lose": ("The dealer wins. You lost {stake} chips!", 0xff0000),
+    "bust": ("Bust! You lost {stake} chips!", 0xff0000),
+}
+
+def blackjack_embed(session, outcome=None, payout=0):
+    """Render a hand; the dealer's hole card stays hidden until the hand is over"""
+    stake = blackjack.stake(session)
+    if outcome is None:
+        dealer = f"{blackjack.card_name(session['dealer'][0])} ??"
+        description = f"Bet: {stake} chips"
+        color = 0x00ff00
+    else:
+        dealer = f"{' '.join(blackjack.card_name(c) for c in session['dealer'])} ({blackjack.hand_value(session['dealer'])[0]})"
+        message, color = BLACKJACK_OUTCOMES[outcome]
+        description = message.format(profit=payout - stake, stake=stake)
+    embed = discord.Embed(title="Blackjack", description=description, color=color)
+    embed.add_field(name="Your hand", 
+                    value=f"{' '.join(blackjack.card_name(c) for c in session['player'])} ({blackjack.hand_value(session['player'])[0]})", 
+                    inline=False)
+    embed.add_field(name="Dealer", value=dealer, inline=False)
+    embed.set_footer(text=f"Round {session['round']}")
+    return embed
+
+SPARK_LEVELS = "▁▂▃▄▅▆▇█"
+
+def sparkline(points, since, until, width=40):
+    """One character per time slice showing the balance at its end; starts at the first known balance"""
+    columns = []
+    index = 0
+    balance = points[0][1]
+    for column in range(width):
+        end = since + (until - since) * (column + 1) / width
+        while index < len(points) and points[index][0] <= end:
+            balance = points[index][1]
+            index += 1
+        columns.append(balance)
+    low, high = min(columns), max(columns)
+    top = len(SPARK_LEVELS) - 1
+    return "".join(SPARK_LEVELS[(value - low) * top // (high - low) if high > low else top // 2] for value in columns)
+
+def history_embed(title, points, since, until, current=None):
+    """Render (timestamp, balance) samples as a sparkline with the start, end and range of the balance"""
+    points = [tuple(point) for point in points]
+    if current is not None:
+        points.append((until, current))
+    balances = [balance for _, balance in points]
+    embed = discord.Embed(title=title, description=f"```{sparkline(points, since, until)}```", color=0x00ff00)
+    embed.add_field(name="Start", value=f"{balances[0]} chips (<t:{points[0][0]}:R>)", inline=True)
+    embed.add_field(name="Now", value=f"{balances[-1]} chips", inline=True)
+    embed.add_field(name="Change", value=f"{balances[-1] - balances[0]:+} chips", inline=True)
+    embed.add_field(name="Low / High", value=f"{min(balances)} / {max(balances)} chips", inline=True)
+    embed.set_footer(text=f"{len(points)} samples")
+    return embed
+
+class BlackjackView(discord.ui.View):
+    # Users whose last button click is still being played; shared by every view of a hand
+    _pending = set()
+    
+    def __init__(self, user_id: int, chip_manager, sessions):
+        super().__init__(timeout=600)
+        self.user_id = user_id
+        self.chip_manager = chip_manager
+        self.sessions = sessions
+        session = sessions.get(str(user_id))
+        self.double_button.disabled = session is None or not blackjack.can_double(session)
+    
+    async def _act(self, interaction: Interaction, action):
+        """Apply an action to the hand in the session store, settling it once it is over"""
+        try:
+            if interaction.user.id != self.user_id:
+                await interaction.response.send_message("You cannot use this button!", ephemeral=True)
+                return
+            
+            key = str(self.user_id)
+            if key in self._pending:
+                await interaction.response.send_message("Your last move is still being played!", ephemeral=True)
+                return
+            self._pending.add(key)
+            try:
+                await self._play(interaction, key, action)
+            finally:
+                self._pending.discard(key)
+        except Exception as e:
+            print(f"Error in blackjack view: {e}")
+            await interaction.response.send_message("An error occurred while playing your hand.", ephemeral=True)
+    
+    async def _play(self, interaction: Interaction, key, action):
+        session = self.sessions.get(key)
+        if session is None or session["finished"]:
+            await interaction.response.edit_message(content="This hand is already over.", view=None)
+            return
+        
+        if action == "double":
+            if not blackjack.can_double(session):
+                await interaction.response.send_message("You can only double on your first two cards!", ephemeral=True)
+                return
+            # Doubling ends the hand, so it is played on a copy and the extra stake is taken with the payout
+            doubled = dict(session, player=list(session["player"]), dealer=list(session["dealer"]))
+            blackjack.double(doubled)
+            outcome, payout = blackjack.result(doubled)
+            if not await self.chip_manager.settle_round(self.user_id, payout, "blackjack", blackjack.stake(doubled),
+                                                        debit=session["bet"]):
+                await interaction.response.send_message("You don't have enough chips to double!", ephemeral=True)
+                return
+            session.update(doubled)
+            self.sessions.pop(key)
+            await interaction.response.edit_message(embed=blackjack_embed(session, outcome, payout), view=None)
+            return
+        
+        if action == "hit":
+            blackjack.hit(session)
+        else:
+            blackjack.stand(session)
+        self.sessions.changed()
+        
+        if session["finished"]:
+            outcome, payout = blackjack.result(session)
+            # The hand stays in the store until it is paid, so a failed settlement is retried when it expires
+            await self.chip_manager.settle_round(self.user_id, payout, "blackjack", blackjack.stake(session))
+            self.sessions.pop(key)
+            await interaction.response.edit_message(embed=blackjack_embed(session, outcome, payout), view=None)
+        else:
+            self.double_button.disabled = True
+            await interaction.response.edit_message(embed=blackjack_embed(session), view=self)
+    
+    @discord.ui.button(label="Hit", style=discord.ButtonStyle.green)
+    async def hit_button(self, interaction: Interaction, button: discord.ui.Button):
+        await self._act(interaction, "hit")
+    
+    @discord.ui.button(label="Stand", style=discord.ButtonStyle.grey)
+    async def stand_button(self, interaction: Interaction, button: discord.ui.Button):
+        await self._act(interaction, "stand")
+    
+    @discord.ui.button(label="Double", style=discord.ButtonStyle.blurple)
+    async def double_button(self, interaction: Interaction, button: discord.ui.Button):
+        await self._act(interaction, "double")